@@ -1,3 +1,9 @@
 from .bullet_physics import BulletPhysics
+from .physics_profile import PhysicsProfile
+from .profiler import Profiler
+from .kinematics import ForwardKinematics
+from .ik_cache import IKCache
 from .entities import Body
 from .bullet_world import BulletWorld, ViSIIBulletWorld
+from .vector_bullet_world import VectorBulletWorld
+from .multi_world import MultiWorld
@@ -0,0 +1,311 @@
+"""Whole-arm torque controllers of RobotArm.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+from bullet_world.transformations import quaternion_about_axis
+from bullet_world.transformations import quaternion_conjugate
+from bullet_world.transformations import quaternion_multiply
+
+
+class ArmController(object):
+    """Base class of the torque controllers of the arm joints of a RobotArm.
+
+    A controller is attached with RobotArm.set_controller and then computes
+    and applies the arm joint torques once per simulation step, i.e. at the
+    time_step of the simulation. Every step reads the states of all movable
+    joints of the arm with one batched call and applies the torques with one
+    setJointMotorControlArray call.
+
+    Args:
+        arm (RobotArm): The robot arm.
+        kp: The stiffness, a single value or one per degree of freedom.
+        kd: The damping, critically damped 2 * sqrt(kp) if it is None.
+    """
+    def __init__(self, arm, kp, kd=None):
+        self.arm = arm
+        self.physics = arm.physics
+
+        body_info = self.physics.get_body_info(arm.uid)
+        self._movable_joint_inds = body_info.movable_joint_inds.tolist()
+        # Columns of the arm joints in the movable joint vectors, e.g. of the
+        # Jacobian and of the mass matrix.
+        self._arm_columns = np.array(
+            [self._movable_joint_inds.index(joint_ind)
+             for (_, joint_ind) in arm.arm_joints], dtype=np.int64)
+        self._num_dofs = len(self._movable_joint_inds)
+        self._zeros = [0.0] * self._num_dofs
+
+        self.kp = np.asarray(kp, dtype=np.float64)
+        if kd is None:
+            self.kd = 2.0 * np.sqrt(self.kp)
+        else:
+            self.kd = np.asarray(kd, dtype=np.float64)
+
+        self._torque_controller = self.physics.create_joint_controller(
+            arm.uid, [joint_ind for (_, joint_ind) in arm.arm_joints],
+            control_mode='torque')
+        self._torques = np.zeros(len(arm.arm_joints), dtype=np.float64)
+
+    @property
+    def torques(self):
+        """The arm joint torques applied by the last step."""
+        return self._torques
+
+    def reset(self):
+        """Hand the arm joints over to the torque control.
+
+        The default velocity motors of the arm joints are disabled, otherwise
+        they would fight the applied torques.
+        """
+        self._torque_controller.disable_motors()
+
+    def read_state(self):
+        """Read the positions and velocities of all movable joints.
+
+        Returns:
+            A tuple of float64 numpy arrays of positions and velocities.
+        """
+        joint_states = self.physics.get_joint_states(
+            self.arm.uid, self._movable_joint_inds)
+        return joint_states['position'], joint_states['velocity']
+
+    def bias_torques(self, positions, velocities):
+        """Gravity, Coriolis and centrifugal torques of all movable joints."""
+        return self.physics.calculate_inverse_dynamics(
+            self.arm.uid, positions.tolist(), velocities.tolist(),
+            self._zeros)
+
+    def compute_torques(self, positions, velocities):
+        """Compute the arm joint torques.
+
+        Args:
+            positions: The positions of all movable joints.
+            velocities: The velocities of all movable joints.
+
+        Returns:
+            A float64 numpy array of the arm joint torques.
+        """
+        raise NotImplementedError
+
+    def step(self):
+        """Compute and apply the arm joint torques of this step."""
+        positions, velocities = self.read_state()
+        self._torques = self.compute_torques(positions, velocities)
+        self._torque_controller.set_targets(self._torques)
+
+
+class JointImpedanceController(ArmController):
+    """Joint impedance control with gravity compensation.
+
+    The stiffness and damping are scaled by the mass matrix of the arm, so
+    that the same gains stay stable on the light wrist joints at a small
+    time step:
+
+        tau = M(q) * (kp * (q_goal - q) - kd * dq) + g(q) + c(q, dq)
+
+    Args:
+        arm (RobotArm): The robot arm.
+        kp: The joint stiffness, a single value or one per arm joint.
+        kd: The joint damping.
+    """
+    def __init__(self, arm, kp=100.0, kd=None):
+        super(JointImpedanceController, self).__init__(arm, kp, kd)
+        self.goal_positions = np.array(arm.init_joint_positions,
+                                       dtype=np.float64)
+
+    def set_goal(self, goal_positions):
+        """Set the goal positions of the arm joints."""
+        self.goal_positions = np.asarray(goal_positions, dtype=np.float64)
+
+    def compute_torques(self, positions, velocities):
+        q = positions[self._arm_columns]
+        dq = velocities[self._arm_columns]
+        arm_columns = self._arm_columns
+        mass_matrix = self.physics.calculate_mass_matrix(
+            self.arm.uid, positions.tolist())[np.ix_(arm_columns,
+                                                     arm_columns)]
+        bias = self.bias_torques(positions, velocities)[arm_columns]
+        return mass_matrix.dot(
+            self.kp * (self.goal_positions - q) - self.kd * dq) + bias
+
+
+class ComputedTorqueController(ArmController):
+    """Computed torque control of a joint trajectory.
+
+    The reference acceleration is turned into torques by the inverse
+    dynamics of the whole arm:
+
+        ddq_ref = ddq_goal + kp * (q_goal - q) + kd * (dq_goal - dq)
+        tau = M(q) * ddq_ref + g(q) + c(q, dq)
+
+    Args:
+        arm (RobotArm): The robot arm.
+        kp: The stiffness, a single value or one per arm joint.
+        kd: The damping.
+    """
+    def __init__(self, arm, kp=400.0, kd=None):
+        super(ComputedTorqueController, self).__init__(arm, kp, kd)
+        num_arm_joints = len(arm.arm_joints)
+        self.goal_positions = np.array(arm.init_joint_positions,
+                                       dtype=np.float64)
+        self.goal_velocities = np.zeros(num_arm_joints, dtype=np.float64)
+        self.goal_accelerations = np.zeros(num_arm_joints, dtype=np.float64)
+        self._accelerations = np.zeros(self._num_dofs, dtype=np.float64)
+
+    def set_goal(self, goal_positions, goal_velocities=None,
+                 goal_accelerations=None):
+        """Set the goal of the arm joints, e.g. a point of a trajectory."""
+        self.goal_positions = np.asarray(goal_positions, dtype=np.float64)
+        if goal_velocities is None:
+            self.goal_velocities[:] = 0.0
+        else:
+            self.goal_velocities = np.asarray(goal_velocities,
+                                              dtype=np.float64)
+        if goal_accelerations is None:
+            self.goal_accelerations[:] = 0.0
+        else:
+            self.goal_accelerations = np.asarray(goal_accelerations,
+                                                 dtype=np.float64)
+
+    def compute_torques(self, positions, velocities):
+        q = positions[self._arm_columns]
+        dq = velocities[self._arm_columns]
+        self._accelerations[self._arm_columns] = (
+            self.goal_accelerations +
+            self.kp * (self.goal_positions - q) +
+            self.kd * (self.goal_velocities - dq))
+        torques = self.physics.calculate_inverse_dynamics(
+            self.arm.uid, positions.tolist(), velocities.tolist(),
+            self._accelerations.tolist())
+        return torques[self._arm_columns]
+
+
+class OperationalSpaceController(ArmController):
+    """Operational space control of the end effector pose.
+
+    The pose error of the center of mass of the end effector link is turned
+    into a wrench through the task space inertia, with a null space torque
+    that pulls the arm towards its neutral joint positions:
+
+        F = Lambda(q) * (kp * e - kd * v)
+        tau = J^T * F + N^T * M(q) * (kp_null * (q_0 - q) - kd_null * dq)
+              + g(q) + c(q, dq)
+
+    Args:
+        arm (RobotArm): The robot arm.
+        kp: The stiffness, a single value or 6 values for the position and
+            the orientation.
+        kd: The damping.
+        kp_null: The null space stiffness.
+        output_max: The maximal delta of set_delta, 0.05 m for the position
+            and 0.5 rad for the orientation by default.
+    """
+    def __init__(self, arm, kp=150.0, kd=None, kp_null=10.0,
+                 output_max=(0.05, 0.05, 0.05, 0.5, 0.5, 0.5)):
+        super(OperationalSpaceController, self).__init__(arm, kp, kd)
+        self.kp_null = kp_null
+        self.kd_null = 2.0 * np.sqrt(kp_null)
+        self.output_max = np.asarray(output_max, dtype=np.float64)
+        self.neutral_positions = np.array(arm.init_joint_positions,
+                                          dtype=np.float64)
+        self.goal_position = None
+        self.goal_quaternion = None
+
+        # The state is read at the center of mass of the end effector link,
+        # the Jacobian must be taken at the same point of the link frame.
+        self._ee_com_offset = [float(value) for value in
+                               self.physics.get_link_local_offset(
+                                   arm.ee_link).position]
+
+    def read_ee_state(self):
+        """Read the pose and velocity of the end effector center of mass.
+
+        Returns:
+            A float64 numpy array of [x, y, z, qx, qy, qz, qw, vx, vy, vz, wx,
+            wy, wz].
+        """
+        body_uid, link_ind = self.arm.ee_link
+        return self.physics.get_link_states(
+            body_uid, [link_ind], frame='com', compute_velocity=True,
+            compute_forward_kinematics=True)[0]
+
+    def reset(self):
+        super(OperationalSpaceController, self).reset()
+        ee_state = self.read_ee_state()
+        self.goal_position = ee_state[:3].copy()
+        self.goal_quaternion = ee_state[3:7].copy()
+
+    def set_goal(self, position, quaternion):
+        """Set the goal pose of the end effector center of mass.
+
+        Args:
+            position: The goal position in the world frame.
+            quaternion: The goal orientation (x, y, z, w) in the world frame.
+        """
+        self.goal_position = np.asarray(position, dtype=np.float64)
+        self.goal_quaternion = np.asarray(quaternion, dtype=np.float64)
+
+    def set_delta(self, action):
+        """Set the goal relative to the current end effector pose.
+
+        This takes the first 6 dimensions of the OSC_POSE actions of
+        bullet_world.utils.input_utils.input2action, i.e. a position delta
+        and an axis-angle rotation delta in [-1, 1], scaled by output_max.
+
+        Args:
+            action: The normalized delta [dx, dy, dz, ax, ay, az].
+        """
+        delta = np.clip(np.asarray(action[:6], dtype=np.float64), -1.0, 1.0)
+        delta *= self.output_max
+        ee_state = self.read_ee_state()
+        self.goal_position = ee_state[:3] + delta[:3]
+
+        angle = np.linalg.norm(delta[3:])
+        if angle > 0.0:
+            rotation = quaternion_about_axis(angle, delta[3:] / angle)
+            self.goal_quaternion = quaternion_multiply(rotation,
+                                                       ee_state[3:7])
+        else:
+            self.goal_quaternion = ee_state[3:7].copy()
+
+    def compute_torques(self, positions, velocities):
+        arm_columns = self._arm_columns
+        ee_state = self.read_ee_state()
+
+        jac_tr, jac_r = self.physics.calculate_jacobian(
+            self.arm.ee_link, self._ee_com_offset, positions.tolist(),
+            velocities.tolist(), self._zeros)
+        jacobian = np.concatenate((jac_tr, jac_r), axis=0)[:, arm_columns]
+        mass_matrix = self.physics.calculate_mass_matrix(
+            self.arm.uid, positions.tolist())[np.ix_(arm_columns,
+                                                     arm_columns)]
+        mass_matrix_inv = np.linalg.inv(mass_matrix)
+
+        # Pose error in the world frame.
+        error = np.empty(6, dtype=np.float64)
+        error[:3] = self.goal_position - ee_state[:3]
+        quaternion_error = quaternion_multiply(
+            self.goal_quaternion, quaternion_conjugate(ee_state[3:7]))
+        if quaternion_error[3] < 0.0:
+            quaternion_error = -quaternion_error
+        error[3:] = 2.0 * quaternion_error[:3]
+
+        lambda_inv = jacobian.dot(mass_matrix_inv).dot(jacobian.T)
+        lambda_full = np.linalg.pinv(lambda_inv)
+        wrench = lambda_full.dot(self.kp * error - self.kd * ee_state[7:])
+
+        q = positions[arm_columns]
+        dq = velocities[arm_columns]
+        jacobian_bar = mass_matrix_inv.dot(jacobian.T).dot(lambda_full)
+        null_space = (np.eye(len(arm_columns)) -
+                      jacobian.T.dot(jacobian_bar.T))
+        null_torques = null_space.dot(mass_matrix.dot(
+            self.kp_null * (self.neutral_positions - q) - self.kd_null * dq))
+
+        bias = self.bias_torques(positions, velocities)[arm_columns]
+        return jacobian.T.dot(wrench) + null_torques + bias
@@ -0,0 +1,92 @@
+"""Static joint and link information of a body.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import pybullet
+
+
+class BodyInfo(object):
+    """Columnar table of the joint and link information of a body.
+
+    None of these values change after the body is loaded, so they are read
+    from pybullet.getJointInfo once and then served from numpy arrays and
+    name-to-index dictionaries.
+
+    Args:
+       joint_infos (list): The tuples returned by pybullet.getJointInfo for
+           every joint of the body, in the order of the joint indices.
+
+    The source of the body is filled in by BulletPhysics.add_body, it stays
+    None for the bodies created from primitive shapes.
+    """
+    def __init__(self, joint_infos):
+        num_joints = len(joint_infos)
+        self.num_joints = num_joints
+
+        self.filename = None
+        self.scale = 1.0
+        self.is_static = False
+        self.load_kwargs = {}
+
+        self.joint_names = []
+        self.link_names = []
+        self.joint_types = np.empty(num_joints, dtype=np.int64)
+        self.q_indices = np.empty(num_joints, dtype=np.int64)
+        self.u_indices = np.empty(num_joints, dtype=np.int64)
+        self.damping = np.empty(num_joints, dtype=np.float64)
+        self.friction = np.empty(num_joints, dtype=np.float64)
+        self.lower_limits = np.empty(num_joints, dtype=np.float64)
+        self.upper_limits = np.empty(num_joints, dtype=np.float64)
+        self.max_forces = np.empty(num_joints, dtype=np.float64)
+        self.max_velocities = np.empty(num_joints, dtype=np.float64)
+        self.joint_axes = np.empty((num_joints, 3), dtype=np.float64)
+        self.parent_frame_positions = np.empty((num_joints, 3),
+                                               dtype=np.float64)
+        self.parent_frame_orientations = np.empty((num_joints, 4),
+                                                  dtype=np.float64)
+        self.parent_indices = np.empty(num_joints, dtype=np.int64)
+
+        for (joint_ind, joint_info) in enumerate(joint_infos):
+            (_, joint_name, joint_type, q_index, u_index, _, damping,
+             friction, lower, upper, max_force, max_vel, link_name,
+             joint_axis, parent_frame_position, parent_frame_orientation,
+             parent_index) = joint_info
+
+            if isinstance(joint_name, bytes):
+                joint_name = joint_name.decode('utf-8')
+            if isinstance(link_name, bytes):
+                link_name = link_name.decode('utf-8')
+
+            self.joint_names.append(joint_name)
+            self.link_names.append(link_name)
+            self.joint_types[joint_ind] = joint_type
+            self.q_indices[joint_ind] = q_index
+            self.u_indices[joint_ind] = u_index
+            self.damping[joint_ind] = damping
+            self.friction[joint_ind] = friction
+            self.lower_limits[joint_ind] = lower
+            self.upper_limits[joint_ind] = upper
+            self.max_forces[joint_ind] = max_force
+            self.max_velocities[joint_ind] = max_vel
+            self.joint_axes[joint_ind] = joint_axis
+            self.parent_frame_positions[joint_ind] = parent_frame_position
+            self.parent_frame_orientations[joint_ind] = parent_frame_orientation
+            self.parent_indices[joint_ind] = parent_index
+
+        self.joint_name_to_index = dict(
+            (name, ind) for (ind, name) in enumerate(self.joint_names))
+        self.link_name_to_index = dict(
+            (name, ind) for (ind, name) in enumerate(self.link_names))
+
+        # Indices of the joints that take part in the generalized
+        # coordinates, e.g. for calculateJacobian and calculateMassMatrix.
+        self.movable_joint_inds = np.flatnonzero(
+            self.joint_types != pybullet.JOINT_FIXED)
+
+    @property
+    def ranges(self):
+        return self.upper_limits - self.lower_limits
@@ -4,6 +4,10 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
+import concurrent.futures
+import contextlib
+import json
 import os
 import time
 
@@ -12,9 +16,16 @@ import pybullet
 import pybullet_data
 import six
 
+from bullet_world.body_info import BodyInfo
+from bullet_world.ik_cache import IKCache
+from bullet_world.joint_controller import JointController
 from bullet_world.math_utils import Orientation
 from bullet_world.math_utils import Pose
+from bullet_world.math_utils import PoseArray
 from bullet_world.logging import logger
+from bullet_world.physics_profile import PhysicsProfile
+from bullet_world.profiler import NULL_SECTION
+from bullet_world.profiler import Profiler
 
 
 JOINT_TYPES_MAPPING = {
@@ -24,13 +35,98 @@ JOINT_TYPES_MAPPING = {
     'point2point': pybullet.JOINT_POINT2POINT
 }
 
+# The record layout returned by BulletPhysics.get_joint_states, one entry per
+# joint in the order of pybullet.getJointStates.
+JOINT_STATE_DTYPE = np.dtype([
+    ('position', np.float64),
+    ('velocity', np.float64),
+    ('reaction_force', np.float64, (6,)),
+    ('torque', np.float64),
+])
+
+# The motor command of each joint as last sent by BulletPhysics, see
+# get_motor_targets. control_mode is -1 if no command was sent and NaN marks
+# the arguments left to the pybullet defaults.
+MOTOR_TARGET_DTYPE = np.dtype([
+    ('control_mode', np.int64),
+    ('target_position', np.float64),
+    ('target_velocity', np.float64),
+    ('force', np.float64),
+    ('position_gain', np.float64),
+    ('velocity_gain', np.float64),
+])
+
+# The record layout returned by BulletPhysics.get_contacts, with the fields of
+# the tuples of pybullet.getContactPoints in the same order. All fields are
+# 8-byte words, which get_contacts relies on.
+CONTACT_POINT_DTYPE = np.dtype([
+    ('contact_flag', np.int64),
+    ('body_a', np.int64),
+    ('body_b', np.int64),
+    ('link_a', np.int64),
+    ('link_b', np.int64),
+    ('position_on_a', np.float64, (3,)),
+    ('position_on_b', np.float64, (3,)),
+    ('contact_normal_on_b', np.float64, (3,)),
+    ('contact_distance', np.float64),
+    ('normal_force', np.float64),
+    ('lateral_friction_1', np.float64),
+    ('lateral_friction_dir_1', np.float64, (3,)),
+    ('lateral_friction_2', np.float64),
+    ('lateral_friction_dir_2', np.float64, (3,)),
+])
+
+# The methods of BulletPhysics that the profiler does not time.
+PROFILER_EXCLUDED_METHODS = ('enable_profiler', 'disable_profiler',
+                             'profile_section')
+
+# The result of BulletPhysics.step. real_time_factor is the simulated time
+# over the wall-clock time, and stopped is True if the stepping ended early
+# because of the until or the timeout condition.
+StepInfo = collections.namedtuple('StepInfo', [
+    'num_steps', 'sim_time', 'wall_time', 'real_time_factor', 'stopped'])
+
+# The keyword arguments of BulletPhysics.add_body that place the shapes of a
+# mesh, they are part of the shape cache key.
+MESH_FRAME_KWARGS = (
+    'collisionFramePosition',
+    'collisionFrameOrientation',
+    'visualFramePosition',
+    'visualFrameOrientation',
+)
+
+# The keyword arguments of pybullet.calculateInverseKinematics besides the
+# target, they are part of the IK cache key.
+IK_CACHE_OPTIONS = (
+    'lowerLimits',
+    'upperLimits',
+    'jointRanges',
+    'jointDamping',
+    'restPoses',
+)
+
+# The minimal number of poses of each worker process of
+# compute_inverse_kinematics_batch. Starting a worker and loading the body
+# takes about 0.2 s, the time of solving about a thousand poses.
+IK_POOL_MIN_POSES_PER_WORKER = 2000
+
+# The position index of each link frame in the tuple of pybullet.getLinkState.
+# The orientation follows right after the position.
+LINK_FRAME_OFFSETS = {
+    'link': 4,
+    'com': 0,
+    'local_offset': 2,
+}
+
 class BulletPhysics():
     """Physics API wrapper for Bullet."""
 
     def __init__(self,
                  time_step=1e-3,
                  use_visualizer=True,
-                 worker_id=0):
+                 worker_id=0,
+                 max_snapshots=64,
+                 physics_profile=None):
         """
         Initialization function.
 
@@ -39,28 +135,81 @@ class BulletPhysics():
                 simulation if it is set to None.
             use_visualizer: If use the visualizer.
             worker_id: The key of the simulation client.
+            max_snapshots: The maximal number of saved states that are not
+                pinned, unbounded if it is None.
+            physics_profile: The physics engine parameters applied by start,
+                see PhysicsProfile.get. The pybullet defaults are kept if it
+                is None.
         """
         logger.info('pybullet API Version: %s.' % (pybullet.getAPIVersion()))
         if use_visualizer:
             self._uid = pybullet.connect(pybullet.GUI)
-            pybullet.configureDebugVisualizer(pybullet.COV_ENABLE_SHADOWS, 1)
-            pybullet.configureDebugVisualizer(pybullet.COV_ENABLE_GUI, 0)
+            pybullet.configureDebugVisualizer(pybullet.COV_ENABLE_SHADOWS, 1,
+                                              physicsClientId=self._uid)
+            pybullet.configureDebugVisualizer(pybullet.COV_ENABLE_GUI, 0,
+                                              physicsClientId=self._uid)
             assert worker_id == 0
             logger.info('Connected client %d to GUI.', self._uid)
         else:
             logger.info('Use worker_id %d for the simulation.', worker_id)
             self._uid = pybullet.connect(pybullet.DIRECT, key=worker_id)
             logger.info('Connected client %d to DIRECT.', self._uid)
-        pybullet.setAdditionalSearchPath(pybullet_data.getDataPath())
+        pybullet.setAdditionalSearchPath(pybullet_data.getDataPath(),
+                                         physicsClientId=self._uid)
 
         self._time_step = time_step
         self._start_time = None
         self._num_steps = None
 
+        # The numSubSteps the physics engine is configured with, see step.
+        self._engine_substeps = 1
+
+        # The Profiler while profiling is enabled, see enable_profiler.
+        self._profiler = None
+        self._engine_timings_file = None
+        self._engine_timings_log = None
+
+        if physics_profile is None:
+            self._physics_profile = None
+        else:
+            self._physics_profile = PhysicsProfile.get(physics_profile)
+
         self._gravity = None
 
         self._use_visualizer = use_visualizer
 
+        # The nesting depth of batch_edit.
+        self._batch_edit_depth = 0
+
+        # body_uid -> BodyInfo, filled when the body is loaded.
+        self._body_infos = {}
+
+        # body_uid -> array of MOTOR_TARGET_DTYPE, filled by the control
+        # functions.
+        self._motor_targets = {}
+
+        # Load caches, see get_cache_stats. They are dropped with the
+        # simulation on reset.
+        self._path_cache = {}
+        self._shape_cache = {}
+        self._cache_stats = {
+            'path': {'hits': 0, 'misses': 0},
+            'shape': {'hits': 0, 'misses': 0},
+        }
+
+        # The IKCache of compute_inverse_kinematics, see enable_ik_cache.
+        self._ik_cache = None
+
+        # The results of the contact queries since the last step.
+        self._contacts = None
+
+        # state_id -> wrapper state at save time, in LRU order. The ids are
+        # handed out by the wrapper and never reused, unlike the pybullet ids
+        # of the states.
+        self._max_snapshots = max_snapshots
+        self._snapshots = collections.OrderedDict()
+        self._next_snapshot_id = 0
+
     #
     # Properties
     #
@@ -91,15 +240,186 @@ class BulletPhysics():
     def gravity(self):
         return self._gravity
 
+    @property
+    def physics_profile(self):
+        return self._physics_profile
+
     def __del__(self):
-        pybullet.disconnect(physicsClientId=self.uid)
+        self.disconnect()
+
+    def disconnect(self):
+        """Disconnect from the pybullet server.
+
+        The client and everything in it are released, the instance cannot be
+        used afterwards. Disconnecting twice does nothing.
+        """
+        if getattr(self, '_uid', None) is None:
+            return
+        pybullet.disconnect(physicsClientId=self._uid)
         logger.info('Disconnected client %d to pybullet server.', self._uid)
+        self._uid = None
 
     def reset(self):
         """Reset the simulation."""
+        self.remove_all_states()
         pybullet.resetSimulation(physicsClientId=self.uid)
         self._start_time = None
         self._num_steps = None
+        self._body_infos = {}
+        self._motor_targets = {}
+        self._path_cache = {}
+        self._shape_cache = {}
+        self._contacts = None
+        if self._ik_cache is not None:
+            self._ik_cache.clear()
+
+    #
+    # Profiling
+    #
+
+    @property
+    def profiler(self):
+        return self._profiler
+
+    def enable_profiler(self, profiler=None, engine_timings_file=None):
+        """Time every call of the public methods of this instance.
+
+        The methods are wrapped on this instance only while the profiling is
+        enabled, so the disabled profiler costs nothing.
+
+        Args:
+            profiler: The Profiler collecting the statistics, a new one if it
+                is None. It can be shared by several BulletPhysics.
+            engine_timings_file: If given, the internal timers of pybullet
+                are logged with STATE_LOGGING_PROFILE_TIMINGS to this file
+                name and added to the profiler by disable_profiler.
+
+        Returns:
+            The Profiler.
+        """
+        if self._profiler is not None:
+            self.disable_profiler()
+        if profiler is None:
+            profiler = Profiler()
+        profiler.wrap(self, exclude=PROFILER_EXCLUDED_METHODS)
+        self._profiler = profiler
+
+        if engine_timings_file is not None:
+            self._engine_timings_file = engine_timings_file
+            self._engine_timings_log = pybullet.startStateLogging(
+                pybullet.STATE_LOGGING_PROFILE_TIMINGS, engine_timings_file,
+                physicsClientId=self.uid)
+        return profiler
+
+    def disable_profiler(self):
+        """Stop timing the calls.
+
+        Returns:
+            The Profiler with the statistics, e.g. to dump them, or None if
+            the profiling was not enabled.
+        """
+        profiler = self._profiler
+        if profiler is None:
+            return None
+        profiler.unwrap()
+        self._profiler = None
+
+        if self._engine_timings_log is not None:
+            pybullet.stopStateLogging(self._engine_timings_log,
+                                      physicsClientId=self.uid)
+            profiler.load_engine_timings(self._engine_timings_file)
+            self._engine_timings_file = None
+            self._engine_timings_log = None
+        return profiler
+
+    def profile_section(self, name):
+        """Time a block of code while the profiling is enabled:
+
+            with physics.profile_section('render'):
+                ...
+
+        Args:
+            name: The name of the block in the statistics.
+        """
+        if self._profiler is None:
+            return NULL_SECTION
+        return self._profiler.section(name)
+
+    #
+    # IK cache
+    #
+
+    @property
+    def ik_cache(self):
+        return self._ik_cache
+
+    def enable_ik_cache(self, ik_cache=None, **kwargs):
+        """Cache the solutions of compute_inverse_kinematics.
+
+        Repeated targets within the tolerances of the cache are then a
+        dictionary lookup. The batched solvers are not cached.
+
+        Args:
+            ik_cache: The IKCache, a new one if it is None.
+            **kwargs: The arguments of the new IKCache.
+
+        Returns:
+            The IKCache.
+        """
+        if ik_cache is None:
+            ik_cache = IKCache(**kwargs)
+        self._ik_cache = ik_cache
+        return ik_cache
+
+    def disable_ik_cache(self):
+        """Stop caching the inverse kinematics.
+
+        Returns:
+            The IKCache with its statistics, or None if the cache was not
+            enabled.
+        """
+        ik_cache = self._ik_cache
+        self._ik_cache = None
+        return ik_cache
+
+    def set_rendering(self, enabled):
+        """Enable or disable the rendering of the visualizer.
+
+        This is a no-op without the visualizer, so that DIRECT clients do not
+        pay for a round trip on every body that is loaded.
+
+        Args:
+            enabled: True to enable the rendering.
+        """
+        if self._use_visualizer:
+            pybullet.configureDebugVisualizer(
+                pybullet.COV_ENABLE_RENDERING, int(enabled),
+                physicsClientId=self.uid)
+
+    @contextlib.contextmanager
+    def batch_edit(self):
+        """Suspend the rendering of the visualizer while editing the scene.
+
+        The rendering is disabled when the outermost block is entered and
+        enabled again when it is left, so that many bodies can be loaded
+        without a redraw of the visualizer in between:
+
+            with physics.batch_edit():
+                for filename in filenames:
+                    physics.add_body(filename, pose)
+        """
+        if self._batch_edit_depth == 0:
+            self.set_rendering(False)
+            start_time = time.time()
+        self._batch_edit_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_edit_depth -= 1
+            if self._batch_edit_depth == 0:
+                self.set_rendering(True)
+                logger.debug('Edited the scene of client %d in %.3f s.',
+                             self.uid, time.time() - start_time)
 
     def start(self):
         """Start the simulation."""
@@ -109,13 +429,137 @@ class BulletPhysics():
             pybullet.setRealTimeSimulation(0, physicsClientId=self.uid)
             pybullet.setTimeStep(self._time_step, physicsClientId=self.uid)
 
+        if self._physics_profile is not None:
+            self._apply_physics_profile()
+
         self._start_time = time.time()
         self._num_steps = 0
+        self._engine_substeps = 1
+
+    def set_physics_profile(self, physics_profile):
+        """Set the physics engine parameters.
 
-    def step(self):
-        """Step the simulation."""
-        pybullet.stepSimulation(physicsClientId=self.uid)
-        self._num_steps += 1
+        The parameters are applied right away if the simulation is started,
+        and again by every following start.
+
+        Args:
+            physics_profile: An instance of PhysicsProfile, the name of a
+                profile, the path of a YAML file or a configuration
+                dictionary, see PhysicsProfile.get.
+        """
+        self._physics_profile = PhysicsProfile.get(physics_profile)
+        if self._num_steps is not None:
+            self._apply_physics_profile()
+
+    def _apply_physics_profile(self):
+        logger.info('Use the physics profile %s.', self._physics_profile.name)
+        pybullet.setPhysicsEngineParameter(
+            physicsClientId=self.uid,
+            **self._physics_profile.engine_parameters)
+
+    def _set_engine_substeps(self, num_substeps):
+        """Make one stepSimulation call advance num_substeps time steps."""
+        if num_substeps == self._engine_substeps:
+            return
+        pybullet.setPhysicsEngineParameter(
+            fixedTimeStep=self._time_step * num_substeps,
+            numSubSteps=num_substeps if num_substeps > 1 else 0,
+            physicsClientId=self.uid)
+        self._engine_substeps = num_substeps
+
+    def _get_torque_commands(self):
+        """The setJointMotorControlArray arguments of the last torques."""
+        torque_commands = []
+        for (body_uid, motor_targets) in self._motor_targets.items():
+            joint_inds = np.flatnonzero(
+                motor_targets['control_mode'] == pybullet.TORQUE_CONTROL)
+            if len(joint_inds) == 0:
+                continue
+            torque_commands.append({
+                'physicsClientId': self.uid,
+                'bodyUniqueId': body_uid,
+                'jointIndices': joint_inds.tolist(),
+                'controlMode': pybullet.TORQUE_CONTROL,
+                'forces': motor_targets['force'][joint_inds].tolist(),
+            })
+        return torque_commands
+
+    def step(self, num_substeps=1, controller=None, until=None,
+             timeout=None):
+        """Step the simulation.
+
+        Without controller, until and timeout, the substeps are run by the
+        physics engine within a single stepSimulation call, using its
+        numSubSteps parameter. Otherwise they are run by a loop that calls
+        the controller before every substep and checks the stop conditions
+        after every substep, e.g. to run an action at 20 Hz with a time step
+        of 1 ms:
+
+            info = physics.step(50, controller=arm_controller.step,
+                                until=lambda: physics.get_contact_points(
+                                    gripper_uid, object_uid))
+
+        Args:
+            num_substeps: The number of time steps.
+            controller: A callable, or an object with a step method, run
+                before every substep, e.g. an ArmController. Without it, the
+                last torques of the joints under torque control are applied
+                in every substep.
+            until: A callable run after every substep, the stepping stops
+                early once it returns a truthy value.
+            timeout: The maximal wall-clock time in seconds, the stepping
+                stops early once it is exceeded.
+
+        Returns:
+            A StepInfo of the number of substeps run, the simulated and the
+            wall-clock time.
+        """
+        start_time = time.time()
+        stopped = False
+        torque_commands = None
+        if controller is None and num_substeps > 1:
+            # pybullet drops the torques after every stepSimulation, the last
+            # ones are sent again before every substep.
+            torque_commands = self._get_torque_commands()
+
+        if (controller is None and until is None and timeout is None and
+                not torque_commands and self._time_step is not None):
+            self._set_engine_substeps(num_substeps)
+            pybullet.stepSimulation(physicsClientId=self.uid)
+            self._contacts = None
+            num_steps = num_substeps
+        else:
+            if self._time_step is not None:
+                self._set_engine_substeps(1)
+            if controller is not None and not callable(controller):
+                controller = controller.step
+            num_steps = 0
+            while num_steps < num_substeps:
+                if controller is not None:
+                    controller()
+                elif num_steps > 0 and torque_commands:
+                    for kwargs in torque_commands:
+                        pybullet.setJointMotorControlArray(**kwargs)
+                pybullet.stepSimulation(physicsClientId=self.uid)
+                self._contacts = None
+                num_steps += 1
+                if until is not None and until():
+                    stopped = True
+                    break
+                if (timeout is not None and
+                        time.time() - start_time > timeout):
+                    stopped = True
+                    break
+        self._num_steps += num_steps
+
+        wall_time = time.time() - start_time
+        sim_time = num_steps * (self._time_step or 0.0)
+        if wall_time > 0.0:
+            real_time_factor = sim_time / wall_time
+        else:
+            real_time_factor = float('inf')
+        return StepInfo(num_steps, sim_time, wall_time, real_time_factor,
+                        stopped)
 
     def is_real_time(self):
         """If the simulation is real-time.
@@ -154,6 +598,7 @@ class BulletPhysics():
                  pose,
                  scale=1.0,
                  is_static=False,
+                 cache_graphics_shapes=False,
                  **kwargs):
         """Load a body into the simulation.
 
@@ -164,13 +609,15 @@ class BulletPhysics():
                 a tuple of position and orientation.
             scale: The global scaling factor.
             is_static: If set the pose of the base to be fixed.
+            cache_graphics_shapes: If set, the visual shapes of a urdf file
+                are loaded once and shared with the later bodies of the same
+                file, which then also share their colors and textures.
             **kwargs: extra arguments intended for loading obj file
 
         Returns:
             body_uid: The unique ID of the body.
         """
-        filename = os.path.abspath(filename)
-        assert os.path.exists(filename), 'File %s does not exist.' % filename
+        filename = self._resolve_path(filename)
         _, ext = os.path.splitext(filename)
 
         pose = Pose(pose)
@@ -180,61 +627,189 @@ class BulletPhysics():
         if ext == '.urdf':
             # Do not use pybullet.URDF_USE_SELF_COLLISION since it will cause
             # problems for the motor control in Bullet.
-            pybullet.configureDebugVisualizer(pybullet.COV_ENABLE_RENDERING, 0)
-            body_uid = pybullet.loadURDF(
-                fileName=filename,
-                basePosition=position,
-                baseOrientation=quaternion,
-                globalScaling=scale,
-                useFixedBase=is_static,
-                physicsClientId=self.uid,
-                flags=pybullet.URDF_USE_SELF_COLLISION_EXCLUDE_PARENT,
-                )
-            pybullet.configureDebugVisualizer(pybullet.COV_ENABLE_RENDERING, 1)
+            with self.batch_edit():
+                body_uid = pybullet.loadURDF(
+                    fileName=filename,
+                    basePosition=position,
+                    baseOrientation=quaternion,
+                    globalScaling=scale,
+                    useFixedBase=is_static,
+                    physicsClientId=self.uid,
+                    flags=_get_urdf_flags(cache_graphics_shapes),
+                    )
 
         elif ext == '.obj':
-            collision_kwargs = {'physicsClientId': self.uid}
-            visual_kwargs = {'physicsClientId': self.uid}
             body_kwargs = {'physicsClientId': self.uid}
-
-            if 'collisionFramePosition' in kwargs:
-                collision_kwargs['collisionFramePosition'] = kwargs['collisionFramePosition']
-            if 'collisionFrameOrientation' in kwargs:
-                collision_kwargs['collisionFrameOrientation'] = kwargs['collisionFrameOrientation']
-
-            collision_shape_id = pybullet.createCollisionShape(pybullet.GEOM_MESH,
-                                                               fileName=filename,
-                                                               meshScale=[scale] * 3,
-                                                               **collision_kwargs)
-            if 'visualFramePosition' in kwargs:
-                visual_kwargs['visualFramePosition'] = kwargs['visualFramePosition']
-            if 'visualFrameOrientation' in kwargs:
-                visual_kwargs['visualFrameOrientation'] = kwargs['visualFrameOrientation']
-                
-            visual_shape_id = pybullet.createVisualShape(pybullet.GEOM_MESH,
-                                                         fileName=filename,
-                                                         meshScale=[scale] * 3,
-                                                         **visual_kwargs)
-            pybullet.configureDebugVisualizer(pybullet.COV_ENABLE_RENDERING, 0)
-
             if 'baseMass' in kwargs:
                 body_kwargs['baseMass'] = kwargs['baseMass']
             else:
                 # Default baseMass to be 0.1
                 body_kwargs['baseMass'] = 0.1
-            
-            body_uid = pybullet.createMultiBody(baseCollisionShapeIndex=collision_shape_id,
-                                                baseVisualShapeIndex=visual_shape_id,
-                                                basePosition=position,
-                                                baseOrientation=quaternion,
-                                                **body_kwargs
-            )
-            pybullet.configureDebugVisualizer(pybullet.COV_ENABLE_RENDERING, 1)
+
+            with self.batch_edit():
+                collision_shape_id, visual_shape_id = self._get_mesh_shapes(
+                    filename, scale, kwargs)
+                body_uid = pybullet.createMultiBody(baseCollisionShapeIndex=collision_shape_id,
+                                                    baseVisualShapeIndex=visual_shape_id,
+                                                    basePosition=position,
+                                                    baseOrientation=quaternion,
+                                                    **body_kwargs
+                )
         
         else:
             raise ValueError('Unrecognized extension %s.' % ext)
 
-        return int(body_uid)
+        body_uid = int(body_uid)
+        body_info = self.get_body_info(body_uid)
+        body_info.filename = filename
+        body_info.scale = scale
+        body_info.is_static = is_static
+        body_info.load_kwargs = kwargs
+        if cache_graphics_shapes:
+            kwargs['cache_graphics_shapes'] = True
+        return body_uid
+
+    def _resolve_path(self, filename):
+        """Get the absolute path of a body file.
+
+        The existence of the file is only checked the first time, the paths
+        are relative to the working directory at that time. The paths are
+        forgotten on reset.
+        """
+        path = self._path_cache.get(filename)
+        if path is not None:
+            self._cache_stats['path']['hits'] += 1
+            return path
+
+        self._cache_stats['path']['misses'] += 1
+        path = os.path.abspath(filename)
+        assert os.path.exists(path), 'File %s does not exist.' % path
+        self._path_cache[filename] = path
+        return path
+
+    def _get_mesh_shapes(self, filename, scale, kwargs):
+        """Get the collision and visual shapes of a mesh file.
+
+        The shapes are created once per (filename, scale, frame offsets) and
+        shared by all the bodies loaded from them.
+
+        Returns:
+            A tuple of the collision shape ID and the visual shape ID.
+        """
+        frames = tuple(
+            (name, tuple(np.ravel(kwargs[name]).tolist()))
+            for name in MESH_FRAME_KWARGS if name in kwargs)
+        key = (filename, scale, frames)
+        shapes = self._shape_cache.get(key)
+        if shapes is not None:
+            self._cache_stats['shape']['hits'] += 1
+            return shapes
+
+        self._cache_stats['shape']['misses'] += 1
+        collision_kwargs = {'physicsClientId': self.uid}
+        visual_kwargs = {'physicsClientId': self.uid}
+
+        if 'collisionFramePosition' in kwargs:
+            collision_kwargs['collisionFramePosition'] = kwargs['collisionFramePosition']
+        if 'collisionFrameOrientation' in kwargs:
+            collision_kwargs['collisionFrameOrientation'] = kwargs['collisionFrameOrientation']
+
+        collision_shape_id = pybullet.createCollisionShape(pybullet.GEOM_MESH,
+                                                           fileName=filename,
+                                                           meshScale=[scale] * 3,
+                                                           **collision_kwargs)
+        if 'visualFramePosition' in kwargs:
+            visual_kwargs['visualFramePosition'] = kwargs['visualFramePosition']
+        if 'visualFrameOrientation' in kwargs:
+            visual_kwargs['visualFrameOrientation'] = kwargs['visualFrameOrientation']
+
+        visual_shape_id = pybullet.createVisualShape(pybullet.GEOM_MESH,
+                                                     fileName=filename,
+                                                     meshScale=[scale] * 3,
+                                                     **visual_kwargs)
+
+        shapes = (collision_shape_id, visual_shape_id)
+        self._shape_cache[key] = shapes
+        return shapes
+
+    def get_cache_stats(self):
+        """Get the hit rates of the load caches and of the IK cache.
+
+        Returns:
+            A dictionary from the cache name ('path', 'shape', or 'ik' while
+            the IK cache is enabled) to a dictionary of the hits, misses and
+            hit_rate.
+        """
+        stats = {}
+        for (name, counts) in self._cache_stats.items():
+            total = counts['hits'] + counts['misses']
+            stats[name] = {
+                'hits': counts['hits'],
+                'misses': counts['misses'],
+                'hit_rate': counts['hits'] / total if total > 0 else 0.0,
+            }
+        if self._ik_cache is not None:
+            stats['ik'] = self._ik_cache.get_stats()
+        return stats
+
+    def clone_body(self, body_uid, pose=None):
+        """Add a copy of a body.
+
+        The copy is created by a single loadURDF or createMultiBody call with
+        the resolved path, flags and cached mesh shapes of the original, and
+        shares its BodyInfo instead of reading the joint information again.
+
+        Args:
+            body_uid: The body Unique ID of the original.
+            pose: The pose of the base of the copy, the pose of the original
+                is used if it is None.
+
+        Returns:
+            body_uid: The unique ID of the copy.
+        """
+        body_info = self.get_body_info(body_uid)
+        if pose is None:
+            pose = self.get_base_link_pose(body_uid)
+        elif not isinstance(pose, Pose):
+            pose = Pose(pose)
+        position = list(pose.position)
+        quaternion = list(pose.quaternion)
+        load_kwargs = body_info.load_kwargs
+
+        with self.batch_edit():
+            if body_info.filename is None:
+                if not load_kwargs:
+                    raise ValueError('Body %d was not added by BulletPhysics.'
+                                     % body_uid)
+                kwargs = dict(load_kwargs)
+                kwargs['basePosition'] = position
+                kwargs['baseOrientation'] = quaternion
+                new_body_uid = pybullet.createMultiBody(
+                    physicsClientId=self.uid, **kwargs)
+            elif body_info.filename.endswith('.urdf'):
+                new_body_uid = pybullet.loadURDF(
+                    fileName=body_info.filename,
+                    basePosition=position,
+                    baseOrientation=quaternion,
+                    globalScaling=body_info.scale,
+                    useFixedBase=body_info.is_static,
+                    physicsClientId=self.uid,
+                    flags=_get_urdf_flags(
+                        load_kwargs.get('cache_graphics_shapes', False)))
+            else:
+                collision_shape_id, visual_shape_id = self._get_mesh_shapes(
+                    body_info.filename, body_info.scale, load_kwargs)
+                new_body_uid = pybullet.createMultiBody(
+                    baseCollisionShapeIndex=collision_shape_id,
+                    baseVisualShapeIndex=visual_shape_id,
+                    basePosition=position,
+                    baseOrientation=quaternion,
+                    baseMass=load_kwargs.get('baseMass', 0.1),
+                    physicsClientId=self.uid)
+
+        new_body_uid = int(new_body_uid)
+        self._body_infos[new_body_uid] = body_info
+        return new_body_uid
 
     def create_collision_shape(self, *args, **kwargs):
         kwargs["physicsClientId"] = self.uid
@@ -245,9 +820,146 @@ class BulletPhysics():
         return pybullet.createVisualShape(*args, **kwargs)
 
     def add_primitive_body(self, **kwargs):
-        kwargs["physicsClientId"] = self.uid
-        body_uid = pybullet.createMultiBody(**kwargs)
-        return int(body_uid)
+        body_uid = int(pybullet.createMultiBody(physicsClientId=self.uid,
+                                                **kwargs))
+        self.get_body_info(body_uid).load_kwargs = kwargs
+        return body_uid
+
+    def add_bodies_batch(self,
+                         shape,
+                         poses,
+                         masses=None,
+                         colors=None,
+                         scale=1.0,
+                         is_static=False,
+                         cache_graphics_shapes=False,
+                         **kwargs):
+        """Add many copies of a body at once.
+
+        Primitive and mesh bodies are created by a single createMultiBody
+        call with batchPositions, URDF bodies are loaded one by one. The
+        rendering is disabled once for the whole batch.
+
+        Args:
+            shape: The path to a urdf or obj file, or a dictionary of the
+                arguments of add_primitive_body, e.g. the collision and visual
+                shape IDs.
+            poses: The poses of the bases, as an instance of PoseArray or
+                anything accepted by PoseArray.
+            masses: The mass of the bases, a single value or one per body.
+                The default mass of the shape is kept if it is None.
+            colors: The RGBA color of the bases, a single color or one per
+                body. The colors are not changed if it is None.
+            scale: The global scaling factor of files.
+            is_static: If set the pose of the base to be fixed.
+            cache_graphics_shapes: See add_body.
+            **kwargs: extra arguments intended for loading obj file
+
+        Returns:
+            body_uids: An int64 numpy array of the unique IDs of the bodies.
+        """
+        if not isinstance(poses, PoseArray):
+            poses = PoseArray(poses)
+        if len(poses) == 0:
+            return np.empty(0, dtype=np.int64)
+        positions = poses.position.tolist()
+        quaternions = poses.quaternion.tolist()
+        filename = None
+
+        with self.batch_edit():
+            if isinstance(shape, dict):
+                load_kwargs = dict(shape)
+                body_kwargs = dict(shape)
+            else:
+                filename = self._resolve_path(shape)
+                load_kwargs = kwargs
+                if cache_graphics_shapes:
+                    load_kwargs['cache_graphics_shapes'] = True
+                _, ext = os.path.splitext(filename)
+                if ext == '.urdf':
+                    body_uids = [
+                        pybullet.loadURDF(
+                            fileName=filename,
+                            basePosition=position,
+                            baseOrientation=quaternion,
+                            globalScaling=scale,
+                            useFixedBase=is_static,
+                            physicsClientId=self.uid,
+                            flags=_get_urdf_flags(cache_graphics_shapes))
+                        for (position, quaternion) in zip(positions,
+                                                          quaternions)]
+                    body_kwargs = None
+                elif ext == '.obj':
+                    collision_shape_id, visual_shape_id = (
+                        self._get_mesh_shapes(filename, scale, kwargs))
+                    body_kwargs = {
+                        'baseCollisionShapeIndex': collision_shape_id,
+                        'baseVisualShapeIndex': visual_shape_id,
+                        # Default baseMass to be 0.1
+                        'baseMass': kwargs.get('baseMass', 0.1),
+                    }
+                else:
+                    raise ValueError('Unrecognized extension %s.' % ext)
+
+            if body_kwargs is not None:
+                if is_static:
+                    body_kwargs['baseMass'] = 0.0
+                elif masses is not None and np.ndim(masses) == 0:
+                    body_kwargs['baseMass'] = masses
+                    masses = None
+                body_uids = self._create_multi_body_batch(
+                    body_kwargs, positions, quaternions)
+
+            body_uids = np.array(body_uids, dtype=np.int64).reshape(-1)
+
+            if masses is not None and not is_static:
+                masses = np.broadcast_to(masses, body_uids.shape)
+                for (body_uid, mass) in zip(body_uids.tolist(),
+                                            masses.tolist()):
+                    self.set_body_mass(body_uid, mass)
+
+            if colors is not None:
+                colors = np.broadcast_to(colors, body_uids.shape + (4,))
+                for (body_uid, color) in zip(body_uids.tolist(),
+                                             colors.tolist()):
+                    self.set_body_color(body_uid, color, None)
+
+        # All the bodies of a batch share the same static information.
+        body_info = self.get_body_info(int(body_uids[0]))
+        body_info.filename = filename
+        body_info.scale = scale
+        body_info.is_static = is_static
+        body_info.load_kwargs = load_kwargs
+        for body_uid in body_uids[1:].tolist():
+            self._body_infos[body_uid] = body_info
+
+        return body_uids
+
+    def _create_multi_body_batch(self, body_kwargs, positions, quaternions):
+        """Create a single-link body at each position in one call.
+
+        Returns:
+            The list of the body unique IDs.
+        """
+        if len(positions) == 1:
+            return [pybullet.createMultiBody(
+                basePosition=positions[0], baseOrientation=quaternions[0],
+                physicsClientId=self.uid, **body_kwargs)]
+
+        body_uids = pybullet.createMultiBody(
+            batchPositions=positions, baseOrientation=quaternions[0],
+            physicsClientId=self.uid, **body_kwargs)
+        # The client does not learn about batched bodies by itself.
+        pybullet.syncBodyInfo(physicsClientId=self.uid)
+
+        # batchPositions shares one orientation between all bodies.
+        for (body_uid, position, quaternion) in zip(
+                body_uids, positions, quaternions):
+            if quaternion != quaternions[0]:
+                pybullet.resetBasePositionAndOrientation(
+                    bodyUniqueId=body_uid, posObj=position,
+                    ornObj=quaternion, physicsClientId=self.uid)
+        return list(body_uids)
 
     def remove_body(self, body_uid):
         """Remove the body.
@@ -257,6 +969,69 @@ class BulletPhysics():
         """
         pybullet.removeBody(
                 bodyUniqueId=body_uid, physicsClientId=self.uid)
+        self._body_infos.pop(body_uid, None)
+        self._motor_targets.pop(body_uid, None)
+        self._contacts = None
+
+    def get_body_uids(self):
+        """Get the unique IDs of all bodies in the simulation.
+
+        Returns:
+            A list of body unique IDs in ascending order.
+        """
+        num_bodies = pybullet.getNumBodies(physicsClientId=self.uid)
+        return sorted(
+            pybullet.getBodyUniqueId(i, physicsClientId=self.uid)
+            for i in range(num_bodies))
+
+    def get_body_info(self, body_uid):
+        """Get the static joint and link information of the body.
+
+        The information is read from pybullet once and cached until the body
+        is removed or the simulation is reset.
+
+        Args:
+            body_uid: The body Unique ID.
+
+        Returns:
+            An instance of BodyInfo.
+        """
+        body_info = self._body_infos.get(body_uid)
+        if body_info is None:
+            num_joints = pybullet.getNumJoints(
+                bodyUniqueId=body_uid, physicsClientId=self.uid)
+            joint_infos = [
+                pybullet.getJointInfo(bodyUniqueId=body_uid,
+                                      jointIndex=joint_ind,
+                                      physicsClientId=self.uid)
+                for joint_ind in range(num_joints)]
+            body_info = BodyInfo(joint_infos)
+            self._body_infos[body_uid] = body_info
+        return body_info
+
+    def get_joint_index(self, body_uid, joint_name):
+        """Get the index of the joint by its name.
+
+        Args:
+            body_uid: The body Unique ID.
+            joint_name: The name of the joint.
+
+        Returns:
+            The joint index.
+        """
+        return self.get_body_info(body_uid).joint_name_to_index[joint_name]
+
+    def get_link_index(self, body_uid, link_name):
+        """Get the index of the link by its name.
+
+        Args:
+            body_uid: The body Unique ID.
+            link_name: The name of the link.
+
+        Returns:
+            The link index.
+        """
+        return self.get_body_info(body_uid).link_name_to_index[link_name]
 
     def get_body_pose(self, body_uid):
         """Get the pose of the body.
@@ -273,6 +1048,61 @@ class BulletPhysics():
                 bodyUniqueId=body_uid, physicsClientId=self.uid)
         return Pose([position, quaternion])
 
+    def get_base_link_pose(self, body_uid):
+        """Get the pose of the frame of the base link.
+
+        The pose of the body is the pose of the inertial frame of the base,
+        this is the frame of the base link as defined in the URDF file, which
+        the link frames of get_link_pose are attached to.
+
+        Args:
+            body_uid: The body Unique ID.
+
+        Returns:
+            An instance of Pose.
+        """
+        position, quaternion = pybullet.getBasePositionAndOrientation(
+                bodyUniqueId=body_uid, physicsClientId=self.uid)
+        local_position, local_quaternion = pybullet.getDynamicsInfo(
+            bodyUniqueId=body_uid, linkIndex=-1,
+            physicsClientId=self.uid)[3:5]
+        inverse_position, inverse_quaternion = pybullet.invertTransform(
+            local_position, local_quaternion)
+        position, quaternion = pybullet.multiplyTransforms(
+            position, quaternion, inverse_position, inverse_quaternion)
+        return Pose([position, quaternion])
+
+    def get_body_states(self, body_uids, out=None, compute_velocity=False):
+        """Get the base poses of a list of bodies.
+
+        Args:
+            body_uids: The list of body Unique IDs.
+            out: An optional preallocated float64 array of shape [N, 7], or
+                [N, 13] if compute_velocity is True. It is filled in place.
+            compute_velocity: Append the linear and angular velocities of the
+                base as columns 7 to 12.
+
+        Returns:
+            A float64 array of [x, y, z, qx, qy, qz, qw] rows, followed by
+            [vx, vy, vz, wx, wy, wz] if compute_velocity is True.
+        """
+        rows = []
+        for body_uid in body_uids:
+            position, quaternion = pybullet.getBasePositionAndOrientation(
+                bodyUniqueId=body_uid, physicsClientId=self.uid)
+            if compute_velocity:
+                linear_velocity, angular_velocity = pybullet.getBaseVelocity(
+                    bodyUniqueId=body_uid, physicsClientId=self.uid)
+                rows.append(position + quaternion + linear_velocity +
+                            angular_velocity)
+            else:
+                rows.append(position + quaternion)
+
+        if out is None:
+            return np.array(rows, dtype=np.float64)
+        out[:] = rows
+        return out
+
     def get_body_position(self, body_uid):
         """Get the position of the body.
 
@@ -353,9 +1183,7 @@ class BulletPhysics():
         Returns:
             A list of integers.
         """
-        num_joints = pybullet.getNumJoints(
-            bodyUniqueId=body_uid, physicsClientId=self.uid)
-        link_indices = range(num_joints)
+        link_indices = range(self.get_body_info(body_uid).num_joints)
         return link_indices
 
     def get_body_joint_indices(self, body_uid):
@@ -367,9 +1195,7 @@ class BulletPhysics():
         Returns:
             A list of integers.
         """
-        num_joints = pybullet.getNumJoints(
-            bodyUniqueId=body_uid, physicsClientId=self.uid)
-        joint_indices = range(num_joints)
+        joint_indices = range(self.get_body_info(body_uid).num_joints)
         return joint_indices
 
     def set_body_pose(self, body_uid, pose):
@@ -377,15 +1203,53 @@ class BulletPhysics():
 
         Args:
             body_uid: The body Unique ID.
-            pose: An instance of Pose.
+            pose: An instance of Pose, or a PoseArray of length 1.
         """
-        pose = Pose(pose)
-        position = list(pose.position)
-        quaternion = list(pose.quaternion)
+        if isinstance(pose, PoseArray):
+            assert len(pose) == 1
+            position = pose.position[0].tolist()
+            quaternion = pose.quaternion[0].tolist()
+        else:
+            pose = Pose(pose)
+            position = list(pose.position)
+            quaternion = list(pose.quaternion)
         pybullet.resetBasePositionAndOrientation(
             bodyUniqueId=body_uid, posObj=position, ornObj=quaternion,
             physicsClientId=self.uid)
 
+    def set_body_poses(self, body_uids, poses):
+        """Set the poses of a list of bodies.
+
+        Args:
+            body_uids: The list of body Unique IDs.
+            poses: An instance of PoseArray with one pose per body, or
+                anything accepted by PoseArray.
+        """
+        if not isinstance(poses, PoseArray):
+            poses = PoseArray(poses)
+        assert len(poses) == len(body_uids)
+        positions = poses.position.tolist()
+        quaternions = poses.quaternion.tolist()
+        for body_uid, position, quaternion in zip(
+                body_uids, positions, quaternions):
+            pybullet.resetBasePositionAndOrientation(
+                bodyUniqueId=body_uid, posObj=position, ornObj=quaternion,
+                physicsClientId=self.uid)
+
+    def set_body_velocities(self, body_uids, velocities):
+        """Set the base velocities of a list of bodies.
+
+        Args:
+            body_uids: The list of body Unique IDs.
+            velocities: A [N, 6] array of [vx, vy, vz, wx, wy, wz] rows.
+        """
+        velocities = np.asarray(velocities, dtype=np.float64).tolist()
+        assert len(velocities) == len(body_uids)
+        for body_uid, velocity in zip(body_uids, velocities):
+            pybullet.resetBaseVelocity(
+                objectUniqueId=body_uid, linearVelocity=velocity[:3],
+                angularVelocity=velocity[3:], physicsClientId=self.uid)
+
     def set_body_position(self, body_uid, position):
         """Set the position of the body.
 
@@ -395,7 +1259,8 @@ class BulletPhysics():
                 float32 values.
         """
         position = list(position)
-        _, quaternion = pybullet.getBasePositionAndOrientation(body_uid)
+        _, quaternion = pybullet.getBasePositionAndOrientation(
+            bodyUniqueId=body_uid, physicsClientId=self.uid)
         pybullet.resetBasePositionAndOrientation(
             bodyUniqueId=body_uid, posObj=position, ornObj=quaternion,
             physicsClientId=self.uid)
@@ -407,7 +1272,8 @@ class BulletPhysics():
             body_uid: The body Unique ID.
             orientation: An instance of Orientation.
         """
-        position, _ = pybullet.getBasePositionAndOrientation(body_uid)
+        position, _ = pybullet.getBasePositionAndOrientation(
+            bodyUniqueId=body_uid, physicsClientId=self.uid)
         quaternion = list(orientation.quaternion)
         pybullet.resetBasePositionAndOrientation(
             bodyUniqueId=body_uid, posObj=position, ornObj=quaternion,
@@ -516,8 +1382,7 @@ class BulletPhysics():
         pybullet.changeVisualShape(**kwargs)
 
     def get_num_joints(self, body_uid):
-        return pybullet.getNumJoints(bodyUniqueId=body_uid,
-                                     physicsClientId=self.uid)
+        return self.get_body_info(body_uid).num_joints
     #
     # Link
     #
@@ -526,20 +1391,22 @@ class BulletPhysics():
         """Get the name of the link.
 
         Args:
-            link_uid: A tuple of the body Unique ID and the link index.
+            link_uid: A tuple of the body Unique ID and the link index, -1
+                for the base link.
 
         Returns:
             The name of the link.
         """
         body_uid, link_ind = link_uid
-        _, _, _, _, _, _, _, _, _, _, _, _, link_name, _, _, _, _ = (
-            pybullet.getJointInfo(bodyUniqueId=body_uid,
-                                  jointIndex=link_ind,
-                                  physicsClientId=self.uid))
-        if isinstance(link_name, bytes):
-            link_name = link_name.decode('utf-8')
-        
-        return link_name
+        if link_ind == -1:
+            base_name, _ = pybullet.getBodyInfo(bodyUniqueId=body_uid,
+                                                physicsClientId=self.uid)
+            if isinstance(base_name, bytes):
+                base_name = base_name.decode('utf-8')
+            return base_name
+        if link_ind < 0:
+            raise IndexError('Link index %d is out of range.' % link_ind)
+        return self.get_body_info(body_uid).link_names[link_ind]
 
     def get_link_pose(self, link_uid):
         """Get the pose of the link.
@@ -586,6 +1453,51 @@ class BulletPhysics():
             physicsClientId=self.uid)
         return Pose([position, quaternion])
 
+    def get_link_states(self,
+                        body_uid,
+                        link_inds,
+                        out=None,
+                        frame='link',
+                        compute_velocity=False,
+                        compute_forward_kinematics=False):
+        """Get the poses of a list of links of a body in a single call.
+
+        Args:
+            body_uid: The body Unique ID.
+            link_inds: The list of link indices.
+            out: An optional preallocated float64 array of shape [N, 7], or
+                [N, 13] if compute_velocity is True. It is filled in place.
+            frame: 'link' for the link frame (as get_link_pose), 'com' for the
+                center of mass (as get_link_center_of_mass) or 'local_offset'
+                for the local inertial frame (as get_link_local_offset).
+            compute_velocity: Append the world linear and angular velocities
+                of the link center of mass as columns 7 to 12.
+            compute_forward_kinematics: Recompute the link poses from the
+                current joint positions instead of using the cached ones.
+
+        Returns:
+            A float64 array of [x, y, z, qx, qy, qz, qw] rows, followed by
+            [vx, vy, vz, wx, wy, wz] if compute_velocity is True.
+        """
+        offset = LINK_FRAME_OFFSETS[frame]
+        link_states = pybullet.getLinkStates(
+            bodyUniqueId=body_uid, linkIndices=link_inds,
+            computeLinkVelocity=int(compute_velocity),
+            computeForwardKinematics=int(compute_forward_kinematics),
+            physicsClientId=self.uid)
+
+        if compute_velocity:
+            rows = [state[offset] + state[offset + 1] + state[6] + state[7]
+                    for state in link_states]
+        else:
+            rows = [state[offset] + state[offset + 1]
+                    for state in link_states]
+
+        if out is None:
+            return np.array(rows, dtype=np.float64)
+        out[:] = rows
+        return out
+
     def get_link_mass(self, link_uid):
         """Get the mass of the link.
 
@@ -683,14 +1595,9 @@ class BulletPhysics():
             The name of the joint.
         """
         body_uid, joint_ind = joint_uid
-        _, joint_name, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _ = (
-            pybullet.getJointInfo(bodyUniqueId=body_uid,
-                                  jointIndex=joint_ind,
-                                  physicsClientId=self.uid))
-        if isinstance(joint_name, bytes):
-            joint_name = joint_name.decode('utf-8')
-        
-        return joint_name
+        if joint_ind < 0:
+            raise IndexError('Joint index %d is out of range.' % joint_ind)
+        return self.get_body_info(body_uid).joint_names[joint_ind]
 
     def get_joint_dynamics(self, joint_uid):
         """Get the dynamics of the joint.
@@ -702,13 +1609,10 @@ class BulletPhysics():
             dynamics: A dictionary of dampling and friction.
         """
         body_uid, joint_ind = joint_uid
-        _, _, _, _, _, _, damping, friction, _, _, _, _, _, _, _, _ = (
-            pybullet.getJointInfo(bodyUniqueId=body_uid,
-                                  jointIndex=joint_ind,
-                                  physicsClientId=self.uid))
+        body_info = self.get_body_info(body_uid)
         dynamics = {
-            'damping': damping,
-            'friction': friction
+            'damping': float(body_info.damping[joint_ind]),
+            'friction': float(body_info.friction[joint_ind])
         }
         return dynamics
 
@@ -722,15 +1626,12 @@ class BulletPhysics():
             limit: A dictionary of lower, upper, effort and velocity.
         """
         body_uid, joint_ind = joint_uid
-        (_, _, _, _, _, _, _, _, lower, upper, max_force, max_vel, _,
-         _, _, _, _) = pybullet.getJointInfo(bodyUniqueId=body_uid,
-                                             jointIndex=joint_ind,
-                                             physicsClientId=self.uid)
+        body_info = self.get_body_info(body_uid)
         limit = {
-            'lower': lower,
-            'upper': upper,
-            'effort': max_force,
-            'velocity': max_vel
+            'lower': float(body_info.lower_limits[joint_ind]),
+            'upper': float(body_info.upper_limits[joint_ind]),
+            'effort': float(body_info.max_forces[joint_ind]),
+            'velocity': float(body_info.max_velocities[joint_ind])
         }
         return limit
 
@@ -800,6 +1701,29 @@ class BulletPhysics():
             physicsClientId=self.uid)
         return np.array(torque, dtype=np.float32)
 
+    def get_joint_states(self, body_uid, joint_inds, out=None):
+        """Get the states of a list of joints of a body in a single call.
+
+        Args:
+            body_uid: The body Unique ID.
+            joint_inds: The list of joint indices.
+            out: An optional preallocated array of JOINT_STATE_DTYPE with one
+                entry per joint. It is filled in place and returned.
+
+        Returns:
+            A structured numpy array of JOINT_STATE_DTYPE with the fields
+            position, velocity, reaction_force and torque. Each field is
+            available as a float64 array, e.g. states['position'].
+        """
+        # A list is required here, numpy would read a tuple as one record.
+        joint_states = list(pybullet.getJointStates(
+            bodyUniqueId=body_uid, jointIndices=joint_inds,
+            physicsClientId=self.uid))
+        if out is None:
+            return np.array(joint_states, dtype=JOINT_STATE_DTYPE)
+        out[:] = joint_states
+        return out
+
     def set_joint_position(self, joint_uid, position):
         """Set the position of the joint.
 
@@ -830,6 +1754,27 @@ class BulletPhysics():
             targetValue=position,
             targetVelocity=velocity, physicsClientId=self.uid)
 
+    def set_joint_states(self, body_uid, joint_inds, positions,
+                         velocities=None):
+        """Set the positions and velocities of a list of joints of a body.
+
+        Args:
+            body_uid: The body Unique ID.
+            joint_inds: The list of indices of single degree of freedom
+                joints.
+            positions: The list of joint positions.
+            velocities: The list of joint velocities, zero if it is None.
+        """
+        positions = [[position] for position in positions]
+        if velocities is None:
+            velocities = [[0.0]] * len(positions)
+        else:
+            velocities = [[velocity] for velocity in velocities]
+        pybullet.resetJointStatesMultiDof(
+            bodyUniqueId=body_uid, jointIndices=list(joint_inds),
+            targetValues=positions, targetVelocities=velocities,
+            physicsClientId=self.uid)
+
     def enable_joint_sensor(self, joint_uid):
         """Enable joint force torque sensor.
 
@@ -941,7 +1886,8 @@ class BulletPhysics():
            constraint_uid: The constraint unique ID
            kwargs: arguments for changig constraints
         """
-        pybullet.changeConstraint(constraint_uid, **kwargs)
+        pybullet.changeConstraint(constraint_uid, physicsClientId=self.uid,
+                                  **kwargs)
     
     def remove_constraint(self, constraint_uid):
         """Remove a constraint.
@@ -1079,6 +2025,115 @@ class BulletPhysics():
     # Motor Control
     #
 
+    def _record_motor_targets(self,
+                              body_uid,
+                              joint_inds,
+                              control_mode,
+                              target_positions=None,
+                              target_velocities=None,
+                              forces=None,
+                              position_gains=None,
+                              velocity_gains=None):
+        """Keep track of the motor command sent to a list of joints."""
+        motor_targets = self.get_motor_target_buffer(body_uid)
+        motor_targets['control_mode'][joint_inds] = control_mode
+        for (name, value) in (('target_position', target_positions),
+                              ('target_velocity', target_velocities),
+                              ('force', forces),
+                              ('position_gain', position_gains),
+                              ('velocity_gain', velocity_gains)):
+            motor_targets[name][joint_inds] = (
+                np.nan if value is None else value)
+
+    def get_motor_target_buffer(self, body_uid):
+        """Get the array of the motor commands of a body, see get_motor_targets.
+
+        The array is updated in place by the control functions, and by
+        JointController which writes its targets into it directly.
+
+        Args:
+            body_uid: The body Unique ID.
+
+        Returns:
+            A structured numpy array of MOTOR_TARGET_DTYPE with one entry per
+            joint.
+        """
+        motor_targets = self._motor_targets.get(body_uid)
+        if motor_targets is None:
+            motor_targets = np.empty(self.get_num_joints(body_uid),
+                                     dtype=MOTOR_TARGET_DTYPE)
+            motor_targets['control_mode'] = -1
+            for name in MOTOR_TARGET_DTYPE.names[1:]:
+                motor_targets[name] = np.nan
+            self._motor_targets[body_uid] = motor_targets
+        return motor_targets
+
+    def create_joint_controller(self, body_uid, joint_inds,
+                                control_mode='position', **kwargs):
+        """Create a JointController of a list of joints of a body.
+
+        Args:
+            body_uid: The body Unique ID.
+            joint_inds: The list of joint indices.
+            control_mode: 'position', 'velocity' or 'torque'.
+            **kwargs: The gains and forces of JointController.
+
+        Returns:
+            An instance of JointController.
+        """
+        return JointController(self, body_uid, joint_inds,
+                               control_mode=control_mode, **kwargs)
+
+    def get_motor_targets(self, body_uid):
+        """Get the last motor command sent to every joint of a body.
+
+        Args:
+            body_uid: The body Unique ID.
+
+        Returns:
+            A structured numpy array of MOTOR_TARGET_DTYPE with one entry per
+            joint, or None if no command was sent to the body.
+        """
+        motor_targets = self._motor_targets.get(body_uid)
+        if motor_targets is None:
+            return None
+        return motor_targets.copy()
+
+    def set_motor_targets(self, body_uid, motor_targets):
+        """Send the motor commands returned by get_motor_targets again.
+
+        Args:
+            body_uid: The body Unique ID.
+            motor_targets: A structured numpy array of MOTOR_TARGET_DTYPE.
+        """
+        def value(name, joint_ind):
+            item = motor_targets[name][joint_ind]
+            return None if np.isnan(item) else float(item)
+
+        for joint_ind in np.flatnonzero(motor_targets['control_mode'] >= 0):
+            joint_uid = (body_uid, int(joint_ind))
+            control_mode = motor_targets['control_mode'][joint_ind]
+            if control_mode == pybullet.POSITION_CONTROL:
+                self.position_control(
+                    joint_uid,
+                    value('target_position', joint_ind),
+                    target_velocity=value('target_velocity', joint_ind),
+                    max_force=value('force', joint_ind),
+                    position_gain=value('position_gain', joint_ind),
+                    velocity_gain=value('velocity_gain', joint_ind))
+            elif control_mode == pybullet.VELOCITY_CONTROL:
+                self.velocity_control(
+                    joint_uid,
+                    value('target_velocity', joint_ind) or 0.0,
+                    max_force=value('force', joint_ind),
+                    position_gain=value('position_gain', joint_ind),
+                    velocity_gain=value('velocity_gain', joint_ind))
+            elif control_mode == pybullet.TORQUE_CONTROL:
+                self.torque_control(joint_uid, value('force', joint_ind))
+            else:
+                raise ValueError('Unrecognized control mode %d.'
+                                 % control_mode)
+
     def position_control(self,
                          joint_uid,
                          target_position,
@@ -1122,6 +2177,11 @@ class BulletPhysics():
         if velocity_gain is not None:
             kwargs['velocityGain'] = velocity_gain
 
+        self._record_motor_targets(
+            body_uid, [joint_ind], pybullet.POSITION_CONTROL,
+            target_positions=target_position,
+            target_velocities=target_velocity, forces=max_force,
+            position_gains=position_gain, velocity_gains=velocity_gain)
         pybullet.setJointMotorControl2(**kwargs)
 
     def velocity_control(self,
@@ -1157,16 +2217,28 @@ class BulletPhysics():
         if velocity_gain is not None:
             kwargs['velocityGain'] = velocity_gain
 
+        self._record_motor_targets(
+            body_uid, [joint_ind], pybullet.VELOCITY_CONTROL,
+            target_velocities=target_velocity, forces=max_force,
+            position_gains=position_gain, velocity_gains=velocity_gain)
         pybullet.setJointMotorControl2(**kwargs)
 
-    def torque_control(self, joint_uid, target_torque):
+    def torque_control(self, joint_uid, target_torque, effort_check='clip'):
         """Torque control of a joint.
 
+        The default motor of the joint is disabled first if the joint is not
+        under torque control yet.
+
         Args:
             joint_uid: The tuple of the body unique ID and the joint index.
             joint_torque: The torque of the joint.
+            effort_check: What to do with a torque beyond the effort limit of
+                the joint, see check_joint_efforts.
         """
         body_uid, joint_ind = joint_uid
+        target_torque = float(self.check_joint_efforts(
+            body_uid, [joint_ind], [target_torque], effort_check)[0])
+        self._prepare_torque_control(body_uid, [joint_ind])
 
         kwargs = dict()
         kwargs['physicsClientId'] = self.uid
@@ -1175,6 +2247,9 @@ class BulletPhysics():
         kwargs['controlMode'] = pybullet.TORQUE_CONTROL
         kwargs['force'] = target_torque
 
+        self._record_motor_targets(
+            body_uid, [joint_ind], pybullet.TORQUE_CONTROL,
+            forces=target_torque)
         pybullet.setJointMotorControl2(**kwargs)
 
     def position_control_array(self,
@@ -1220,6 +2295,11 @@ class BulletPhysics():
         if velocity_gains is not None:
             kwargs['velocityGains'] = velocity_gains
 
+        self._record_motor_targets(
+            body_uid, joint_inds, pybullet.POSITION_CONTROL,
+            target_positions=target_positions,
+            target_velocities=target_velocities, forces=max_forces,
+            position_gains=position_gains, velocity_gains=velocity_gains)
         pybullet.setJointMotorControlArray(**kwargs)
 
     def velocity_control_array(self,
@@ -1254,25 +2334,120 @@ class BulletPhysics():
         if velocity_gains is not None:
             kwargs['velocityGains'] = velocity_gains
 
+        self._record_motor_targets(
+            body_uid, joint_inds, pybullet.VELOCITY_CONTROL,
+            target_velocities=joint_velocities, forces=max_joint_forces,
+            position_gains=position_gains, velocity_gains=velocity_gains)
         pybullet.setJointMotorControlArray(**kwargs)
 
-    def torque_control_array(self, body_uid, joint_inds, joint_torques):
+    def torque_control_array(self, body_uid, joint_inds, joint_torques,
+                             effort_check='clip'):
         """Torque control of a list of joints of a body.
 
+        The default motors of the joints are disabled first if the joints are
+        not under torque control yet, so that the following calls only send
+        the torques. For high rate control loops, create_joint_controller
+        with control_mode='torque' also keeps the arguments between calls.
+
         Args:
             body_uid: The body unique ID.
             joint_inds: The list of joint indices.
             joint_torques: The list of torques for each specified joint.
+            effort_check: What to do with torques beyond the effort limits of
+                the joints, see check_joint_efforts.
         """
+        joint_torques = self.check_joint_efforts(
+            body_uid, joint_inds, joint_torques, effort_check)
+        self._prepare_torque_control(body_uid, joint_inds)
+
         kwargs = dict()
         kwargs['physicsClientId'] = self.uid
         kwargs['bodyUniqueId'] = body_uid
         kwargs['jointIndices'] = joint_inds
-        kwargs['controlMode'] = pybullet.VELOCITY_CONTROL
-        kwargs['forces'] = joint_torques
+        kwargs['controlMode'] = pybullet.TORQUE_CONTROL
+        kwargs['forces'] = joint_torques.tolist()
 
+        self._record_motor_targets(
+            body_uid, joint_inds, pybullet.TORQUE_CONTROL,
+            forces=joint_torques)
         pybullet.setJointMotorControlArray(**kwargs)
 
+    def disable_motors(self, body_uid, joint_inds):
+        """Disable the default velocity motors of a list of joints.
+
+        pybullet drives every joint with a velocity motor towards zero
+        velocity by default, which resists any torque applied with
+        TORQUE_CONTROL. The motors stay disabled until the joints receive a
+        position or velocity command.
+
+        Args:
+            body_uid: The body unique ID.
+            joint_inds: The list of joint indices.
+        """
+        zeros = [0.0] * len(joint_inds)
+        self.velocity_control_array(body_uid, joint_inds, zeros,
+                                    max_joint_forces=zeros)
+
+    def _prepare_torque_control(self, body_uid, joint_inds):
+        """Disable the motors of the joints not under torque control yet."""
+        control_modes = self.get_motor_target_buffer(body_uid)[
+            'control_mode'][joint_inds]
+        if (control_modes != pybullet.TORQUE_CONTROL).any():
+            self.disable_motors(body_uid, joint_inds)
+
+    def get_effort_limits(self, body_uid, joint_inds):
+        """Get the effort limits of a list of joints from the cached BodyInfo.
+
+        Args:
+            body_uid: The body unique ID.
+            joint_inds: The list of joint indices.
+
+        Returns:
+            A float64 numpy array of the effort limits, inf for the joints
+            without a limit.
+        """
+        max_forces = self.get_body_info(body_uid).max_forces[joint_inds]
+        return np.where(max_forces > 0.0, max_forces, np.inf)
+
+    def check_joint_efforts(self, body_uid, joint_inds, joint_efforts,
+                            effort_check='clip', out=None):
+        """Check joint torques against the effort limits of the joints.
+
+        Args:
+            body_uid: The body unique ID.
+            joint_inds: The list of joint indices.
+            joint_efforts: The list of torques for each specified joint.
+            effort_check: 'clip' to clip the torques to the effort limits,
+                'raise' to raise a ValueError for torques beyond the limits,
+                or None to skip the check.
+            out: An optional preallocated float64 array of the results.
+
+        Returns:
+            A float64 numpy array of the checked torques.
+        """
+        joint_efforts = np.asarray(joint_efforts, dtype=np.float64)
+        if effort_check == 'clip':
+            effort_limits = self.get_effort_limits(body_uid, joint_inds)
+            return np.clip(joint_efforts, -effort_limits, effort_limits,
+                           out=out)
+        elif effort_check == 'raise':
+            effort_limits = self.get_effort_limits(body_uid, joint_inds)
+            infeasible = np.abs(joint_efforts) > effort_limits
+            if infeasible.any():
+                raise ValueError(
+                    'The torques %r of the joints %r of body %d exceed the '
+                    'effort limits %r.' % (
+                        joint_efforts[infeasible].tolist(),
+                        np.asarray(joint_inds)[infeasible].tolist(),
+                        body_uid, effort_limits[infeasible].tolist()))
+        elif effort_check is not None:
+            raise ValueError('Unrecognized effort check %r.' % (effort_check,))
+
+        if out is None:
+            return joint_efforts
+        out[:] = joint_efforts
+        return out
+
     #
     # Apply external disturbances
     #
@@ -1376,42 +2551,297 @@ class BulletPhysics():
 
         kwargs['physicsClientId'] = self.uid
 
+        if self._ik_cache is not None:
+            return self._compute_inverse_kinematics_cached(link_uid, kwargs)
+
         target_positions = pybullet.calculateInverseKinematics(**kwargs)
 
         return target_positions
 
+    def _compute_inverse_kinematics_cached(self, link_uid, kwargs):
+        """Look up the solution of calculateInverseKinematics in the cache.
+
+        The seed of pybullet is the current positions of the joints of the
+        body. With warm_start, a cached solution becomes the seed and the
+        joint states are restored after the solve.
+        """
+        ik_cache = self._ik_cache
+        body_uid = link_uid[0]
+        movable_joint_inds = self.get_body_info(body_uid).movable_joint_inds
+        seed = None
+        if ik_cache.seed_tolerance is not None:
+            seed = [state[0] for state in pybullet.getJointStates(
+                bodyUniqueId=body_uid,
+                jointIndices=movable_joint_inds.tolist(),
+                physicsClientId=self.uid)]
+        options = tuple((name, tuple(np.ravel(kwargs[name]).tolist()))
+                        for name in IK_CACHE_OPTIONS if name in kwargs)
+        base_pose = pybullet.getBasePositionAndOrientation(
+            bodyUniqueId=body_uid, physicsClientId=self.uid)
+        key = ik_cache.get_key(link_uid, kwargs['targetPosition'],
+                               kwargs.get('targetOrientation'), seed, options,
+                               base_pose)
+
+        solution = ik_cache.get(key)
+        if solution is None:
+            solution = pybullet.calculateInverseKinematics(**kwargs)
+        elif ik_cache.warm_start:
+            current_states = self.get_joint_states(
+                body_uid, movable_joint_inds).copy()
+            self.set_joint_states(body_uid, movable_joint_inds, solution)
+            solution = pybullet.calculateInverseKinematics(**kwargs)
+            self.set_joint_states(body_uid, movable_joint_inds,
+                                  current_states['position'],
+                                  current_states['velocity'])
+        else:
+            return solution
+        ik_cache.put(key, solution)
+        return solution
+
+    def compute_inverse_kinematics_batch(self,
+                                         link_uid,
+                                         link_poses,
+                                         upper_limits=None,
+                                         lower_limits=None,
+                                         ranges=None,
+                                         damping=None,
+                                         neutral_positions=None,
+                                         seed=None,
+                                         warm_start=True,
+                                         max_iterations=20,
+                                         residual_threshold=1e-4,
+                                         compute_residuals=False,
+                                         num_workers=None):
+        """Compute the inverse kinematics of many target poses of a link.
+
+        The arguments of calculateInverseKinematics are built once and only
+        the target is replaced for each pose. Each solve starts from the
+        solution of the previous pose if warm_start is set, which converges
+        in fewer iterations when neighbouring targets are close, e.g. grasp
+        candidates sorted around an object.
+
+        The solves and the residuals use the movable joints of the body
+        itself, their states are restored afterwards. The residuals take a
+        second pass over the solutions and are not computed by default.
+
+        Args:
+            link_uid: The unique ID of the link.
+            link_poses: The N target poses of the link, a PoseArray or
+                anything accepted by it.
+            upper_limits: The upper limits of joints.
+            lower_limits: The lower limits of joints.
+            ranges: The ranges of joints.
+            damping: The list of joint damping parameters.
+            neutral_positions: The neutral joint positions.
+            seed: The positions of the movable joints the first solve starts
+                from, the current positions if it is None.
+            warm_start: Start each solve from the previous solution instead
+                of the seed.
+            max_iterations: The maximal number of iterations of each solve.
+            residual_threshold: The position residual that ends a solve.
+            compute_residuals: Compute the residuals of the solutions.
+            num_workers: If given, the poses are split among up to this many
+                processes, each with its own copy of the body and at least
+                IK_POOL_MIN_POSES_PER_WORKER poses. The body must have been
+                loaded from a file.
+
+        Returns:
+            A float64 numpy array of [N, D] of the positions of the D movable
+            joints, and a float64 numpy array of [N, 2] of the position error
+            in meters and the orientation error in radians of each solution,
+            or None if compute_residuals is False.
+        """
+        body_uid, link_ind = link_uid
+        link_poses = PoseArray(link_poses)
+        movable_joint_inds = self.get_body_info(
+            body_uid).movable_joint_inds.tolist()
+        current_states = self.get_joint_states(body_uid, movable_joint_inds)
+        if seed is None:
+            seed = current_states['position']
+
+        options = {
+            'upper_limits': upper_limits,
+            'lower_limits': lower_limits,
+            'ranges': ranges,
+            'damping': damping,
+            'neutral_positions': neutral_positions,
+            'warm_start': warm_start,
+            'max_iterations': max_iterations,
+            'residual_threshold': residual_threshold,
+            'compute_residuals': compute_residuals,
+        }
+        if num_workers:
+            num_workers = min(num_workers,
+                              len(link_poses) // IK_POOL_MIN_POSES_PER_WORKER)
+        if num_workers and num_workers > 1:
+            return self._compute_inverse_kinematics_pool(
+                link_uid, link_poses, seed, current_states['position'],
+                options, num_workers)
+
+        kwargs = dict()
+        kwargs['bodyUniqueId'] = body_uid
+        kwargs['endEffectorLinkIndex'] = link_ind
+        if lower_limits is not None:
+            kwargs['lowerLimits'] = list(lower_limits)
+        if upper_limits is not None:
+            kwargs['upperLimits'] = list(upper_limits)
+        if ranges is not None:
+            kwargs['jointRanges'] = list(ranges)
+        if damping is not None:
+            kwargs['jointDamping'] = list(damping)
+        if neutral_positions is not None:
+            kwargs['restPoses'] = list(neutral_positions)
+        kwargs['maxNumIterations'] = max_iterations
+        kwargs['residualThreshold'] = residual_threshold
+        kwargs['physicsClientId'] = self.uid
+
+        # calculateInverseKinematics only iterates correctly from the joint
+        # positions of the body, so the body itself is set to the seed or to
+        # the previous solution instead of passing currentPositions. The
+        # solves leave the body as it is, without warm starts the seed is set
+        # only once.
+        seed = [float(position) for position in seed]
+        joint_positions = np.empty((len(link_poses), len(seed)),
+                                   dtype=np.float64)
+        self.set_joint_states(body_uid, movable_joint_inds, seed)
+        for (i, (position, quaternion)) in enumerate(zip(
+                link_poses.position.tolist(),
+                link_poses.quaternion.tolist())):
+            kwargs['targetPosition'] = position
+            kwargs['targetOrientation'] = quaternion
+            solution = pybullet.calculateInverseKinematics(**kwargs)
+            joint_positions[i] = solution
+            if warm_start:
+                self.set_joint_states(body_uid, movable_joint_inds, solution)
+
+        if compute_residuals:
+            reached = np.empty((len(link_poses), 7), dtype=np.float64)
+            for (i, solution) in enumerate(joint_positions.tolist()):
+                self.set_joint_states(body_uid, movable_joint_inds, solution)
+                link_state = pybullet.getLinkState(
+                    bodyUniqueId=body_uid, linkIndex=link_ind,
+                    computeForwardKinematics=1, physicsClientId=self.uid)
+                reached[i, :3] = link_state[4]
+                reached[i, 3:] = link_state[5]
+
+        self.set_joint_states(body_uid, movable_joint_inds,
+                              current_states['position'],
+                              current_states['velocity'])
+
+        if not compute_residuals:
+            return joint_positions, None
+
+        residuals = np.empty((len(link_poses), 2), dtype=np.float64)
+        residuals[:, 0] = np.linalg.norm(
+            reached[:, :3] - link_poses.position, axis=1)
+        dots = np.abs(np.sum(reached[:, 3:] * link_poses.quaternion, axis=1))
+        residuals[:, 1] = 2.0 * np.arccos(np.clip(dots, 0.0, 1.0))
+        return joint_positions, residuals
+
+    def _compute_inverse_kinematics_pool(self, link_uid, link_poses, seed,
+                                         joint_positions, options,
+                                         num_workers):
+        """Split compute_inverse_kinematics_batch among worker processes."""
+        body_uid, link_ind = link_uid
+        body_info = self.get_body_info(body_uid)
+        if body_info.filename is None:
+            raise ValueError('Body %d was not loaded from a file, it cannot '
+                             'be copied to the worker processes.' % body_uid)
+        pose = self.get_base_link_pose(body_uid)
+        body_kwargs = dict(body_info.load_kwargs)
+        body_kwargs.update({
+            'filename': body_info.filename,
+            'pose': [list(pose.position), list(pose.quaternion)],
+            'scale': body_info.scale,
+            'is_static': body_info.is_static,
+        })
+
+        chunks = np.array_split(np.arange(len(link_poses)), num_workers)
+        tasks = [(link_ind, link_poses.position[chunk],
+                  link_poses.quaternion[chunk], list(seed), options)
+                 for chunk in chunks if len(chunk) > 0]
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=num_workers,
+                initializer=_init_inverse_kinematics_worker,
+                initargs=(body_kwargs, list(joint_positions))) as executor:
+            results = list(executor.map(_solve_inverse_kinematics, tasks))
+
+        solutions = np.concatenate([result[0] for result in results])
+        if not options['compute_residuals']:
+            return solutions, None
+        return solutions, np.concatenate([result[1] for result in results])
+
     #
     # Dynamics
     # 
 
     def calculate_inverse_dynamics(self, body_uid, joint_positions, joint_velocities, joint_accelerations):
-        kwargs = dict()
-        kwargs['bodyUniqueId'] = body_uid
-        kwargs['joint_positions'] = joint_positions
-        kwargs['joint_velocities'] = joint_accelerations
-        kwargs['physicsClientId'] = self.uid
-        joint_forces = pybullet.calculateInverseDynamics(**kwargs)
-        return joint_forces
+        """Compute the joint forces of the given joint accelerations.
+
+        Args:
+            body_uid: The body unique ID.
+            joint_positions: The positions of all movable joints.
+            joint_velocities: The velocities of all movable joints.
+            joint_accelerations: The desired accelerations of all movable
+                joints.
+
+        Returns:
+            A float64 numpy array of the joint forces of all movable joints.
+        """
+        joint_forces = pybullet.calculateInverseDynamics(
+            bodyUniqueId=body_uid,
+            objPositions=list(joint_positions),
+            objVelocities=list(joint_velocities),
+            objAccelerations=list(joint_accelerations),
+            physicsClientId=self.uid)
+        return np.array(joint_forces, dtype=np.float64)
 
     def calculate_mass_matrix(self, body_uid, joint_positions):
-        return pybullet.calculateMassMatrix(bodyUniqueId=body_uid,
-                                            objPositions=joint_positions,
-                                            physicsClientId=self.uid)
+        """Compute the joint space mass matrix.
+
+        Args:
+            body_uid: The body unique ID.
+            joint_positions: The positions of all movable joints.
+
+        Returns:
+            A float64 numpy array of [N, N] for the N movable joints.
+        """
+        mass_matrix = pybullet.calculateMassMatrix(
+            bodyUniqueId=body_uid,
+            objPositions=list(joint_positions),
+            physicsClientId=self.uid)
+        return np.array(mass_matrix, dtype=np.float64)
 
     def calculate_jacobian(self, link_uid, com_positions, joint_positions, joint_velocities, joint_accelerations):
+        """Compute the Jacobian of a point of a link.
+
+        Args:
+            link_uid: A tuple of the body unique ID and the link index.
+            com_positions: The position of the point in the link frame, as
+                returned by get_link_pose.
+            joint_positions: The positions of all movable joints.
+            joint_velocities: The velocities of all movable joints.
+            joint_accelerations: The accelerations of all movable joints.
+
+        Returns:
+            A tuple of the translational and rotational Jacobians, both float64
+            numpy arrays of [3, N] for the N movable joints.
+        """
         body_uid, link_ind = link_uid
-        import pdb; pdb.set_trace()
-        return pybullet.calculateJacobian(bodyUniqueId=body_uid,
-                                         linkIndex=link_ind,
-                                         localPosition=com_positions,
-                                         objPositions=joint_positions,
-                                         objVelocities=joint_velocities,
-                                         objAccelerations=joint_accelerations,
-                                         physicsClientId=self.uid)
+        jac_tr, jac_r = pybullet.calculateJacobian(
+            bodyUniqueId=body_uid,
+            linkIndex=link_ind,
+            localPosition=list(com_positions),
+            objPositions=list(joint_positions),
+            objVelocities=list(joint_velocities),
+            objAccelerations=list(joint_accelerations),
+            physicsClientId=self.uid)
+        return (np.array(jac_tr, dtype=np.float64),
+                np.array(jac_r, dtype=np.float64))
     
     #
     # Contacts
-    # Pybullet function getContactPoints return:
+    # Pybullet function getContactPoints return, see CONTACT_POINT_DTYPE:
     # 
     # 0: contactFlag
     # 1: bodyUniqueIdA
@@ -1429,41 +2859,70 @@ class BulletPhysics():
     # 13: lateralFrictionDir2
     #
 
-    def get_contact_points(self, a_uid, b_uid=None):
-        """Check if two entities have contacts.
+    def get_contacts(self, a_uid=None, b_uid=None):
+        """Get the contact points of an entity.
+
+        The result of each query is kept until the next step, so that asking
+        again for the same entities within one step is free. The contact
+        points are the ones of pybullet.getContactPoints, seen from the first
+        entity: its body and link are the A fields and the normals point
+        toward it.
 
         Args:
-            a_uid: The Unique ID of the fist entity.
-            b_uid: The Unique ID of the second entity.
+            a_uid: The body Unique ID or the link Unique ID of the first
+                entity, all contact points if it is None.
+            b_uid: The body Unique ID or the link Unique ID of the second
+                entity, any entity if it is None.
 
         Returns:
-            A list of contact points.
+            A read-only structured numpy array of CONTACT_POINT_DTYPE with
+            one entry per contact point.
         """
-        kwargs = dict()
+        return self._query_contacts(a_uid, b_uid)[1]
 
-        if isinstance(a_uid, six.integer_types):
-            kwargs['bodyA'] = a_uid
-        elif isinstance(a_uid, (tuple, list)):
-            kwargs['bodyA'] = a_uid[0]
-            kwargs['linkIndexA'] = a_uid[1]
-        else:
-            raise ValueError
-
-        if b_uid is None:
-            pass
-        elif isinstance(b_uid, six.integer_types):
-            kwargs['bodyB'] = b_uid
-        elif isinstance(b_uid, (tuple, list)):
-            kwargs['bodyB'] = b_uid[0]
-            kwargs['linkIndexB'] = b_uid[1]
-        else:
-            raise ValueError
+    def get_contact_points(self, a_uid, b_uid=None):
+        """Check if two entities have contacts.
 
-        kwargs['physicsClientId'] = self.uid
+        Args:
+            a_uid: The Unique ID of the fist entity.
+            b_uid: The Unique ID of the second entity.
 
-        contact_points = pybullet.getContactPoints(**kwargs)
+        Returns:
+            A list of contact points, as returned by pybullet.getContactPoints.
+        """
+        return list(self._query_contacts(a_uid, b_uid)[0])
+
+    def _query_contacts(self, a_uid, b_uid):
+        """Get the contact points of pybullet.getContactPoints and their
+        structured array, both kept until the next step."""
+        if self._contacts is None:
+            self._contacts = {}
+        key = (_split_contact_uid(a_uid), _split_contact_uid(b_uid))
+        result = self._contacts.get(key)
+        if result is not None:
+            return result
+
+        (a_body, a_link), (b_body, b_link) = key
+        if a_body < 0 and b_body >= 0:
+            raise ValueError('The second entity requires the first one.')
+        contact_points = pybullet.getContactPoints(
+            bodyA=a_body, bodyB=b_body, linkIndexA=a_link, linkIndexB=b_link,
+            physicsClientId=self.uid)
 
-        return contact_points
+        # Each contact point is flattened into a row of 8-byte words, the
+        # integer fields are then stored as int64 in place.
+        table = np.array([
+            contact_point[:5] + contact_point[5] + contact_point[6] +
+            contact_point[7] + contact_point[8:11] + contact_point[11] +
+            contact_point[12:13] + contact_point[13]
+            for contact_point in contact_points], dtype=np.float64)
+        table = table.reshape(-1, CONTACT_POINT_DTYPE.itemsize // 8)
+        table.view(np.int64)[:, :5] = table[:, :5]
+        contacts = table.view(CONTACT_POINT_DTYPE)[:, 0]
+        contacts.flags.writeable = False
+        result = (contact_points, contacts)
+        self._contacts[key] = result
+        return result
 
     def get_contact_normal_force(self, a_uid, b_uid=None):
         """get contact normal force
@@ -1475,33 +2934,7 @@ class BulletPhysics():
         Returns:
             A list of contact force on the contact points
         """
-        kwargs = dict()
-
-        if isinstance(a_uid, six.integer_types):
-            kwargs['bodyA'] = a_uid
-        elif isinstance(a_uid, (tuple, list)):
-            kwargs['bodyA'] = a_uid[0]
-            kwargs['linkIndexA'] = a_uid[1]
-        else:
-            raise ValueError
-
-        if b_uid is None:
-            pass
-        elif isinstance(b_uid, six.integer_types):
-            kwargs['bodyB'] = b_uid
-        elif isinstance(b_uid, (tuple, list)):
-            kwargs['bodyB'] = b_uid[0]
-            kwargs['linkIndexB'] = b_uid[1]
-        else:
-            raise ValueError
-
-        kwargs['physicsClientId'] = self.uid
-
-        contact_points = pybullet.getContactPoints(**kwargs)
-
-        contact_points = [cp[9] for cp in contact_points]
-
-        return contact_points
+        return self.get_contacts(a_uid, b_uid)['normal_force'].tolist()
 
     def get_contact_body(self, a_uid):
         """get contact body with object of inquiry
@@ -1512,24 +2945,7 @@ class BulletPhysics():
         Returns:
             A list of body uids of contacting with body A
         """
-        kwargs = dict()
-
-        if isinstance(a_uid, six.integer_types):
-            kwargs['bodyA'] = a_uid
-        elif isinstance(a_uid, (tuple, list)):
-            kwargs['bodyA'] = a_uid[0]
-            kwargs['linkIndexA'] = a_uid[1]
-        else:
-            raise ValueError
-
-        kwargs['physicsClientId'] = self.uid
-
-        contact_points = pybullet.getContactPoints(**kwargs)
-
-        contact_points = [cp[2] for cp in contact_points]
-
-        return contact_points
-
+        return self.get_contacts(a_uid)['body_b'].tolist()
 
     #
     # Debug Visualizer
@@ -1581,37 +2997,277 @@ class BulletPhysics():
     # Save state management
     #
 
-    def save_state(self, save_full_state=True):
-        """
+    @property
+    def max_snapshots(self):
+        return self._max_snapshots
 
-        Return:
-          state_id (int): id for saved state
-          save_full_state (bool, optional): Save the full state or not
+    @property
+    def snapshot_ids(self):
+        """The ids of the saved states, from the least recently used."""
+        return list(self._snapshots.keys())
+
+    def save_state(self, pinned=False):
+        """Save the state of the simulation in memory.
+
+        The states are kept in a pool bounded by max_snapshots. When it is
+        full, the least recently saved or restored state that is not pinned
+        is evicted with remove_state.
+
+        The ids are never reused, restoring or removing an evicted state
+        raises a KeyError.
+
+        Args:
+            pinned (bool, optional): Never evict this state, e.g. for the
+                initial state that every episode starts from.
+
+        Returns:
+            state_id (int): id for saved state
+        """
+        state_id = self._next_snapshot_id
+        self._next_snapshot_id += 1
+        self._snapshots[state_id] = {
+            'bullet_state_id': pybullet.saveState(physicsClientId=self.uid),
+            'num_steps': self._num_steps,
+            'gravity': self._gravity,
+            'pinned': pinned,
+        }
+
+        if self._max_snapshots is not None:
+            evictable = [key for (key, sidecar) in self._snapshots.items()
+                         if not sidecar['pinned']]
+            num_evicted = max(0, len(evictable) - self._max_snapshots)
+            for key in evictable[:num_evicted]:
+                logger.debug('Evict state %d of client %d.', key, self.uid)
+                self.remove_state(key)
+
+        return state_id
+
+    def restore_state(self, state_id):
+        """Restore a state saved by save_state.
+
+        Only the dynamic state is restored, the bodies in the simulation must
+        be the same as when the state was saved.
+
+        Args:
+           state_id (int): saved state id to restore
+
+        Raises:
+            KeyError: If the state was removed or evicted.
         """
-        if save_full_state:
-            state_id = pybullet.saveState(self.uid)
-        else:
-            state_id = pybullet.saveWorld(self.uid)
+        sidecar = self._get_snapshot(state_id)
+        pybullet.restoreState(stateId=sidecar['bullet_state_id'],
+                              physicsClientId=self.uid)
+        self._snapshots.move_to_end(state_id)
+        self._contacts = None
+
+        self._num_steps = sidecar['num_steps']
+        if sidecar['gravity'] is not None:
+            self.set_gravity(sidecar['gravity'])
 
     def restore_state_from_id(self, state_id):
-        """
-        
+        """Same as restore_state.
+
         Args:
            state_id (int): saved state id to restore
         """
-        pybullet.restore(stateId=state_id, clientServerId=self.uid)
+        self.restore_state(state_id)
 
     def remove_state(self, state_id):
-        """
-        
+        """Remove a saved state and release its memory.
+
         Args:
            state_id (int): saved state id to remove
+
+        Raises:
+            KeyError: If the state was removed or evicted.
         """
-        pybullet.removeState(state_id, self.uid)
+        sidecar = self._get_snapshot(state_id)
+        del self._snapshots[state_id]
+        pybullet.removeState(sidecar['bullet_state_id'],
+                             physicsClientId=self.uid)
+
+    def remove_all_states(self):
+        """Remove all saved states."""
+        for state_id in list(self._snapshots.keys()):
+            self.remove_state(state_id)
+
+    def _get_snapshot(self, state_id):
+        sidecar = self._snapshots.get(state_id)
+        if sidecar is None:
+            raise KeyError('State %r is not saved, it was removed or '
+                           'evicted.' % (state_id,))
+        return sidecar
+
+    def save_world(self, filename):
+        """Save the world as a python script that reloads the bodies.
+
+        Args:
+           filename (str): path of the script
+        """
+        pybullet.saveWorld(filename, physicsClientId=self.uid)
+
+    def dump_state(self, path, compress=False):
+        """Write the state of the simulation to a .npz file.
+
+        The file holds the source file, scale, base pose and velocity of
+        every body, the positions and velocities of the revolute and
+        prismatic joints and the motor commands sent through this class.
+        Unlike save_state it can be loaded in another process or machine.
+
+        Args:
+            path: The path of the .npz file.
+            compress: Compress the arrays with zlib.
+        """
+        body_uids = self.get_body_uids()
+        body_infos = [self.get_body_info(body_uid) for body_uid in body_uids]
+
+        joint_body_uids = []
+        joint_inds = []
+        for (body_uid, body_info) in zip(body_uids, body_infos):
+            inds = np.flatnonzero(
+                (body_info.joint_types == pybullet.JOINT_REVOLUTE) |
+                (body_info.joint_types == pybullet.JOINT_PRISMATIC))
+            joint_body_uids.extend([body_uid] * len(inds))
+            joint_inds.extend(inds.tolist())
+        joint_body_uids = np.array(joint_body_uids, dtype=np.int64)
+        joint_inds = np.array(joint_inds, dtype=np.int64)
+
+        joint_states = np.empty(len(joint_inds), dtype=JOINT_STATE_DTYPE)
+        for body_uid in body_uids:
+            rows = np.flatnonzero(joint_body_uids == body_uid)
+            if len(rows) > 0:
+                joint_states[rows] = self.get_joint_states(
+                    body_uid, joint_inds[rows].tolist())
+
+        motor_body_uids = []
+        motor_joint_inds = []
+        motor_targets = []
+        for body_uid in body_uids:
+            targets = self._motor_targets.get(body_uid)
+            if targets is None:
+                continue
+            inds = np.flatnonzero(targets['control_mode'] >= 0)
+            motor_body_uids.extend([body_uid] * len(inds))
+            motor_joint_inds.extend(inds.tolist())
+            motor_targets.append(targets[inds])
+        if motor_targets:
+            motor_targets = np.concatenate(motor_targets)
+        else:
+            motor_targets = np.empty(0, dtype=MOTOR_TARGET_DTYPE)
+
+        if self._gravity is None:
+            gravity = np.full(3, np.nan)
+        else:
+            gravity = np.array(self._gravity, dtype=np.float64)
+
+        arrays = {
+            'body_uids': np.array(body_uids, dtype=np.int64),
+            'filenames': np.array([body_info.filename or ''
+                                   for body_info in body_infos],
+                                  dtype=np.str_),
+            'scales': np.array([body_info.scale for body_info in body_infos],
+                               dtype=np.float64),
+            'is_static': np.array([body_info.is_static
+                                   for body_info in body_infos],
+                                  dtype=bool),
+            'load_kwargs': np.array([json.dumps(body_info.load_kwargs
+                                                if body_info.filename else {})
+                                     for body_info in body_infos],
+                                    dtype=np.str_),
+            'body_states': self.get_body_states(body_uids,
+                                                compute_velocity=True),
+            'joint_body_uids': joint_body_uids,
+            'joint_inds': joint_inds,
+            'joint_positions': joint_states['position'],
+            'joint_velocities': joint_states['velocity'],
+            'motor_body_uids': np.array(motor_body_uids, dtype=np.int64),
+            'motor_joint_inds': np.array(motor_joint_inds, dtype=np.int64),
+            'motor_targets': motor_targets,
+            'num_steps': np.array(self._num_steps or 0, dtype=np.int64),
+            'gravity': gravity,
+        }
+        if compress:
+            np.savez_compressed(path, **arrays)
+        else:
+            np.savez(path, **arrays)
+
+    def load_state(self, path):
+        """Restore the state written by dump_state.
+
+        If the simulation does not hold the same bodies as the file, it is
+        reset and the bodies are loaded again from their source files, with
+        the same unique IDs. Bodies created from primitive shapes can only be
+        restored in place.
+
+        Args:
+            path: The path of the .npz file.
+
+        Returns:
+            True if the bodies were loaded again, False if the state was
+            restored in place.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            arrays = dict(data.items())
+
+        body_uids = arrays['body_uids'].tolist()
+        filenames = arrays['filenames'].tolist()
+        body_states = arrays['body_states']
+
+        reloaded = (
+            self.get_body_uids() != body_uids or
+            [self.get_body_info(body_uid).filename or ''
+             for body_uid in body_uids] != filenames)
+        if reloaded:
+            self.reset()
+            self.start()
+            for (i, body_uid) in enumerate(body_uids):
+                if not filenames[i]:
+                    raise ValueError(
+                        'Body %d was not loaded from a file.' % body_uid)
+                new_body_uid = self.add_body(
+                    filenames[i],
+                    [body_states[i, :3], body_states[i, 3:7]],
+                    scale=float(arrays['scales'][i]),
+                    is_static=bool(arrays['is_static'][i]),
+                    **json.loads(arrays['load_kwargs'][i]))
+                if new_body_uid != body_uid:
+                    raise ValueError(
+                        'Body %d is reloaded as %d, the unique IDs of the '
+                        'snapshot are not contiguous.'
+                        % (body_uid, new_body_uid))
+
+        self.set_body_poses(body_uids, body_states[:, :7])
+        self.set_body_velocities(body_uids, body_states[:, 7:])
+
+        joint_body_uids = arrays['joint_body_uids']
+        for body_uid in body_uids:
+            rows = np.flatnonzero(joint_body_uids == body_uid)
+            if len(rows) > 0:
+                self.set_joint_states(body_uid,
+                                      arrays['joint_inds'][rows].tolist(),
+                                      arrays['joint_positions'][rows],
+                                      arrays['joint_velocities'][rows])
+
+        motor_body_uids = arrays['motor_body_uids']
+        for body_uid in np.unique(motor_body_uids).tolist():
+            rows = np.flatnonzero(motor_body_uids == body_uid)
+            motor_targets = np.empty(self.get_num_joints(body_uid),
+                                     dtype=MOTOR_TARGET_DTYPE)
+            motor_targets['control_mode'] = -1
+            motor_targets[arrays['motor_joint_inds'][rows]] = (
+                arrays['motor_targets'][rows])
+            self.set_motor_targets(body_uid, motor_targets)
+
+        if not np.any(np.isnan(arrays['gravity'])):
+            self.set_gravity(arrays['gravity'].tolist())
+        self._num_steps = int(arrays['num_steps'])
+        self._contacts = None
+        return reloaded
 
     # Other functions
     def get_visual_shape_data(self, object_id):
-        return pybullet.getVisualShapeData(object_id, self.uid)
+        return pybullet.getVisualShapeData(object_id,
+                                           physicsClientId=self.uid)
 
 
     @property
@@ -1669,3 +3325,47 @@ class BulletPhysics():
             return np.concatenate((rgb_pixels, depth_pixels), axis=-1)
         else:
             raise NotImplementedError
+
+
+# The BulletPhysics and the body unique ID of an inverse kinematics worker
+# process, see BulletPhysics.compute_inverse_kinematics_batch.
+_inverse_kinematics_worker = None
+
+
+def _init_inverse_kinematics_worker(body_kwargs, joint_positions):
+    global _inverse_kinematics_worker
+    physics = BulletPhysics(use_visualizer=False)
+    physics.start()
+    body_uid = physics.add_body(**body_kwargs)
+    movable_joint_inds = physics.get_body_info(body_uid).movable_joint_inds
+    physics.set_joint_states(body_uid, movable_joint_inds, joint_positions)
+    _inverse_kinematics_worker = (physics, body_uid)
+
+
+def _solve_inverse_kinematics(task):
+    link_ind, positions, quaternions, seed, options = task
+    physics, body_uid = _inverse_kinematics_worker
+    return physics.compute_inverse_kinematics_batch(
+        (body_uid, link_ind), PoseArray([positions, quaternions]), seed=seed,
+        **options)
+
+
+def _get_urdf_flags(cache_graphics_shapes):
+    """The flags of pybullet.loadURDF of BulletPhysics.add_body."""
+    flags = pybullet.URDF_USE_SELF_COLLISION_EXCLUDE_PARENT
+    if cache_graphics_shapes:
+        flags |= pybullet.URDF_ENABLE_CACHED_GRAPHICS_SHAPES
+    return flags
+
+
+def _split_contact_uid(uid):
+    """The body and the link arguments of pybullet.getContactPoints of the
+    Unique ID of a body or of a link, -1 and -2 select any body and link."""
+    if uid is None:
+        return -1, -2
+    elif isinstance(uid, six.integer_types + (np.integer,)):
+        return int(uid), -2
+    elif isinstance(uid, (tuple, list)):
+        return int(uid[0]), int(uid[1])
+    else:
+        raise ValueError('Unrecognized Unique ID %r.' % (uid,))
@@ -3,6 +3,7 @@ from bullet_world.math_utils import Pose
 from bullet_world.interfaces import JointInterface, LinkInterface, DynamicsParams
 from bullet_world.robot_arm import RobotArm
 from easydict import EasyDict
+import numpy as np
 import os
 import abc
 
@@ -17,6 +18,9 @@ class BulletWorld():
     Args:
 
        debug_camera_config (dict): 
+       physics_profile (str or dict or PhysicsProfile): The physics engine
+           parameters, e.g. 'fast', 'balanced', 'accurate' or the path of a
+           YAML file, see PhysicsProfile.get.
 
     """
     def __init__(self,
@@ -25,11 +29,15 @@ class BulletWorld():
                  time_step=1e-3,
                  use_visualizer=True,
                  worker_id=0,
-                 debug_camera_config=None
+                 debug_camera_config=None,
+                 max_snapshots=64,
+                 physics_profile=None
                  ):
         self._physics = BulletPhysics(time_step=time_step,
                                       use_visualizer=use_visualizer,
-                                      worker_id=worker_id)
+                                      worker_id=worker_id,
+                                      max_snapshots=max_snapshots,
+                                      physics_profile=physics_profile)
 
         self.interfaces = EasyDict()
         joint_interface = JointInterface(self)
@@ -50,16 +58,43 @@ class BulletWorld():
         self._physics.start()
         self._assets_dir = assets_dir
 
+        self.robot_arms = []
+        self.robot_uids = []
         if default_init:
             self.default_initialization()
         else:
             self.custom_initialization()
 
+        # Episodes start from this state instead of reloading the bodies.
+        self._initial_snapshot = self._physics.save_state(pinned=True)
+
     def update_camera(self, *args, **kwargs):
         self._physics.reset_debug_visualizer(*args, **kwargs)
 
-    def step_simulation(self):
-        self._physics.step()
+    def step_simulation(self, num_steps=1, until=None, timeout=None):
+        """Step the simulation, see BulletPhysics.step.
+
+        The controllers of the robot arms run before every step. Without arm
+        controllers, the steps are sub-stepped by the physics engine.
+
+        Args:
+            num_steps (int, optional): The number of time steps.
+            until (callable, optional): Stop early once it returns True.
+            timeout (float, optional): Stop early after this wall-clock time.
+
+        Returns:
+            A StepInfo of the steps.
+        """
+        if any(arm.controller is not None for arm in self.robot_arms):
+            controller = self._run_arm_controllers
+        else:
+            controller = None
+        return self._physics.step(num_steps, controller=controller,
+                                  until=until, timeout=timeout)
+
+    def _run_arm_controllers(self):
+        for arm in self.robot_arms:
+            arm.run_controller()
 
     def add_body(self, file_name, pose=Pose(), scale=1.0, is_static=False, assets_dir=None):
         if assets_dir is None:
@@ -72,17 +107,34 @@ class BulletWorld():
     def add_primitive_body(self, **kwargs):
         body_uid = self._physics.add_primitive_body(**kwargs)
         return body_uid
+
+    def add_bodies_batch(self, shape, poses, masses=None, colors=None, scale=1.0, is_static=False, assets_dir=None, **kwargs):
+        """Add many copies of a body at once, see BulletPhysics.add_bodies_batch.
+
+        Args:
+            shape (str or dict): A file name relative to the assets directory,
+                or a dictionary of the arguments of add_primitive_body.
+            poses (PoseArray): The poses of the bodies.
+
+        Returns:
+            An int64 numpy array of the body unique IDs.
+        """
+        if not isinstance(shape, dict):
+            if assets_dir is None:
+                shape = self._assets_dir + shape
+            else:
+                shape = assets_dir + shape
+        return self._physics.add_bodies_batch(shape, poses, masses=masses, colors=colors, scale=scale, is_static=is_static, **kwargs)
         
     def default_initialization(self):
-        self.add_body('envs/planes/plane.urdf')
-        self.table_uid = self.add_body('envs/tables/table.urdf')
+        with self._physics.batch_edit():
+            self.add_body('envs/planes/plane.urdf')
+            self.table_uid = self.add_body('envs/tables/table.urdf')
 
-        self.robot_arms = []
-        self.robot_arms.append(RobotArm(config_file=os.path.join(os.path.dirname(__file__), "configs/default_franka_panda.yaml"),
-                                        bworld=self,
-                                        interfaces=self.interfaces))
+            self.robot_arms.append(RobotArm(config_file=os.path.join(os.path.dirname(__file__), "configs/default_franka_panda.yaml"),
+                                            bworld=self,
+                                            interfaces=self.interfaces))
 
-        self.robot_uids = []
         for arm in self.robot_arms:
             self.robot_uids.append(arm.uid)
         
@@ -95,6 +147,106 @@ class BulletWorld():
     @property
     def physics(self):
         return self._physics
+
+    @property
+    def observation_size(self):
+        """Length of the vector returned by get_observation."""
+        return 2 * sum(len(arm.arm_joints) for arm in self.robot_arms)
+
+    @property
+    def action_size(self):
+        """Length of the vector expected by apply_action."""
+        return sum(len(arm.arm_joints) for arm in self.robot_arms)
+
+    def get_observation(self):
+        """Get the observation of the world as a flat vector.
+
+        By default these are the arm joint positions followed by the arm
+        joint velocities of every robot arm. Override it together with
+        observation_size in a custom world.
+
+        Returns:
+            A float64 numpy array of size observation_size.
+        """
+        observation = []
+        for arm in self.robot_arms:
+            states = arm.arm_joint_states
+            observation.append(states['position'])
+            observation.append(states['velocity'])
+        if not observation:
+            return np.zeros(0, dtype=np.float64)
+        return np.concatenate(observation)
+
+    def apply_action(self, action):
+        """Apply an action to the world before it is stepped.
+
+        By default the action holds the arm joint position targets of every
+        robot arm. Override it together with action_size in a custom world.
+
+        Args:
+            action: A flat vector of size action_size.
+        """
+        start = 0
+        for arm in self.robot_arms:
+            end = start + len(arm.arm_joints)
+            arm.set_position_control_target(action[start:end])
+            start = end
+
+    def reset(self):
+        """Reset the world to the state right after the initialization."""
+        self.reset_to(self._initial_snapshot)
+        for arm in self.robot_arms:
+            arm.set_position_control_target(arm.init_joint_positions)
+
+    def save_snapshot(self, pinned=False):
+        """Save the state of the world in memory.
+
+        Args:
+            pinned (bool, optional): Never evict the snapshot from the pool.
+
+        Returns:
+            The snapshot id to pass to reset_to.
+        """
+        return self._physics.save_state(pinned=pinned)
+
+    def reset_to(self, snapshot_id):
+        """Restore a snapshot saved by save_snapshot.
+
+        Args:
+            snapshot_id (int): The snapshot id.
+        """
+        self._physics.restore_state(snapshot_id)
+
+    def remove_snapshot(self, snapshot_id):
+        self._physics.remove_state(snapshot_id)
+
+    @property
+    def initial_snapshot(self):
+        return self._initial_snapshot
+
+    def dump_snapshot(self, path, compress=False):
+        """Write the state of the world to a .npz file.
+
+        Args:
+            path (str): The path of the .npz file.
+            compress (bool, optional): Compress the arrays with zlib.
+        """
+        self._physics.dump_state(path, compress=compress)
+
+    def load_snapshot(self, path):
+        """Restore the state of the world written by dump_snapshot.
+
+        The file is best loaded into a world built the same way as the one
+        that wrote it, so that the state is restored in place. Otherwise the
+        bodies are loaded again from their source files, the loaded state
+        becomes the initial snapshot and the Python-side handles such as
+        robot_arms are not rebuilt.
+
+        Args:
+            path (str): The path of the .npz file.
+        """
+        if self._physics.load_state(path):
+            self._initial_snapshot = self._physics.save_state(pinned=True)
         
         
     @abc.abstractmethod
@@ -160,23 +312,25 @@ class ViSIIBulletWorld(BulletWorld):
                width=800,
                height=800,
                spp=800):
-        for robot_uid in self.robot_uids:
-            self.update_visii(robot_uid)
-        return v.render(width=width, height=height, samples_per_pixel=spp)
+        with self._physics.profile_section('visii_render'):
+            for robot_uid in self.robot_uids:
+                self.update_visii(robot_uid)
+            return v.render(width=width, height=height, samples_per_pixel=spp)
 
     def visii_render_to_file(self,
                              width=800,
                              height=800,
                              spp=100,
                              file_name="./example.png"):
-        for robot_uid in self.robot_uids:
-            self.update_visii(robot_uid)        
-        v.render_to_file(
-            width=width,
-            height=height,
-            samples_per_pixel=spp,
-            file_path=file_name,
-        )        
+        with self._physics.profile_section('visii_render_to_file'):
+            for robot_uid in self.robot_uids:
+                self.update_visii(robot_uid)
+            v.render_to_file(
+                width=width,
+                height=height,
+                samples_per_pixel=spp,
+                file_path=file_name,
+            )
                              
     
     def get_image(self,
@@ -193,8 +347,16 @@ class ViSIIBulletWorld(BulletWorld):
         # 2. read as np array and return
 
     def update_visii(self, object_id, name_string=""):
-        print("Debugging: ", self._physics.get_visual_shape_data(object_id))
-        for (i, visual) in enumerate(self._physics.get_visual_shape_data(object_id)):
+        visual_data = self._physics.get_visual_shape_data(object_id)
+
+        # Read all link frames of the body at once.
+        link_inds = [visual[1] for visual in visual_data if visual[1] != -1]
+        link_rows = dict((link_ind, row) for (row, link_ind) in enumerate(link_inds))
+        if len(link_inds) > 0:
+            link_poses = self._physics.get_link_states(object_id, link_inds)
+            link_offsets = self._physics.get_link_states(object_id, link_inds, frame='local_offset')
+
+        for (i, visual) in enumerate(visual_data):
             # Extract visual data from pybullet
             objectUniqueId = visual[0]
             linkIndex = visual[1]
@@ -212,13 +374,12 @@ class ViSIIBulletWorld(BulletWorld):
             additional_pos = None
             additional_rot = None
             if linkIndex != -1:
-                linkState = self._physics.get_link_pose((objectUniqueId, linkIndex))
-                position = linkState[0]
-                orientation = linkState[1].quaternion.to_xyzw()
+                row = link_rows[linkIndex]
+                position = link_poses[row, :3]
+                orientation = link_poses[row, 3:7]
 
-                linkOffsetState = self._physics.get_link_local_offset((objectUniqueId, linkIndex))
-                additional_pos = linkOffsetState[0]
-                additional_rot = linkOffsetState[1].quaternion.to_xyzw()     
+                additional_pos = link_offsets[row, :3]
+                additional_rot = link_offsets[row, 3:7]
                 
             else:
                 linkState = self._physics.get_body_pose(objectUniqueId)
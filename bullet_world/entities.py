@@ -20,12 +20,12 @@ class Body():
         self.joints = {}
         
         for link_index in link_indices:
-            link_name = self.client.get_link_name(link_index)
+            link_name = self.client.get_link_name((self.uid, link_index))
             self.links[link_name] = Link(self.client, body_uid, link_index)
 
         for joint_index in joint_indices:
-            joint_name = self.client.get_joint_name(joint_index)
-            self.joints[joint_name] = Joint(self.client.joint_uid, joint_index)
+            joint_name = self.client.get_joint_name((self.uid, joint_index))
+            self.joints[joint_name] = Joint(self.client, body_uid, joint_index)
 
     @property
     def pose(self):
@@ -69,27 +69,31 @@ class Joint():
         self.body_uid = body_uid
         self.ind = joint_ind
 
-        self.name = self.client.get_joint_name(ind)
+        self.name = self.client.get_joint_name(self.uid)
+
+    @property
+    def info(self):
+        return self.client.get_body_info(self.body_uid)
 
     @property
     def limit(self):
-        return self.physics.get_joint_limit(self.uid)
+        return self.client.get_joint_limit(self.uid)
 
     @property
     def lower_limit(self):
-        return self.physics.get_joint_limit(self.uid)['lower']
+        return self.info.lower_limits[self.ind]
 
     @property
     def upper_limit(self):
-        return self.physics.get_joint_limit(self.uid)['upper']
+        return self.info.upper_limits[self.ind]
 
     @property
     def max_effort(self):
-        return self.physics.get_joint_limit(self.uid)['effort']
+        return self.info.max_forces[self.ind]
 
     @property
     def max_velocity(self):
-        return self.physics.get_joint_limit(self.uid)['velocity']
+        return self.info.max_velocities[self.ind]
 
     @property
     def range(self):
@@ -97,15 +101,15 @@ class Joint():
 
     @property
     def dynamics(self):
-        return self.physics.get_joint_dynamics(self.uid)
+        return self.client.get_joint_dynamics(self.uid)
 
     @property
     def damping(self):
-        return self.physics.get_joint_dynamics(self.uid)['damping']
+        return self.info.damping[self.ind]
 
     @property
     def friction(self):
-        return self.physics.get_joint_dynamics(self.uid)['friction']
+        return self.info.friction[self.ind]
 
     @property
     def position(self):
@@ -140,7 +144,7 @@ class Link():
         self.body_uid = body_uid
         self.ind = link_ind
 
-        self.name = self.client.get_link_name(ind)
+        self.name = self.client.get_link_name(self.uid)
 
     @property
     def pose(self):
@@ -0,0 +1,139 @@
+"""Cache of inverse kinematics solutions.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import math
+
+
+class IKCache(object):
+    """LRU cache of inverse kinematics solutions keyed by discretized targets.
+
+    The target position, the target quaternion and the seed joint positions
+    are rounded to bins of the given tolerances, so that the targets of a
+    teleoperation loop holding still hit the same entry. Two targets closer
+    than the tolerances can still fall on both sides of a bin boundary and
+    miss each other.
+
+    The solutions depend on the base pose of the body, which is part of the
+    key with the same tolerances as the target, so that moving the base
+    misses the solutions found before.
+
+    Args:
+        capacity (int): The maximal number of solutions, the least recently
+            used ones are evicted first.
+        position_tolerance (float): The bin size of the target positions in
+            meters.
+        orientation_tolerance (float): The bin size of the target
+            orientations in radians.
+        seed_tolerance (float): The bin size of the seed joint positions, the
+            seed is not part of the key if it is None.
+        warm_start (bool): If True, a cached solution is the seed of a new
+            solve instead of being returned, which is slower but exact.
+    """
+    def __init__(self,
+                 capacity=1024,
+                 position_tolerance=1e-3,
+                 orientation_tolerance=1e-2,
+                 seed_tolerance=1e-2,
+                 warm_start=False):
+        if capacity <= 0:
+            raise ValueError('The capacity must be positive.')
+        self.capacity = capacity
+        self.position_tolerance = position_tolerance
+        self.orientation_tolerance = orientation_tolerance
+        self.seed_tolerance = seed_tolerance
+        self.warm_start = warm_start
+
+        # key -> solution, in LRU order.
+        self._solutions = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self):
+        return len(self._solutions)
+
+    def get_key(self, link_uid, position, quaternion, seed=None,
+                options=None, base_pose=None):
+        """Get the key of a target.
+
+        Args:
+            link_uid: The unique ID of the link.
+            position: The target position.
+            quaternion: The target quaternion, or None.
+            seed: The joint positions the solve starts from.
+            options: A hashable of the other arguments of the solve.
+            base_pose: The position and the quaternion of the base of the
+                body.
+
+        Returns:
+            A hashable key.
+        """
+        bins = self._bin_pose(position, quaternion)
+        if base_pose is not None:
+            bins.extend(self._bin_pose(*base_pose))
+        if seed is not None and self.seed_tolerance is not None:
+            bins.extend(_bin(value, self.seed_tolerance) for value in seed)
+        return (link_uid, quaternion is None, options, tuple(bins))
+
+    def _bin_pose(self, position, quaternion):
+        bins = [_bin(value, self.position_tolerance) for value in position]
+        if quaternion is not None:
+            quaternion = [float(value) for value in quaternion]
+            if quaternion[3] < 0.0:
+                quaternion = [-value for value in quaternion]
+            # A rotation by a small angle changes the quaternion by about
+            # half the angle.
+            bins.extend(_bin(value, 0.5 * self.orientation_tolerance)
+                        for value in quaternion)
+        return bins
+
+    def get(self, key):
+        """Get the cached solution of a key, or None on a miss."""
+        solution = self._solutions.get(key)
+        if solution is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._solutions.move_to_end(key)
+        return solution
+
+    def put(self, key, solution):
+        """Cache the solution of a key."""
+        self._solutions[key] = tuple(solution)
+        self._solutions.move_to_end(key)
+        while len(self._solutions) > self.capacity:
+            self._solutions.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self):
+        """Drop the cached solutions, the statistics are kept."""
+        self._solutions.clear()
+
+    def get_stats(self):
+        """Get the statistics of the cache.
+
+        Returns:
+            A dictionary of the hits, misses, hit_rate, evictions and size.
+        """
+        total = self._hits + self._misses
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / total if total > 0 else 0.0,
+            'evictions': self._evictions,
+            'size': len(self._solutions),
+        }
+
+    def reset_stats(self):
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+
+def _bin(value, size):
+    return int(math.floor(value / size + 0.5))
@@ -1,3 +1,7 @@
+import numpy as np
+
+from bullet_world.bullet_physics import JOINT_STATE_DTYPE
+from bullet_world.math_utils import PoseArray
 
 class BaseInterface():
     def __init__(self, bworld):
@@ -19,11 +23,36 @@ class JointInterface(BaseInterface):
             joint_names.append(self.name(joint_uid))
         return joint_names        
 
+    def get_states(self, joint_uids):
+        """Read the states of a list of joints with batched physics calls.
+
+        Joints are grouped by body so that each body is queried once.
+
+        Args:
+           joint_uids (list): list of (body_uid, joint_ind)
+
+        Returns:
+           A structured numpy array of JOINT_STATE_DTYPE in the order of
+           joint_uids.
+        """
+        body_uids = set(body_uid for body_uid, _ in joint_uids)
+        if len(body_uids) == 1:
+            return self.physics.get_joint_states(
+                body_uids.pop(), [joint_ind for _, joint_ind in joint_uids])
+
+        joint_states = np.empty(len(joint_uids), dtype=JOINT_STATE_DTYPE)
+        for body_uid in body_uids:
+            rows = [i for (i, joint_uid) in enumerate(joint_uids)
+                    if joint_uid[0] == body_uid]
+            joint_states[rows] = self.physics.get_joint_states(
+                body_uid, [joint_uids[i][1] for i in rows])
+        return joint_states
+
     def get_positions(self, joint_uids):
-        joint_positions = []
-        for joint_uid in joint_uids:
-            joint_positions.append(self.get_position(joint_uid))
-        return joint_positions
+        return self.get_states(joint_uids)['position']
+
+    def get_velocities(self, joint_uids):
+        return self.get_states(joint_uids)['velocity']
 
     def set_position(self, joint_uid, position):
         self.physics.set_joint_position(joint_uid, position)
@@ -57,6 +86,45 @@ class LinkInterface(BaseInterface):
     def get_pose(self, link_uid):
         return self.physics.get_link_pose(link_uid)
 
+    def get_poses(self, link_uids, out=None, **kwargs):
+        """Read the poses of a list of links with batched physics calls.
+
+        Args:
+           link_uids (list): list of (body_uid, link_ind)
+           out (np.array, optional): preallocated float64 array of [N, 7]
+           kwargs: extra arguments of BulletPhysics.get_link_states
+
+        Returns:
+           A float64 array of [x, y, z, qx, qy, qz, qw] rows in the order of
+           link_uids, with no rows if link_uids is empty.
+        """
+        if len(link_uids) == 0:
+            if out is not None:
+                return out
+            num_columns = 13 if kwargs.get('compute_velocity') else 7
+            return np.empty((0, num_columns), dtype=np.float64)
+
+        body_uids = set(body_uid for body_uid, _ in link_uids)
+        if len(body_uids) == 1:
+            return self.physics.get_link_states(
+                body_uids.pop(), [link_ind for _, link_ind in link_uids],
+                out=out, **kwargs)
+
+        poses = out
+        for body_uid in body_uids:
+            rows = [i for (i, link_uid) in enumerate(link_uids)
+                    if link_uid[0] == body_uid]
+            body_poses = self.physics.get_link_states(
+                body_uid, [link_uids[i][1] for i in rows], **kwargs)
+            if poses is None:
+                poses = np.empty((len(link_uids), body_poses.shape[1]),
+                                 dtype=np.float64)
+            poses[rows] = body_poses
+        return poses
+
+    def get_pose_array(self, link_uids, **kwargs):
+        return PoseArray(self.get_poses(link_uids, **kwargs))
+
     def local_offset(self, link_uid):
         return self.physics.get_link_local_offset(link_uid)
 
@@ -80,22 +148,23 @@ class DynamicsParams():
     def zero_jacobian(self, joint_uids, ee_link_uid, decoupled=True):
         """
         Args:
-           arm_joint_positions (list or np.array): positions of arm joints
+           joint_uids (list): all movable joints of the body, in the order
+               of the joint indices
            ee_link_uid (tuple): (body_uid, link_ind)
            decoupled (bool): if True, return a tuple of (jac_tr, jac_r), else a whole jacobian
         
         """
         body_uid, link_ind = ee_link_uid
         joint_positions = self.joint_interface.get_positions(joint_uids)
-        com = self.link_interface.local_offset(ee_link_uid)
         zero_vec = [0.] * len(joint_positions)
 
-        jac_tr, jac_r = self.physics.calculate_jacobian(ee_link_uid, com.position, joint_positions, zero_vec, zero_vec)
+        # The Jacobian of the origin of the link frame.
+        jac_tr, jac_r = self.physics.calculate_jacobian(ee_link_uid, [0., 0., 0.], joint_positions, zero_vec, zero_vec)
         
         if decoupled:
             return (jac_tr, jac_r)
         else:
-            return np.concatenate((jac_tr, jac_r), dim=0)
+            return np.concatenate((jac_tr, jac_r), axis=0)
 
     def mass(self, body_uid, joint_uids):
         joint_positions = self.joint_interface.get_positions(joint_uids)
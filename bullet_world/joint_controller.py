@@ -0,0 +1,160 @@
+"""Motor control of a fixed list of joints.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import pybullet
+
+
+CONTROL_MODES = {
+    'position': pybullet.POSITION_CONTROL,
+    'velocity': pybullet.VELOCITY_CONTROL,
+    'torque': pybullet.TORQUE_CONTROL,
+}
+
+# The argument of setJointMotorControlArray and the field of
+# MOTOR_TARGET_DTYPE that hold the targets of each control mode.
+TARGET_KEYS = {
+    'position': ('targetPositions', 'target_position'),
+    'velocity': ('targetVelocities', 'target_velocity'),
+    'torque': ('forces', 'force'),
+}
+
+
+class JointController(object):
+    """Motor control of a fixed list of joints of a body.
+
+    The body, the joint indices and the gains are resolved once, and the
+    arguments of pybullet.setJointMotorControlArray are kept in a dictionary
+    that is reused by every call. A control tick is then a single pybullet
+    call instead of one setJointMotorControl2 call per joint.
+
+    Args:
+        physics (BulletPhysics): The physics of the body.
+        body_uid (int): The body Unique ID.
+        joint_inds (list): The joint indices.
+        control_mode (str): 'position', 'velocity' or 'torque'.
+        position_gains: The position gains, a single value or one per joint.
+        velocity_gains: The velocity gains, a single value or one per joint.
+        max_forces: The maximal joint forces, a single value or one per
+            joint. They are ignored by the torque control.
+        effort_check: What the torque control does with torques beyond the
+            effort limits, see BulletPhysics.check_joint_efforts.
+    """
+    def __init__(self,
+                 physics,
+                 body_uid,
+                 joint_inds,
+                 control_mode='position',
+                 position_gains=None,
+                 velocity_gains=None,
+                 max_forces=None,
+                 effort_check='clip'):
+        self._physics = physics
+        self._body_uid = body_uid
+        self._joint_inds = [int(joint_ind) for joint_ind in joint_inds]
+        self._rows = np.array(self._joint_inds, dtype=np.int64)
+        self._control_mode = control_mode
+        self._target_key, self._target_field = TARGET_KEYS[control_mode]
+
+        self._kwargs = {
+            'physicsClientId': physics.uid,
+            'bodyUniqueId': body_uid,
+            'jointIndices': self._joint_inds,
+            'controlMode': CONTROL_MODES[control_mode],
+        }
+        self._motor_targets = physics.get_motor_target_buffer(body_uid)
+        self.set_gains(position_gains, velocity_gains, max_forces)
+
+        if control_mode == 'torque':
+            self._effort_check = effort_check
+            self._effort_limits = physics.get_effort_limits(body_uid,
+                                                            self._rows)
+            self._torques = np.zeros(len(self._joint_inds), dtype=np.float64)
+
+    @property
+    def body_uid(self):
+        return self._body_uid
+
+    @property
+    def joint_inds(self):
+        return self._joint_inds
+
+    @property
+    def control_mode(self):
+        return self._control_mode
+
+    def __len__(self):
+        return len(self._joint_inds)
+
+    def _set_argument(self, key, field, values):
+        """Cache an argument for every joint, or drop it if values is None."""
+        if values is None:
+            self._kwargs.pop(key, None)
+            self._motor_targets[field][self._rows] = np.nan
+        else:
+            values = np.broadcast_to(
+                np.asarray(values, dtype=np.float64), self._rows.shape)
+            self._kwargs[key] = values.tolist()
+            self._motor_targets[field][self._rows] = values
+
+    def set_gains(self, position_gains=None, velocity_gains=None,
+                  max_forces=None):
+        """Set the gains used by the following commands.
+
+        Args:
+            position_gains: The position gains, None for the default.
+            velocity_gains: The velocity gains, None for the default.
+            max_forces: The maximal joint forces, None for the default.
+        """
+        self._set_argument('positionGains', 'position_gain', position_gains)
+        self._set_argument('velocityGains', 'velocity_gain', velocity_gains)
+        if self._control_mode != 'torque':
+            self._set_argument('forces', 'force', max_forces)
+
+    def disable_motors(self):
+        """Disable the default velocity motors of the joints."""
+        self._physics.disable_motors(self._body_uid, self._joint_inds)
+
+    def set_targets(self, targets, target_velocities=None):
+        """Send the targets of all joints in one call.
+
+        Args:
+            targets: A numpy array or list of the joint positions, velocities
+                or torques depending on the control mode.
+            target_velocities: The joint velocities of the position control,
+                zero if it is None.
+        """
+        kwargs = self._kwargs
+        motor_targets = self._motor_targets
+        if self._control_mode == 'torque':
+            if self._effort_check == 'clip':
+                targets = np.clip(targets, -self._effort_limits,
+                                  self._effort_limits, out=self._torques)
+            else:
+                targets = self._physics.check_joint_efforts(
+                    self._body_uid, self._rows, targets,
+                    effort_check=self._effort_check, out=self._torques)
+            if (motor_targets['control_mode'][self._rows] !=
+                    pybullet.TORQUE_CONTROL).any():
+                self.disable_motors()
+        else:
+            targets = np.asarray(targets, dtype=np.float64)
+        kwargs[self._target_key] = targets.tolist()
+        if self._control_mode == 'position':
+            if target_velocities is None:
+                kwargs.pop('targetVelocities', None)
+                motor_targets['target_velocity'][self._rows] = np.nan
+            else:
+                target_velocities = np.asarray(target_velocities,
+                                               dtype=np.float64)
+                kwargs['targetVelocities'] = target_velocities.tolist()
+                motor_targets['target_velocity'][self._rows] = (
+                    target_velocities)
+
+        pybullet.setJointMotorControlArray(**kwargs)
+        motor_targets['control_mode'][self._rows] = kwargs['controlMode']
+        motor_targets[self._target_field][self._rows] = targets
@@ -0,0 +1,491 @@
+"""Forward kinematics of URDF bodies in NumPy.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+
+from bullet_world.math_utils import Pose
+from bullet_world.math_utils import PoseArray
+from bullet_world.transformations import matrix3_from_euler
+from bullet_world.transformations import matrix3_from_quaternion_batch
+from bullet_world.transformations import quaternion_from_matrix3_batch
+
+
+def _skew(axis):
+    x, y, z = axis
+    return np.array([[0.0, -z, y],
+                     [z, 0.0, -x],
+                     [-y, x, 0.0]], dtype=np.float64)
+
+
+def _parse_vector(element, attribute, default):
+    if element is None or element.get(attribute) is None:
+        return np.array(default, dtype=np.float64)
+    return np.array([float(value) for value in element.get(attribute).split()],
+                    dtype=np.float64)
+
+
+class ForwardKinematics(object):
+    """Forward kinematics of the kinematic tree of a URDF file.
+
+    The joint origins, axes and parent links are parsed once. The link frames
+    of a batch of joint configurations are then computed with a few NumPy
+    products per joint, without touching the simulation. The links and the
+    joints follow the pybullet indices of the body, i.e. link i is the child
+    link of joint i, and the joint configurations hold the positions of the
+    movable joints in the order of their indices, as returned by
+    BulletPhysics.compute_inverse_kinematics.
+
+    Args:
+        urdf_filename (str): The path of the URDF file.
+        joint_name_to_index (dict): The pybullet joint index of every joint
+            name, e.g. BodyInfo.joint_name_to_index.
+        base_pose: The pose of the root link frame in the world, the
+            identity if it is None.
+    """
+    def __init__(self, urdf_filename, joint_name_to_index, base_pose=None):
+        root = ElementTree.parse(urdf_filename).getroot()
+        joints = {}
+        child_links = set()
+        for joint in root.findall('joint'):
+            joints[joint.get('name')] = joint
+            child_links.add(joint.find('child').get('link'))
+        root_links = [link.get('name') for link in root.findall('link')
+                      if link.get('name') not in child_links]
+        if len(root_links) != 1:
+            raise ValueError('Expected a single root link in %s, found %r.'
+                             % (urdf_filename, root_links))
+
+        num_joints = len(joint_name_to_index)
+        if set(joints) != set(joint_name_to_index):
+            raise ValueError('The joints of %s do not match the body.'
+                             % urdf_filename)
+
+        # Per joint, in the order of the pybullet indices.
+        self._parents = np.full(num_joints, -1, dtype=np.int64)
+        self._types = [None] * num_joints
+        self._origin_rotations = np.empty((num_joints, 3, 3), dtype=np.float64)
+        self._origin_translations = np.empty((num_joints, 3), dtype=np.float64)
+        self._axes = np.zeros((num_joints, 3), dtype=np.float64)
+        self._joint_lower_limits = np.full(num_joints, -np.inf)
+        self._joint_upper_limits = np.full(num_joints, np.inf)
+
+        link_to_joint = dict((joint.find('child').get('link'),
+                              joint_name_to_index[name])
+                             for (name, joint) in joints.items())
+        for (name, joint) in joints.items():
+            joint_ind = joint_name_to_index[name]
+            joint_type = joint.get('type')
+            if joint_type not in ('revolute', 'continuous', 'prismatic',
+                                  'fixed'):
+                raise ValueError('Unsupported type %r of joint %r.'
+                                 % (joint_type, name))
+            self._types[joint_ind] = joint_type
+            self._parents[joint_ind] = link_to_joint.get(
+                joint.find('parent').get('link'), -1)
+
+            origin = joint.find('origin')
+            self._origin_translations[joint_ind] = _parse_vector(
+                origin, 'xyz', [0.0, 0.0, 0.0])
+            rpy = _parse_vector(origin, 'rpy', [0.0, 0.0, 0.0])
+            self._origin_rotations[joint_ind] = matrix3_from_euler(*rpy)
+            if joint_type != 'fixed':
+                axis = _parse_vector(joint.find('axis'), 'xyz',
+                                     [1.0, 0.0, 0.0])
+                self._axes[joint_ind] = axis / np.linalg.norm(axis)
+            limit = joint.find('limit')
+            if joint_type in ('revolute', 'prismatic') and limit is not None:
+                lower = float(limit.get('lower', 0.0))
+                upper = float(limit.get('upper', 0.0))
+                # Like pybullet, inverted limits leave the joint unlimited.
+                if lower <= upper:
+                    self._joint_lower_limits[joint_ind] = lower
+                    self._joint_upper_limits[joint_ind] = upper
+
+        # pybullet numbers the joints so that parents come first, which is
+        # checked here since the links are computed in index order.
+        if np.any(self._parents >= np.arange(num_joints)):
+            raise ValueError('The parent links of %s do not precede their '
+                             'children.' % urdf_filename)
+
+        self._num_joints = num_joints
+        self._movable_joint_inds = np.array(
+            [joint_ind for joint_ind in range(num_joints)
+             if self._types[joint_ind] != 'fixed'], dtype=np.int64)
+        self._columns = np.full(num_joints, -1, dtype=np.int64)
+        self._columns[self._movable_joint_inds] = np.arange(
+            len(self._movable_joint_inds))
+
+        # The movable joints between the base and each link.
+        self._chains = []
+        for joint_ind in range(num_joints):
+            chain = []
+            ancestor = joint_ind
+            while ancestor >= 0:
+                if self._types[ancestor] != 'fixed':
+                    chain.append(ancestor)
+                ancestor = self._parents[ancestor]
+            self._chains.append(chain[::-1])
+        # All joints between the base and each link.
+        self._ancestors = []
+        for joint_ind in range(num_joints):
+            ancestors = []
+            ancestor = joint_ind
+            while ancestor >= 0:
+                ancestors.append(ancestor)
+                ancestor = self._parents[ancestor]
+            self._ancestors.append(ancestors[::-1])
+
+        # The rotation of a revolute joint is R_o (I + sin q K + (1 - cos q)
+        # K^2) for the skew matrix K of the axis, so R_o K and R_o K^2 are
+        # precomputed.
+        skews = np.array([_skew(axis) for axis in self._axes])
+        self._rotation_sin = np.matmul(self._origin_rotations, skews)
+        self._rotation_cos = np.matmul(self._rotation_sin, skews)
+        self._prismatic_axes = np.einsum('nij,nj->ni', self._origin_rotations,
+                                         self._axes)
+
+        self.base_pose = base_pose
+
+    @classmethod
+    def from_body(cls, physics, body_uid):
+        """Parse the URDF file of a body loaded by BulletPhysics.add_body.
+
+        The base pose is read from the simulation, it has to be updated with
+        the base_pose setter if the base moves afterwards.
+
+        Args:
+            physics (BulletPhysics): The physics.
+            body_uid: The body Unique ID.
+
+        Returns:
+            An instance of ForwardKinematics.
+        """
+        body_info = physics.get_body_info(body_uid)
+        if body_info.filename is None or not body_info.filename.endswith(
+                '.urdf'):
+            raise ValueError('Body %d was not loaded from a URDF file.'
+                             % body_uid)
+        if body_info.scale != 1.0:
+            raise ValueError('Body %d is scaled.' % body_uid)
+        return cls(body_info.filename, body_info.joint_name_to_index,
+                   base_pose=physics.get_base_link_pose(body_uid))
+
+    @property
+    def num_joints(self):
+        return self._num_joints
+
+    @property
+    def movable_joint_inds(self):
+        return self._movable_joint_inds
+
+    @property
+    def lower_limits(self):
+        """The lower limits of the movable joints."""
+        return self._joint_lower_limits[self._movable_joint_inds]
+
+    @property
+    def upper_limits(self):
+        """The upper limits of the movable joints."""
+        return self._joint_upper_limits[self._movable_joint_inds]
+
+    @property
+    def base_pose(self):
+        return self._base_pose
+
+    @base_pose.setter
+    def base_pose(self, value):
+        if value is None:
+            value = [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0, 1.0]]
+        self._base_pose = Pose(value)
+        self._base_rotation = np.array(self._base_pose.matrix3,
+                                       dtype=np.float64)
+        self._base_translation = np.array(self._base_pose.position,
+                                          dtype=np.float64)
+
+    def _check_joint_positions(self, joint_positions):
+        joint_positions = np.asarray(joint_positions, dtype=np.float64)
+        single = joint_positions.ndim == 1
+        joint_positions = np.atleast_2d(joint_positions)
+        if joint_positions.shape[1] != len(self._movable_joint_inds):
+            raise ValueError('Expected %d joint positions, got %d.' % (
+                len(self._movable_joint_inds), joint_positions.shape[1]))
+        return joint_positions, single
+
+    def _compute_frames(self, joint_positions, link_ind=None):
+        """The rotations and translations of the link frames.
+
+        The frames of the links that only follow fixed joints from the base
+        are [3, 3] and [3] arrays, the others [B, 3, 3] and [B, 3] arrays.
+        If link_ind is given, only the frames of the link and its ancestors
+        are computed and the others are None.
+        """
+        rotations = [None] * self._num_joints
+        translations = [None] * self._num_joints
+        if link_ind is None:
+            joint_inds = range(self._num_joints)
+        else:
+            joint_inds = self._ancestors[link_ind]
+        for joint_ind in joint_inds:
+            parent = self._parents[joint_ind]
+            if parent < 0:
+                parent_rotation = self._base_rotation
+                parent_translation = self._base_translation
+            else:
+                parent_rotation = rotations[parent]
+                parent_translation = translations[parent]
+
+            joint_type = self._types[joint_ind]
+            local_translation = self._origin_translations[joint_ind]
+            if joint_type == 'fixed':
+                local_rotation = self._origin_rotations[joint_ind]
+            else:
+                q = joint_positions[:, self._columns[joint_ind]]
+                if joint_type == 'prismatic':
+                    local_rotation = self._origin_rotations[joint_ind]
+                    local_translation = (
+                        local_translation +
+                        q[:, np.newaxis] * self._prismatic_axes[joint_ind])
+                else:
+                    local_rotation = (
+                        self._origin_rotations[joint_ind] +
+                        np.sin(q)[:, np.newaxis, np.newaxis] *
+                        self._rotation_sin[joint_ind] +
+                        (1.0 - np.cos(q))[:, np.newaxis, np.newaxis] *
+                        self._rotation_cos[joint_ind])
+
+            rotations[joint_ind] = np.matmul(parent_rotation, local_rotation)
+            translations[joint_ind] = parent_translation + np.einsum(
+                '...ij,...j->...i', parent_rotation, local_translation)
+        return rotations, translations
+
+    def compute_link_transforms(self, joint_positions, link_inds=None):
+        """Compute the link frames of a batch of joint configurations.
+
+        Args:
+            joint_positions: A [B, D] array of the positions of the D movable
+                joints, or a single [D] configuration.
+            link_inds: The list of L link indices, all links if it is None.
+
+        Returns:
+            A float64 array of [B, L, 4, 4] transforms of the link frames in
+            the world, or [L, 4, 4] for a single configuration.
+        """
+        joint_positions, single = self._check_joint_positions(joint_positions)
+        if link_inds is None:
+            link_inds = range(self._num_joints)
+        link_inds = list(link_inds)
+
+        batch_size = joint_positions.shape[0]
+        rotations, translations = self._compute_frames(joint_positions)
+        transforms = np.zeros((batch_size, len(link_inds), 4, 4),
+                              dtype=np.float64)
+        for (i, link_ind) in enumerate(link_inds):
+            transforms[:, i, :3, :3] = rotations[link_ind]
+            transforms[:, i, :3, 3] = translations[link_ind]
+        transforms[:, :, 3, 3] = 1.0
+        if single:
+            return transforms[0]
+        return transforms
+
+    def compute_link_poses(self, joint_positions, link_inds=None):
+        """Compute the link poses of a batch of joint configurations.
+
+        Args:
+            joint_positions: A [B, D] array of the positions of the D movable
+                joints, or a single [D] configuration.
+            link_inds: The list of L link indices, all links if it is None.
+
+        Returns:
+            A float64 array of [B, L, 7] of [x, y, z, qx, qy, qz, qw] rows as
+            BulletPhysics.get_link_states, or [L, 7] for a single
+            configuration.
+        """
+        transforms = self.compute_link_transforms(joint_positions, link_inds)
+        poses = np.empty(transforms.shape[:-2] + (7,), dtype=np.float64)
+        poses[..., :3] = transforms[..., :3, 3]
+        poses[..., 3:] = quaternion_from_matrix3_batch(
+            transforms[..., :3, :3].reshape(-1, 3, 3)).reshape(
+                poses.shape[:-1] + (4,))
+        return poses
+
+    def _compute_jacobians(self, rotations, translations, link_ind,
+                           local_position, batch_size):
+        position = np.broadcast_to(translations[link_ind], (batch_size, 3))
+        if local_position is not None:
+            position = position + np.einsum(
+                '...ij,j->...i', rotations[link_ind], local_position)
+        jacobians = np.zeros(
+            (batch_size, 6, len(self._movable_joint_inds)), dtype=np.float64)
+        for joint_ind in self._chains[link_ind]:
+            column = self._columns[joint_ind]
+            # The axis is the same in the parent frame after the joint origin
+            # and in the child frame.
+            axis = np.einsum('bij,j->bi', rotations[joint_ind],
+                             self._axes[joint_ind])
+            if self._types[joint_ind] == 'prismatic':
+                jacobians[:, :3, column] = axis
+            else:
+                jacobians[:, :3, column] = np.cross(
+                    axis, position - translations[joint_ind])
+                jacobians[:, 3:, column] = axis
+        return position, jacobians
+
+    def compute_jacobians(self, joint_positions, link_ind,
+                          local_position=None):
+        """Compute the Jacobians of a point of a link.
+
+        These are the Jacobians of BulletPhysics.calculate_jacobian, without
+        setting the joints of the body.
+
+        Args:
+            joint_positions: A [B, D] array of the positions of the D movable
+                joints, or a single [D] configuration.
+            link_ind: The link index.
+            local_position: The position of the point in the link frame, the
+                origin of the link frame if it is None.
+
+        Returns:
+            A float64 array of [B, 6, D] of the translational Jacobians
+            stacked over the rotational Jacobians in the world frame, or
+            [6, D] for a single configuration.
+        """
+        joint_positions, single = self._check_joint_positions(joint_positions)
+        if local_position is not None:
+            local_position = np.asarray(local_position, dtype=np.float64)
+        rotations, translations = self._compute_frames(joint_positions,
+                                                       link_ind)
+        _, jacobians = self._compute_jacobians(
+            rotations, translations, link_ind, local_position,
+            joint_positions.shape[0])
+        if single:
+            return jacobians[0]
+        return jacobians
+
+    def compute_inverse_kinematics(self,
+                                   link_ind,
+                                   link_poses,
+                                   seed=None,
+                                   neutral_positions=None,
+                                   null_space_gain=0.2,
+                                   damping=0.05,
+                                   max_step=0.2,
+                                   max_iterations=100,
+                                   position_threshold=1e-4,
+                                   orientation_threshold=1e-3):
+        """Compute the inverse kinematics of many target poses of a link.
+
+        All targets are solved together by damped least squares: each
+        iteration moves the joints by J^T (J J^T + damping^2 I)^-1 e for the
+        pose error e, plus a step toward the neutral positions projected into
+        the null space of the Jacobian. The joints are clamped to their
+        limits after every iteration and the targets whose errors are below
+        the thresholds are not iterated any more.
+
+        Args:
+            link_ind: The link index.
+            link_poses: The N target poses of the link frame, a PoseArray or
+                anything accepted by it.
+            seed: The [D] or [N, D] positions of the movable joints the
+                solves start from, the neutral positions if it is None.
+            neutral_positions: The [D] positions of the movable joints the
+                null space step pulls toward, no null space step if it is
+                None.
+            null_space_gain: The fraction of the distance to the neutral
+                positions covered by each null space step.
+            damping: The damping of the least squares.
+            max_step: The maximal change of a joint in one iteration.
+            max_iterations: The maximal number of iterations.
+            position_threshold: The position error in meters that ends a
+                solve, together with the orientation threshold.
+            orientation_threshold: The orientation error in radians that
+                ends a solve.
+
+        Returns:
+            A float64 numpy array of [N, D] of the positions of the D movable
+            joints, and a float64 numpy array of [N, 2] of the position error
+            in meters and the orientation error in radians of each solution,
+            as BulletPhysics.compute_inverse_kinematics_batch.
+        """
+        link_poses = PoseArray(link_poses)
+        num_poses = len(link_poses)
+        num_movable = len(self._movable_joint_inds)
+        target_positions = np.asarray(link_poses.position, dtype=np.float64)
+        target_rotations = matrix3_from_quaternion_batch(
+            np.asarray(link_poses.quaternion, dtype=np.float64))
+        lower_limits = self.lower_limits
+        upper_limits = self.upper_limits
+
+        if neutral_positions is not None:
+            neutral_positions = np.asarray(neutral_positions,
+                                           dtype=np.float64)
+        if seed is None:
+            seed = (neutral_positions if neutral_positions is not None
+                    else np.zeros(num_movable))
+        joint_positions = np.clip(np.broadcast_to(
+            np.asarray(seed, dtype=np.float64), (num_poses, num_movable)),
+            lower_limits, upper_limits)
+        residuals = np.empty((num_poses, 2), dtype=np.float64)
+        damping_matrix = damping ** 2 * np.eye(6)
+        projection_damping_matrix = 1e-6 * np.eye(6)
+
+        active = np.arange(num_poses)
+        for iteration in range(max_iterations + 1):
+            positions = joint_positions[active]
+            rotations, translations = self._compute_frames(positions,
+                                                           link_ind)
+            reached, jacobians = self._compute_jacobians(
+                rotations, translations, link_ind, None, len(active))
+            errors = np.empty((len(active), 6), dtype=np.float64)
+            errors[:, :3] = target_positions[active] - reached
+            errors[:, 3:] = _rotation_vectors(np.matmul(
+                target_rotations[active],
+                np.swapaxes(np.broadcast_to(rotations[link_ind],
+                                            (len(active), 3, 3)), 1, 2)))
+            residuals[active, 0] = np.linalg.norm(errors[:, :3], axis=1)
+            residuals[active, 1] = np.linalg.norm(errors[:, 3:], axis=1)
+
+            unsolved = ((residuals[active, 0] > position_threshold) |
+                        (residuals[active, 1] > orientation_threshold))
+            if iteration == max_iterations or not np.any(unsolved):
+                break
+            active = active[unsolved]
+            positions = positions[unsolved]
+            jacobians = jacobians[unsolved]
+            errors = errors[unsolved]
+
+            jacobians_t = np.swapaxes(jacobians, 1, 2)
+            gram = np.matmul(jacobians, jacobians_t)
+            steps = np.einsum('bij,bj->bi', jacobians_t, np.linalg.solve(
+                gram + damping_matrix, errors[..., np.newaxis])[..., 0])
+            if neutral_positions is not None:
+                # The damped pseudo-inverse would leak the bias into the
+                # task space, so the projection is almost undamped.
+                bias = null_space_gain * (neutral_positions - positions)
+                steps += bias - np.einsum(
+                    'bij,bj->bi', jacobians_t, np.linalg.solve(
+                        gram + projection_damping_matrix,
+                        np.einsum('bij,bj->bi', jacobians, bias)[
+                            ..., np.newaxis])[..., 0])
+            scales = np.abs(steps).max(axis=1) / max_step
+            steps /= np.maximum(scales, 1.0)[:, np.newaxis]
+            joint_positions[active] = np.clip(positions + steps,
+                                              lower_limits, upper_limits)
+
+        return joint_positions, residuals
+
+
+def _rotation_vectors(rotations):
+    """The [B, 3] rotation vectors of [B, 3, 3] rotation matrices."""
+    # The quaternions have a non-negative w, so the angles are within pi.
+    quaternions = quaternion_from_matrix3_batch(rotations)
+    sines = np.linalg.norm(quaternions[:, :3], axis=1)
+    angles = 2.0 * np.arctan2(sines, quaternions[:, 3])
+    # angle / sin(angle / 2) tends to 2 for small angles.
+    scales = np.where(sines > 1e-9, angles / np.maximum(sines, 1e-9), 2.0)
+    return quaternions[:, :3] * scales[:, np.newaxis]
@@ -1,6 +1,9 @@
 from bullet_world.math_utils.euler import Euler
 from bullet_world.math_utils.orientation import Orientation
+from bullet_world.math_utils.orientation_array import OrientationArray
 from bullet_world.math_utils.point import Point
 from bullet_world.math_utils.pose import get_transform
 from bullet_world.math_utils.pose import Pose
+from bullet_world.math_utils.pose_array import interpolate_poses
+from bullet_world.math_utils.pose_array import PoseArray
 from bullet_world.math_utils.quaternion import Quaternion
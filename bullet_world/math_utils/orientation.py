@@ -5,8 +5,6 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from copy import deepcopy
-
 import numpy as np
 
 from bullet_world.transformations import euler_from_matrix3
@@ -15,8 +13,23 @@ from bullet_world.math_utils.euler import Euler
 from bullet_world.math_utils.quaternion import Quaternion
 
 
+def _freeze(array):
+    """Mark a cached representation as read-only and return it."""
+    array.flags.writeable = False
+    return array
+
+
 class Orientation(object):
-    """3D orientation."""
+    """3D orientation.
+
+    The representation given at construction (or through a setter) is kept as
+    the canonical one. The other representations are computed on first access
+    and memoized. Every cached array is read-only so that they can be shared
+    between copies; assign a new value through the euler, quaternion or
+    matrix3 setters, which drop the memoized conversions.
+    """
+
+    __slots__ = ('_euler', '_quaternion', '_matrix3')
 
     def __init__(self, value):
         """Initialize the orientation.
@@ -26,33 +39,34 @@ class Orientation(object):
                 Orientation, an Euler angle(roll, pitch, yall), a quaternion(x,
                 y, z, w), or a 3x3 rotation matrix.
         """
+        self._assign(value)
+
+    def _assign(self, value):
+        """Replace the canonical representation and drop the cached ones."""
         self._euler = None
         self._quaternion = None
         self._matrix3 = None
 
         if value is None:
-            self._euler = None
-            self._quaternion = None
-            self._matrix3 = None
+            pass
         elif isinstance(value, Orientation):
-            if value.euler is not None:
-                self._euler = value.euler.copy()
-            if value.quaternion is not None:
-                self._quaternion = value.quaternion.copy()
-            if value.matrix3 is not None:
-                self._matrix3 = value.matrix3.copy()
+            # Cached arrays are read-only, so they are shared instead of
+            # converted or copied.
+            self._euler = value._euler
+            self._quaternion = value._quaternion
+            self._matrix3 = value._matrix3
         elif isinstance(value, Euler):
-            self._euler = value.copy()
+            self._euler = _freeze(value.copy())
         elif isinstance(value, Quaternion):
-            self._quaternion = value.copy()
+            self._quaternion = _freeze(value.copy())
         else:
             value = np.array(value, dtype=np.float32)
             if value.size == 3:
-                self._euler = Euler(value)
+                self._euler = _freeze(Euler(value))
             elif value.size == 4:
-                self._quaternion = Quaternion(value)
+                self._quaternion = _freeze(Quaternion(value))
             elif value.size == 9:
-                self._matrix3 = value.reshape([3, 3])
+                self._matrix3 = _freeze(value.reshape([3, 3]))
             else:
                 raise ValueError
 
@@ -63,20 +77,18 @@ class Orientation(object):
         """Copy the orientation.
 
         Returns:
-            A deep copy of the orientation.
+            A copy of the orientation, sharing the read-only cached arrays.
         """
-        return deepcopy(self)
+        return Orientation(self)
 
     @property
     def euler(self):
         if self._euler is not None:
             pass
         elif self._quaternion is not None:
-            self._euler = self.quaternion.euler
+            self._euler = _freeze(self._quaternion.euler)
         elif self._matrix3 is not None:
-            self._euler = Euler(euler_from_matrix3(self._matrix3))
-        else:
-            pass
+            self._euler = _freeze(Euler(euler_from_matrix3(self._matrix3)))
         return self._euler
 
     @property
@@ -84,11 +96,10 @@ class Orientation(object):
         if self._quaternion is not None:
             pass
         elif self._euler is not None:
-            self._quaternion = self.euler.quaternion
+            self._quaternion = _freeze(Quaternion(self._euler.quaternion))
         elif self._matrix3 is not None:
-            self._quaternion = quaternion_from_matrix3(self._matrix3)
-        else:
-            pass
+            self._quaternion = _freeze(
+                Quaternion(quaternion_from_matrix3(self._matrix3)))
         return self._quaternion
 
     @property
@@ -96,27 +107,23 @@ class Orientation(object):
         if self._matrix3 is not None:
             pass
         elif self._euler is not None:
-            self._matrix3 = self.euler.matrix3
+            self._matrix3 = _freeze(self._euler.matrix3)
         elif self._quaternion is not None:
-            self._matrix3 = self.quaternion.matrix3
-        else:
-            pass
+            self._matrix3 = _freeze(self._quaternion.matrix3)
         return self._matrix3
 
     @euler.setter
     def euler(self, value):
-        self._euler = value
-        self._quaternion = None
-        self._matrix3 = None
+        if not isinstance(value, Euler):
+            value = Euler(np.array(value, dtype=np.float32))
+        self._assign(value)
 
     @quaternion.setter
     def quaternion(self, value):
-        self._euler = None
-        self._quaternion = value
-        self._matrix3 = None
+        if not isinstance(value, Quaternion):
+            value = Quaternion(np.array(value, dtype=np.float32))
+        self._assign(value)
 
     @matrix3.setter
     def matrix3(self, value):
-        self._euler = None
-        self._quaternion = None
-        self._matrix3 = value
+        self._assign(np.array(value, dtype=np.float32).reshape([3, 3]))
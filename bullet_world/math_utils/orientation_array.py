@@ -0,0 +1,128 @@
+"""Define the class of a batch of 3D orientations.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+from bullet_world.transformations import euler_from_quaternion_batch
+from bullet_world.transformations import matrix3_from_quaternion_batch
+from bullet_world.transformations import quaternion_conjugate_batch
+from bullet_world.transformations import quaternion_from_euler_batch
+from bullet_world.transformations import quaternion_from_matrix3_batch
+from bullet_world.transformations import quaternion_multiply_batch
+from bullet_world.math_utils.orientation import Orientation
+
+
+class OrientationArray(object):
+    """A batch of 3D orientations stored as [N, 4] quaternions (x, y, z, w)."""
+
+    def __init__(self, value):
+        """Initialize the orientations.
+
+        Args:
+            value: The input orientations can be an instance of
+                OrientationArray, a list of Orientation instances, a [N, 4]
+                array of quaternions, a [N, 3] array of Euler angles or a
+                [N, 3, 3] array of rotation matrices.
+        """
+        if isinstance(value, OrientationArray):
+            quaternions = value.quaternion.copy()
+        elif isinstance(value, Orientation):
+            quaternions = np.array([value.quaternion], dtype=np.float64)
+        elif (isinstance(value, (list, tuple)) and len(value) > 0 and
+              isinstance(value[0], Orientation)):
+            quaternions = np.array([orientation.quaternion
+                                    for orientation in value],
+                                   dtype=np.float64)
+        else:
+            value = np.asarray(value, dtype=np.float64)
+            if value.ndim == 3 and value.shape[1:] == (3, 3):
+                quaternions = quaternion_from_matrix3_batch(value)
+            elif value.ndim == 2 and value.shape[1] == 4:
+                quaternions = value
+            elif value.ndim == 2 and value.shape[1] == 3:
+                quaternions = quaternion_from_euler_batch(value)
+            else:
+                raise ValueError(
+                    'Orientations of shape %r are not recognized.'
+                    % (value.shape,))
+
+        self._quaternion = np.ascontiguousarray(quaternions, dtype=np.float64)
+
+    def __len__(self):
+        return self._quaternion.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return Orientation(self._quaternion[index])
+        return OrientationArray(self._quaternion[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __str__(self):
+        return str(self.euler)
+
+    def copy(self):
+        """Copy the orientations.
+
+        Returns:
+            A deep copy of the orientations.
+        """
+        return OrientationArray(self)
+
+    @property
+    def quaternion(self):
+        return self._quaternion
+
+    @property
+    def euler(self):
+        return euler_from_quaternion_batch(self._quaternion)
+
+    @property
+    def matrix3(self):
+        return matrix3_from_quaternion_batch(self._quaternion)
+
+    def inverse(self):
+        """Get the inverse rotations.
+
+        Returns:
+            An instance of OrientationArray.
+        """
+        return OrientationArray(quaternion_conjugate_batch(self._quaternion))
+
+    def compose(self, orientations):
+        """Rotate orientations by this batch, i.e. R_self * R_other.
+
+        Args:
+            orientations: An instance of OrientationArray or anything it
+                accepts, with a length of N or 1.
+
+        Returns:
+            An instance of OrientationArray.
+        """
+        if not isinstance(orientations, OrientationArray):
+            orientations = OrientationArray(orientations)
+        return OrientationArray(quaternion_multiply_batch(
+            self._quaternion, orientations.quaternion))
+
+    def rotate(self, points):
+        """Rotate an array of 3D points.
+
+        The quaternions are assumed to be normalized.
+
+        Args:
+            points: A [N, 3], [1, 3] or [3] array of points.
+
+        Returns:
+            A [N, 3] array of the rotated points.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        u = self._quaternion[:, :3]
+        w = self._quaternion[:, 3:]
+        uv = np.cross(u, points)
+        return points + 2.0 * (w * uv + np.cross(u, uv))
@@ -5,8 +5,6 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from copy import deepcopy
-
 import numpy as np
 
 from bullet_world.math_utils.point import Point
@@ -16,6 +14,8 @@ from bullet_world.math_utils.orientation import Orientation
 class Pose(object):
     """3D Pose."""
 
+    __slots__ = ('_position', '_orientation')
+
     def __init__(self, value=[[0, 0, 0], [0, 0, 0]]):
         """Initialize the pose.
 
@@ -31,11 +31,12 @@ class Pose(object):
             self.orientation = value[1]
 
     def __str__(self):
+        euler = self.euler
         return '[position: %g, %g, %g, euler: %g, %g, %g]' % (
                 self.x, self.y, self.z,
-                (self.euler[0] + np.pi) % (2 * np.pi) - np.pi,
-                (self.euler[1] + 0.5 * np.pi) % np.pi - 0.5 * np.pi,
-                (self.euler[2] + np.pi) % (2 * np.pi) - np.pi)
+                (euler[0] + np.pi) % (2 * np.pi) - np.pi,
+                (euler[1] + 0.5 * np.pi) % np.pi - 0.5 * np.pi,
+                (euler[2] + np.pi) % (2 * np.pi) - np.pi)
 
     def __getitem__(self, index):
         if index == 0:
@@ -154,9 +155,7 @@ class Pose(object):
     @matrix4.setter
     def matrix4(self, value):
         self._position = Point(value[:3, 3])
-        self._euler = Orientation(value[:3, :3]).euler
-        self._quaternion = Orientation(value[:3, :3]).quaternion
-        self._matrix3 = Orientation(value[:3, :3]).matrix3
+        self._orientation = Orientation(value[:3, :3])
 
     def inverse(self):
         """Get the inverse rigid transformation of the pose.
@@ -167,8 +166,9 @@ class Pose(object):
         Returns:
             An instance of Pose.
         """
-        position = np.dot(-self.position, self.matrix3)
-        orientation = self.matrix3.T
+        matrix3 = self.matrix3
+        position = np.dot(-self.position, matrix3)
+        orientation = matrix3.T
         return Pose([position, orientation])
 
     def transform(self, pose):
@@ -183,18 +183,20 @@ class Pose(object):
         Returns:
             The corresponding pose defined in the target frame.
         """
-        pose = Pose(pose)
-        position = self.position + np.dot(pose.position, self.matrix3.T)
-        orientation = np.dot(self.matrix3, pose.matrix3)
+        if not isinstance(pose, Pose):
+            pose = Pose(pose)
+        matrix3 = self.matrix3
+        position = self.position + np.dot(pose.position, matrix3.T)
+        orientation = np.dot(matrix3, pose.matrix3)
         return Pose([position, orientation])
 
     def copy(self):
         """Copy the pose.
 
         Returns:
-            A deep copy of the pose.
+            A copy of the pose. The read-only orientation caches are shared.
         """
-        return deepcopy(self)
+        return Pose([self._position.copy(), self._orientation])
 
     def to_array(self):
         """Convert to numpy array.
@@ -0,0 +1,245 @@
+"""Define the class of a batch of 3D poses.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+from bullet_world.transformations import quaternion_conjugate_batch
+from bullet_world.transformations import quaternion_multiply_batch
+from bullet_world.transformations import quaternion_slerp_trajectory
+from bullet_world.transformations import trajectory_segments
+from bullet_world.math_utils.orientation_array import OrientationArray
+from bullet_world.math_utils.pose import Pose
+
+
+class PoseArray(object):
+    """A batch of 3D poses.
+
+    The poses are stored as a contiguous [N, 3] array of positions and a
+    contiguous [N, 4] array of quaternions (x, y, z, w), so that a whole batch
+    is transformed with a few numpy calls instead of a Python loop over Pose
+    instances.
+    """
+
+    def __init__(self, value):
+        """Initialize the poses.
+
+        Args:
+            value: The input poses can be an instance of PoseArray, a Pose, a
+                list of Pose instances, a [N, 7] array of [x, y, z, qx, qy,
+                qz, qw] rows (e.g. from BulletPhysics.get_link_states), a [N,
+                4, 4] array of transform matrices, or a pair of [N, 3]
+                positions and orientations accepted by OrientationArray.
+        """
+        if isinstance(value, PoseArray):
+            position = value.position.copy()
+            quaternion = value.quaternion.copy()
+        elif isinstance(value, Pose):
+            position = np.array([value.position], dtype=np.float64)
+            quaternion = np.array([value.quaternion], dtype=np.float64)
+        elif (isinstance(value, (list, tuple)) and len(value) > 0 and
+              isinstance(value[0], Pose)):
+            position = np.array([pose.position for pose in value],
+                                dtype=np.float64)
+            quaternion = np.array([pose.quaternion for pose in value],
+                                  dtype=np.float64)
+        elif (isinstance(value, (list, tuple)) and len(value) == 2 and
+              _is_position_batch(value[0])):
+            position = value[0]
+            quaternion = OrientationArray(value[1]).quaternion
+        else:
+            try:
+                value = np.asarray(value, dtype=np.float64)
+            except ValueError:
+                raise ValueError('Poses of shape %r are not recognized.'
+                                 % (_get_shape(value),))
+            if value.ndim == 3 and value.shape[1:] == (4, 4):
+                position = value[:, :3, 3]
+                quaternion = OrientationArray(value[:, :3, :3]).quaternion
+            elif value.ndim == 2 and value.shape[1] >= 7:
+                position = value[:, :3]
+                quaternion = value[:, 3:7]
+            else:
+                raise ValueError(
+                    'Poses of shape %r are not recognized.' % (value.shape,))
+
+        self._position = np.ascontiguousarray(position, dtype=np.float64)
+        self._quaternion = np.ascontiguousarray(quaternion, dtype=np.float64)
+        assert self._position.shape == (self._quaternion.shape[0], 3)
+
+    def __len__(self):
+        return self._position.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return Pose([self._position[index], self._quaternion[index]])
+        return PoseArray([self._position[index], self._quaternion[index]])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __str__(self):
+        return '\n'.join(str(pose) for pose in self)
+
+    @property
+    def position(self):
+        return self._position
+
+    @property
+    def quaternion(self):
+        return self._quaternion
+
+    @property
+    def orientation(self):
+        return OrientationArray(self._quaternion)
+
+    @property
+    def euler(self):
+        return self.orientation.euler
+
+    @property
+    def matrix3(self):
+        return self.orientation.matrix3
+
+    @property
+    def matrix4(self):
+        return self.to_matrix4()
+
+    def copy(self):
+        """Copy the poses.
+
+        Returns:
+            A deep copy of the poses.
+        """
+        return PoseArray(self)
+
+    def inverse(self):
+        """Get the inverse rigid transformations of the poses.
+
+        Returns:
+            An instance of PoseArray.
+        """
+        orientation = OrientationArray(
+            quaternion_conjugate_batch(self._quaternion))
+        position = -orientation.rotate(self._position)
+        return PoseArray([position, orientation.quaternion])
+
+    def compose(self, poses):
+        """Compose the rigid transformations, i.e. T_self * T_poses.
+
+        Either side can hold a single pose, which is broadcast to the other.
+
+        Args:
+            poses: An instance of PoseArray, a Pose or anything accepted by
+                PoseArray.
+
+        Returns:
+            An instance of PoseArray.
+        """
+        if not isinstance(poses, PoseArray):
+            poses = PoseArray(poses)
+        position = self._position + self.orientation.rotate(poses.position)
+        quaternion = quaternion_multiply_batch(self._quaternion,
+                                               poses.quaternion)
+        return PoseArray([position, quaternion])
+
+    def transform(self, poses):
+        """Rigid transformation from the frames of this batch to the world.
+
+        Same as Pose.transform applied to each pose, see compose.
+
+        Args:
+            poses: The poses defined in the source frames.
+
+        Returns:
+            An instance of PoseArray of the poses in the target frame.
+        """
+        return self.compose(poses)
+
+    def transform_points(self, points):
+        """Transform an array of 3D points by the poses.
+
+        Args:
+            points: A [N, 3], [1, 3] or [3] array of points.
+
+        Returns:
+            A [N, 3] array of points.
+        """
+        return self._position + self.orientation.rotate(points)
+
+    def to_matrix4(self):
+        """Convert to transform matrices.
+
+        Returns:
+            A float64 numpy array of [N, 4, 4].
+        """
+        matrix4 = np.zeros((len(self), 4, 4), dtype=np.float64)
+        matrix4[:, :3, :3] = self.matrix3
+        matrix4[:, :3, 3] = self._position
+        matrix4[:, 3, 3] = 1.0
+        return matrix4
+
+    def to_array(self):
+        """Convert to numpy array.
+
+        Returns:
+            A float64 numpy array of [N, 7] rows of [x, y, z, qx, qy, qz, qw].
+        """
+        return np.concatenate([self._position, self._quaternion], axis=1)
+
+    def to_poses(self):
+        """Convert to a list of Pose instances.
+
+        Returns:
+            A list of Pose.
+        """
+        return list(self)
+
+
+def interpolate_poses(poses, times, query_times):
+    """Interpolate a trajectory of key poses at the query times.
+
+    The positions are interpolated linearly and the orientations with slerp,
+    following the shortest path between consecutive keys. Query times outside
+    of the key times are clipped.
+
+    Args:
+        poses: The N key poses, as an instance of PoseArray or anything it
+            accepts.
+        times: The [N] increasing times of the key poses.
+        query_times: The [M] times to interpolate at.
+
+    Returns:
+        An instance of PoseArray of length M.
+    """
+    if not isinstance(poses, PoseArray):
+        poses = PoseArray(poses)
+    times = np.asarray(times, dtype=np.float64)
+    query_times = np.asarray(query_times, dtype=np.float64)
+    assert times.shape == (len(poses),)
+
+    inds, fractions = trajectory_segments(times, query_times)
+    next_inds = np.minimum(inds + 1, len(poses) - 1)
+    position = poses.position[inds] + fractions[:, None] * (
+        poses.position[next_inds] - poses.position[inds])
+    quaternion = quaternion_slerp_trajectory(poses.quaternion, times,
+                                             query_times)
+    return PoseArray([position, quaternion])
+
+
+def _get_shape(value):
+    """The shape of an array-like, None for a ragged dimension."""
+    try:
+        return np.shape(value)
+    except ValueError:
+        return (len(value), None)
+
+
+def _is_position_batch(value):
+    """Whether the value is a [N, 3] array-like of positions."""
+    shape = _get_shape(value)
+    return len(shape) == 2 and shape[-1] == 3
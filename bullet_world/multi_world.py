@@ -0,0 +1,239 @@
+"""Several BulletWorld instances stepped in the same process."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bullet_world.bullet_physics import JOINT_STATE_DTYPE
+from bullet_world.bullet_world import BulletWorld
+
+
+class MultiWorld(object):
+    """K headless BulletWorld instances in one process.
+
+    Each world holds its own DIRECT pybullet client, so they can be created
+    side by side without any inter-process communication. This beats
+    VectorBulletWorld for small scenes, where pickling the commands costs
+    more than the physics itself.
+
+    The worlds are stepped one after the other by default. With num_threads
+    they are stepped by a thread pool instead, which only helps as much as
+    pybullet releases the GIL.
+
+    The batched getters assume that every world holds the same bodies, e.g.
+    they were built by the same world_class, so that the body unique IDs and
+    link/joint indices refer to the same entities in every world.
+
+    Args:
+        num_worlds (int): The number of worlds.
+        world_class (class): A subclass of BulletWorld.
+        world_kwargs (dict): The arguments of world_class. use_visualizer and
+            worker_id are filled in for each world.
+        num_threads (int): The number of threads to step the worlds, the
+            worlds are stepped round-robin if it is None or 0.
+    """
+
+    def __init__(self,
+                 num_worlds,
+                 world_class=BulletWorld,
+                 world_kwargs=None,
+                 num_threads=None):
+        world_kwargs = dict(world_kwargs or {})
+        world_kwargs['use_visualizer'] = False
+
+        self._worlds = []
+        for index in range(num_worlds):
+            kwargs = dict(world_kwargs)
+            kwargs['worker_id'] = index
+            self._worlds.append(world_class(**kwargs))
+
+        if num_threads:
+            self._executor = ThreadPoolExecutor(max_workers=num_threads)
+        else:
+            self._executor = None
+
+    @property
+    def worlds(self):
+        return self._worlds
+
+    @property
+    def num_worlds(self):
+        return len(self._worlds)
+
+    def __len__(self):
+        return len(self._worlds)
+
+    def __getitem__(self, index):
+        return self._worlds[index]
+
+    def __iter__(self):
+        return iter(self._worlds)
+
+    def _map(self, func, *iterables):
+        """Apply func to every world, in the thread pool if there is one."""
+        if self._executor is None:
+            return [func(*args) for args in zip(self._worlds, *iterables)]
+        return list(self._executor.map(func, self._worlds, *iterables))
+
+    def step(self, actions=None, num_steps=1):
+        """Step every world.
+
+        Args:
+            actions: A [K, action_size] array applied with
+                BulletWorld.apply_action before the steps, or None to step
+                without actions.
+            num_steps: The number of simulation steps.
+        """
+        def step_world(world, action=None):
+            if action is not None:
+                world.apply_action(action)
+            world.step_simulation(num_steps)
+
+        if actions is None:
+            self._map(step_world)
+        else:
+            self._map(step_world, actions)
+
+    def reset(self, mask=None):
+        """Reset the worlds.
+
+        Args:
+            mask: A boolean array of [K] selecting the worlds to reset, all
+                worlds are reset if it is None.
+
+        Returns:
+            A [K, observation_size] float64 array of observations of all
+            worlds.
+        """
+        if mask is None:
+            mask = np.ones(len(self._worlds), dtype=bool)
+
+        def reset_world(world, selected):
+            if selected:
+                world.reset()
+
+        self._map(reset_world, mask)
+        return self.get_observations()
+
+    def save_snapshots(self):
+        """Save the state of every world.
+
+        Returns:
+            The list of the snapshot ids of every world.
+        """
+        return [world.save_snapshot() for world in self._worlds]
+
+    def reset_to(self, snapshot_ids, mask=None):
+        """Restore a snapshot in every world.
+
+        Args:
+            snapshot_ids: The list of [K] snapshot ids, one per world, or a
+                single id shared by all worlds.
+            mask: A boolean array of [K] selecting the worlds to restore, all
+                worlds are restored if it is None.
+
+        Returns:
+            A [K, observation_size] float64 array of observations of all
+            worlds.
+        """
+        snapshot_ids = np.broadcast_to(snapshot_ids, (len(self._worlds),))
+        if mask is None:
+            mask = np.ones(len(self._worlds), dtype=bool)
+
+        def reset_world(world, snapshot_id, selected):
+            if selected:
+                world.reset_to(int(snapshot_id))
+
+        self._map(reset_world, snapshot_ids, mask)
+        return self.get_observations()
+
+    def get_observations(self, out=None):
+        """Get the observations of all worlds.
+
+        Args:
+            out: A preallocated float64 array of [K, observation_size].
+
+        Returns:
+            A [K, observation_size] float64 array of observations.
+        """
+        if out is None:
+            out = np.empty((len(self._worlds),
+                            self._worlds[0].observation_size),
+                           dtype=np.float64)
+        for (index, world) in enumerate(self._worlds):
+            out[index] = world.get_observation()
+        return out
+
+    def get_joint_states(self, body_uid, joint_inds, out=None):
+        """Get the joint states of the same body in every world.
+
+        Args:
+            body_uid: The body unique ID.
+            joint_inds: The list of N joint indices.
+            out: A preallocated array of [K, N] of JOINT_STATE_DTYPE.
+
+        Returns:
+            A structured numpy array of [K, N] of JOINT_STATE_DTYPE.
+        """
+        if out is None:
+            out = np.empty((len(self._worlds), len(joint_inds)),
+                           dtype=JOINT_STATE_DTYPE)
+        for (index, world) in enumerate(self._worlds):
+            world.physics.get_joint_states(body_uid, joint_inds,
+                                           out=out[index])
+        return out
+
+    def get_link_states(self, body_uid, link_inds, out=None, **kwargs):
+        """Get the link states of the same body in every world.
+
+        Args:
+            body_uid: The body unique ID.
+            link_inds: The list of N link indices.
+            out: A preallocated float64 array of [K, N, 7], or [K, N, 13]
+                with velocities.
+            kwargs: Extra arguments of BulletPhysics.get_link_states.
+
+        Returns:
+            A float64 array of [K, N, 7], or [K, N, 13] with velocities.
+        """
+        for (index, world) in enumerate(self._worlds):
+            if out is None:
+                states = world.physics.get_link_states(
+                    body_uid, link_inds, **kwargs)
+                out = np.empty((len(self._worlds),) + states.shape,
+                               dtype=np.float64)
+                out[index] = states
+            else:
+                world.physics.get_link_states(
+                    body_uid, link_inds, out=out[index], **kwargs)
+        return out
+
+    def get_body_poses(self, body_uids, out=None):
+        """Get the base poses of the same bodies in every world.
+
+        Args:
+            body_uids: The list of M body unique IDs.
+            out: A preallocated float64 array of [K, M, 7].
+
+        Returns:
+            A float64 array of [K, M, 7] of [x, y, z, qx, qy, qz, qw] rows.
+        """
+        if out is None:
+            out = np.empty((len(self._worlds), len(body_uids), 7),
+                           dtype=np.float64)
+        for (index, world) in enumerate(self._worlds):
+            world.physics.get_body_states(body_uids, out=out[index])
+        return out
+
+    def close(self):
+        """Shut down the thread pool and disconnect the worlds."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for world in self._worlds:
+            world.physics.disconnect()
+        self._worlds = []
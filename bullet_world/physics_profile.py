@@ -0,0 +1,118 @@
+"""Physics engine parameter profiles.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import six
+
+from bullet_world.utils import YamlConfig
+
+
+# The parameters of a profile and the matching keyword arguments of
+# pybullet.setPhysicsEngineParameter.
+ENGINE_PARAMETERS = {
+    'num_solver_iterations': 'numSolverIterations',
+    'solver_residual_threshold': 'solverResidualThreshold',
+    'erp': 'erp',
+    'contact_erp': 'contactERP',
+    'friction_erp': 'frictionERP',
+    'global_cfm': 'globalCFM',
+    'contact_slop': 'contactSlop',
+    'contact_breaking_threshold': 'contactBreakingThreshold',
+    'enable_cone_friction': 'enableConeFriction',
+    'deterministic_overlapping_pairs': 'deterministicOverlappingPairs',
+    'use_split_impulse': 'useSplitImpulse',
+    'split_impulse_penetration_threshold': 'splitImpulsePenetrationThreshold',
+    'restitution_velocity_threshold': 'restitutionVelocityThreshold',
+    'num_non_contact_inner_iterations': 'numNonContactInnerIterations',
+}
+
+PROFILES_CONFIG = os.path.join(os.path.dirname(__file__),
+                               'configs/physics_profiles.yaml')
+
+
+class PhysicsProfile(object):
+    """A set of physics engine parameters that trades accuracy for speed.
+
+    The named profiles 'fast', 'balanced' and 'accurate' are defined in
+    configs/physics_profiles.yaml. The parameters that are not given keep
+    the pybullet defaults.
+
+    Args:
+        name (str): The name of the profile.
+        **parameters: The engine parameters, see ENGINE_PARAMETERS.
+    """
+    def __init__(self, name='custom', **parameters):
+        for key in parameters:
+            if key not in ENGINE_PARAMETERS:
+                raise ValueError('Unrecognized engine parameter %r.' % (key,))
+        self.name = name
+        self.parameters = parameters
+
+    def __repr__(self):
+        return 'PhysicsProfile(%r, %r)' % (self.name, self.parameters)
+
+    @property
+    def engine_parameters(self):
+        """The keyword arguments of pybullet.setPhysicsEngineParameter."""
+        return {ENGINE_PARAMETERS[key]: value
+                for (key, value) in self.parameters.items()}
+
+    @classmethod
+    def from_config(cls, config, name='custom'):
+        """Create a profile from a configuration dictionary.
+
+        The keys are the engine parameters, in upper or lower case as in the
+        YAML files. The optional BASE key names a profile whose parameters
+        are extended by the others.
+
+        Args:
+            config (dict): The configuration.
+            name (str): The name of the profile.
+
+        Returns:
+            An instance of PhysicsProfile.
+        """
+        parameters = {}
+        for (key, value) in config.items():
+            key = key.lower()
+            if key == 'base':
+                parameters.update(cls.get(value).parameters)
+            else:
+                parameters[key] = value
+        return cls(name, **parameters)
+
+    @classmethod
+    def get(cls, profile):
+        """Resolve a profile.
+
+        Args:
+            profile: An instance of PhysicsProfile, the name of a profile in
+                configs/physics_profiles.yaml, the path of a YAML file of a
+                profile, or a configuration dictionary of from_config.
+
+        Returns:
+            An instance of PhysicsProfile.
+        """
+        if isinstance(profile, PhysicsProfile):
+            return profile
+        elif isinstance(profile, dict):
+            return cls.from_config(profile)
+        elif isinstance(profile, six.string_types):
+            if os.path.splitext(profile)[1] in ('.yaml', '.yml'):
+                config = YamlConfig(profile).config
+                return cls.from_config(
+                    config, name=os.path.splitext(os.path.basename(profile))[0])
+            configs = YamlConfig(PROFILES_CONFIG).config
+            if profile.upper() not in configs:
+                raise ValueError('Unrecognized physics profile %r, expected '
+                                 'one of %r.' % (profile, [
+                                     key.lower() for key in configs]))
+            return cls.from_config(configs[profile.upper()],
+                                   name=profile.lower())
+        else:
+            raise TypeError('Unrecognized physics profile %r.' % (profile,))
@@ -0,0 +1,268 @@
+"""Opt-in call profiler of BulletPhysics.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import csv
+import functools
+import glob
+import json
+import math
+import re
+import time
+
+import pybullet
+
+
+# Latency histogram bin k counts the calls of [2^(k-1), 2^k) microseconds,
+# bin 0 the calls under 1 us and the last bin everything above.
+NUM_HISTOGRAM_BINS = 24
+HISTOGRAM_EDGES_US = [2.0 ** k for k in range(NUM_HISTOGRAM_BINS)]
+
+SUMMARY_FIELDS = ('name', 'count', 'total_s', 'mean_us', 'min_us', 'max_us',
+                  'p50_us', 'p90_us', 'p99_us')
+
+
+class CallStats(object):
+    """Count, cumulative time and latency histogram of one call site."""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.histogram = [0] * NUM_HISTOGRAM_BINS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        _, exponent = math.frexp(seconds * 1e6)
+        self.histogram[min(max(exponent, 0), NUM_HISTOGRAM_BINS - 1)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the latency percentile in microseconds."""
+        threshold = fraction * self.count
+        cumulative = 0
+        for (k, count) in enumerate(self.histogram):
+            cumulative += count
+            if cumulative >= threshold:
+                return min(HISTOGRAM_EDGES_US[k], self.max * 1e6)
+        return self.max * 1e6
+
+    def summary(self, name):
+        return {
+            'name': name,
+            'count': self.count,
+            'total_s': self.total,
+            'mean_us': self.total / self.count * 1e6 if self.count else 0.0,
+            'min_us': self.min * 1e6 if self.count else 0.0,
+            'max_us': self.max * 1e6,
+            'p50_us': self.percentile(0.5),
+            'p90_us': self.percentile(0.9),
+            'p99_us': self.percentile(0.99),
+        }
+
+
+class _Section(object):
+    """Context manager timing a block into a CallStats."""
+
+    __slots__ = ('_stats', '_start')
+
+    def __init__(self, stats):
+        self._stats = stats
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stats.add(time.perf_counter() - self._start)
+        return False
+
+
+class _NullSection(object):
+    """Context manager doing nothing, used while the profiler is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SECTION = _NullSection()
+
+
+class Profiler(object):
+    """Per-call counts, cumulative times and latency histograms.
+
+    The profiler wraps the public methods of an object with instance
+    attributes, so the object is only slowed down while it is wrapped; once
+    unwrapped the class methods are called directly again. The times of
+    nested calls are inclusive, e.g. the time of set_body_poses includes the
+    time of the set_body_pose calls it makes.
+
+    Blocks of code that are not methods are timed with section:
+
+        with profiler.section('render'):
+            ...
+    """
+    def __init__(self):
+        self._stats = {}
+        self._wrapped = []
+        self._engine_stats = {}
+        self._start_time = time.time()
+
+    def get_stats(self, name):
+        """Get the CallStats of a call site, created on first use."""
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = CallStats()
+            self._stats[name] = stats
+        return stats
+
+    def section(self, name):
+        """Time a block of code as the call site name."""
+        return _Section(self.get_stats(name))
+
+    def reset(self):
+        """Drop the recorded statistics."""
+        # The wrappers hold their CallStats, which are cleared in place.
+        for stats in self._stats.values():
+            stats.__init__()
+        self._engine_stats = {}
+        self._start_time = time.time()
+
+    def wrap(self, obj, prefix='', exclude=()):
+        """Time every call of the public methods of an object.
+
+        Args:
+            obj: The object, e.g. a BulletPhysics instance.
+            prefix: The prefix of the call site names.
+            exclude: The names of the methods to leave alone.
+        """
+        names = []
+        for name in dir(type(obj)):
+            if (name.startswith('_') or name in exclude or
+                    name in obj.__dict__):
+                continue
+            if not callable(getattr(type(obj), name)):
+                continue
+            obj.__dict__[name] = self._make_wrapper(
+                getattr(obj, name), self.get_stats(prefix + name))
+            names.append(name)
+        self._wrapped.append((obj, names, prefix))
+
+    def unwrap(self):
+        """Restore the methods of all wrapped objects."""
+        for (obj, names, _) in self._wrapped:
+            for name in names:
+                obj.__dict__.pop(name, None)
+        self._wrapped = []
+
+    @staticmethod
+    def _make_wrapper(func, stats):
+        timer = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.add(timer() - start)
+
+        return wrapper
+
+    def load_engine_timings(self, filename):
+        """Read the timings of pybullet STATE_LOGGING_PROFILE_TIMINGS logs.
+
+        pybullet writes the log to filename_<k>.json in the Chrome trace
+        format. The timer names carry a running counter, which is dropped so
+        that all calls of the same timer are summed.
+
+        Args:
+            filename: The file name given to startStateLogging.
+        """
+        for path in sorted(glob.glob(filename + '_*.json')):
+            with open(path) as f:
+                events = json.load(f)['traceEvents']
+            # Begin timestamps per thread, in microseconds.
+            stacks = {}
+            for event in events:
+                stack = stacks.setdefault(event['tid'], [])
+                if event['ph'] == 'B':
+                    stack.append(event['ts'])
+                elif event['ph'] == 'E' and stack:
+                    name = re.sub(r'\d+$', '', event['name'])
+                    stats = self._engine_stats.get(name)
+                    if stats is None:
+                        stats = CallStats()
+                        self._engine_stats[name] = stats
+                    stats.add((event['ts'] - stack.pop()) * 1e-6)
+
+    def summary(self):
+        """Summarize the statistics.
+
+        Returns:
+            A dictionary of the pybullet API version, the wall-clock time
+            since the profiler was created or reset, the histogram bin edges
+            and the lists of the statistics of the calls and of the pybullet
+            engine timers, sorted by decreasing cumulative time.
+        """
+        def rows(all_stats):
+            return sorted((stats.summary(name)
+                           for (name, stats) in all_stats.items()
+                           if stats.count > 0),
+                          key=lambda row: -row['total_s'])
+
+        return {
+            'api_version': pybullet.getAPIVersion(),
+            'wall_time_s': time.time() - self._start_time,
+            'histogram_edges_us': HISTOGRAM_EDGES_US,
+            'calls': rows(self._stats),
+            'histograms': dict((name, stats.histogram)
+                               for (name, stats) in self._stats.items()
+                               if stats.count > 0),
+            'engine': rows(self._engine_stats),
+        }
+
+    def dump(self, path):
+        """Write the summary to a .json file, or a .csv file of the calls.
+
+        Args:
+            path: The output path, the format follows the extension.
+        """
+        summary = self.summary()
+        if path.endswith('.csv'):
+            with open(path, 'w') as f:
+                writer = csv.DictWriter(f, fieldnames=('source',) +
+                                        SUMMARY_FIELDS)
+                writer.writeheader()
+                for (source, key) in (('call', 'calls'), ('engine', 'engine')):
+                    for row in summary[key]:
+                        row = dict(row)
+                        row['source'] = source
+                        writer.writerow(row)
+        else:
+            with open(path, 'w') as f:
+                json.dump(summary, f, indent=2)
+
+    def __str__(self):
+        lines = ['%-36s %8s %10s %10s %10s' % (
+            'name', 'count', 'total_s', 'mean_us', 'p99_us')]
+        for row in self.summary()['calls']:
+            lines.append('%-36s %8d %10.4f %10.2f %10.2f' % (
+                row['name'], row['count'], row['total_s'], row['mean_us'],
+                row['p99_us']))
+        return '\n'.join(lines)
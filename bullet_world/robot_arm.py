@@ -1,6 +1,7 @@
 import abc
 from bullet_world.utils import YamlConfig
 from bullet_world.math_utils import Pose
+from bullet_world.kinematics import ForwardKinematics
 
 class RobotArm():
     """This is just a wrapper to get access to joints / links easily.
@@ -15,6 +16,7 @@ class RobotArm():
         # interfaces
         self.interfaces = interfaces
         self.phyiscs = bworld.physics
+        self.physics = bworld.physics
         
         # Specify ee link name
         self.ee_link_name = self.config.EE_NAME
@@ -39,75 +41,209 @@ class RobotArm():
         self._arm_joint_names = self.config.ARM.JOINT_NAMES
 
         # name -> (body_uid, joint_ind)
+        body_info = bworld.physics.get_body_info(self.uid)
         self._arm_joint_mapping = {}
         self._arm_joints = []
-        for joint in self._joints:
-            name = bworld.physics.get_joint_name(joint)
-            if name in self._arm_joint_names:
-                self._arm_joint_mapping[name] = joint
-                self._arm_joints.append(joint)
+        for name in self._arm_joint_names:
+            joint = (self.uid, body_info.joint_name_to_index[name])
+            self._arm_joint_mapping[name] = joint
+            self._arm_joints.append(joint)
 
         neutral_positions = self.init_joint_positions
         for (i, joint_uid) in enumerate(self.arm_joints):
             print(i)
             self.interfaces.joints.set_position(joint_uid, neutral_positions[i])
 
-        self.ee_link = None
-        for link in self._links:
-            name = bworld.physics.get_link_name(link)
-            if name == self.ee_link_name:
-                self.ee_link = link
-                break
-        assert(self.ee_link is not None, "link name not found")
+        assert self.ee_link_name in body_info.link_name_to_index, "link name not found"
+        self.ee_link = (self.uid, body_info.link_name_to_index[self.ee_link_name])
+
+        # Built on first use, see the kinematics property.
+        self._kinematics = None
 
         self.position_control_param = {"position_gain": None,
                                        "velocity_gain": None}
+        self.arm_controller = bworld.physics.create_joint_controller(
+            self.uid, [joint_ind for (_, joint_ind) in self._arm_joints],
+            control_mode='position')
+        self.controller = None
     # def motion_plan(self, plan_seq, type="pose"):
 
     def compute_ik_joints(self, pose):
         target_joints = self.interfaces.links.ik_joints(self.ee_link, pose)
         return target_joints
 
+    def compute_ik_joints_batch(self, poses, **kwargs):
+        """Compute the joint positions of many end effector poses.
+
+        See BulletPhysics.compute_inverse_kinematics_batch, the neutral joint
+        positions of the arm are used as the rest poses.
+
+        Returns:
+            A [N, D] array of the positions of the movable joints and a
+            [N, 2] array of the position and orientation errors, or None if
+            compute_residuals is not set.
+        """
+        kwargs.setdefault('neutral_positions', self._neutral_movable_positions())
+        return self.physics.compute_inverse_kinematics_batch(
+            self.ee_link, poses, **kwargs)
+
+    def compute_ik_joints_dls(self, poses, **kwargs):
+        """Compute the joint positions of many end effector poses in NumPy.
+
+        See ForwardKinematics.compute_inverse_kinematics, the solves start
+        from the current joint positions and the null space step pulls
+        toward the neutral joint positions of the arm.
+
+        Returns:
+            A [N, D] array of the positions of the movable joints and a
+            [N, 2] array of the position and orientation errors.
+        """
+        if 'seed' not in kwargs:
+            body_info = self.physics.get_body_info(self.uid)
+            kwargs['seed'] = self.physics.get_joint_states(
+                self.uid, body_info.movable_joint_inds)['position'].copy()
+        kwargs.setdefault('neutral_positions',
+                          self._neutral_movable_positions())
+        return self.kinematics.compute_inverse_kinematics(
+            self.ee_link[1], poses, **kwargs)
+
+    def compute_fk_jacobians(self, joint_positions):
+        """Compute the end effector Jacobians of many joint configurations.
+
+        Args:
+            joint_positions: A [N, D] array of the positions of the movable
+                joints.
+
+        Returns:
+            A [N, 6, D] array of the translational Jacobians stacked over the
+            rotational Jacobians, as zero_coupled_jacobian.
+        """
+        return self.kinematics.compute_jacobians(joint_positions,
+                                                 self.ee_link[1])
+
+    def compute_fk_ee_poses(self, joint_positions):
+        """Compute the end effector poses of many joint configurations.
+
+        The poses are computed by self.kinematics without changing the
+        simulation.
+
+        Args:
+            joint_positions: A [N, D] array of the positions of the movable
+                joints.
+
+        Returns:
+            A [N, 7] array of [x, y, z, qx, qy, qz, qw] rows.
+        """
+        return self.kinematics.compute_link_poses(
+            joint_positions, link_inds=[self.ee_link[1]])[..., 0, :]
+
+    def _neutral_movable_positions(self):
+        """The neutral positions of the arm joints among the movable joints."""
+        body_info = self.physics.get_body_info(self.uid)
+        positions = self.physics.get_joint_states(
+            self.uid, body_info.movable_joint_inds)['position'].copy()
+        for (i, (_, joint_ind)) in enumerate(self.arm_joints):
+            positions[body_info.movable_joint_inds.tolist().index(
+                joint_ind)] = self.init_joint_positions[i]
+        return positions.tolist()
+
     def set_position_control_param(self,
                                    position_gain,
                                    velocity_gain):
         self.position_control_param["position_gain"] = position_gain
         self.position_control_param["velocity_gain"] = velocity_gain
+        self.arm_controller.set_gains(position_gains=position_gain,
+                                      velocity_gains=velocity_gain)
     
     def set_position_control_target(self, target_positions, arm_only=True):
         if arm_only:
-            positions = []
-            for (i, joint_uid) in enumerate(self.arm_joints):
-                self.interfaces.joints.position_control(joint_uid, target_positions[i], **self.position_control_param)
-                positions.append(target_positions[i])
+            self.arm_controller.set_targets(
+                target_positions[:len(self.arm_joints)])
         else:
             raise NotImplementedError
 
-    
+
+    def set_controller(self, controller):
+        """Attach a whole-arm torque controller, or detach it with None.
+
+        The controller is run by BulletWorld.step_simulation before every
+        simulation step, see bullet_world.arm_controllers.
+        """
+        self.controller = controller
+        if controller is not None:
+            controller.reset()
+
+    def run_controller(self):
+        if self.controller is not None:
+            self.controller.step()
+
     @property
     def arm_joints(self):
         return self._arm_joints
 
+    @property
+    def kinematics(self):
+        """The ForwardKinematics of the arm.
+
+        It is parsed from the URDF file on first use, which raises a
+        ValueError for the arms it does not support. The base pose is read
+        from the simulation on every access, so that it follows the base of
+        the arm when it moves.
+        """
+        if self._kinematics is None:
+            self._kinematics = ForwardKinematics.from_body(self.physics,
+                                                           self.uid)
+        else:
+            self._kinematics.base_pose = self.physics.get_base_link_pose(
+                self.uid)
+        return self._kinematics
+
     @property
     def joints(self):
         return self._joints
     
+    @property
+    def joint_states(self):
+        return self.interfaces.joints.get_states(self.joints)
+
     @property
     def joint_positions(self):
         return self.interfaces.joints.get_positions(self.joints)
 
+    @property
+    def joint_velocities(self):
+        return self.interfaces.joints.get_velocities(self.joints)
+
+    @property
+    def arm_joint_states(self):
+        return self.interfaces.joints.get_states(self.arm_joints)
+
+    @property
+    def arm_joint_positions(self):
+        return self.interfaces.joints.get_positions(self.arm_joints)
+
+    @property
+    def arm_joint_velocities(self):
+        return self.interfaces.joints.get_velocities(self.arm_joints)
+
+    @property
+    def movable_joints(self):
+        body_info = self.physics.get_body_info(self.uid)
+        return [(self.uid, joint_ind)
+                for joint_ind in body_info.movable_joint_inds]
+
     @property
     def joint_names(self):
         return self.interfaces.joints.get_names(self.joints)
     
     @property
     def zero_decoupled_jacobian(self):
-        return self.interfaces.dynamics.zero_jacobian(self.joints, self.ee_link, decoupled=True)
+        return self.interfaces.dynamics.zero_jacobian(self.movable_joints, self.ee_link, decoupled=True)
 
     @property
     def zero_coupled_jacobian(self):
-        return self.interfaces.dynamics.zero_jacobian(self.joints, self.ee_link, coupled=True)
+        return self.interfaces.dynamics.zero_jacobian(self.movable_joints, self.ee_link, decoupled=False)
 
     @property
     def mass_matrix(self):
-        return self.interfaces.dynamics.mass(self.uid, self.joints)
+        return self.interfaces.dynamics.mass(self.uid, self.movable_joints)
@@ -1530,6 +1530,498 @@ def random_rotation_matrix4(rand=None):
     return matrix4_from_quaternion(random_quaternion(rand))
 
 
+# Batched versions of the conversions above. Quaternions, Euler angles and
+# rotation matrices are stacked along the leading dimensions, i.e. arrays of
+# shape (..., 4), (..., 3) and (..., 3, 3), and broadcast like numpy ufuncs.
+# Every function takes an optional float64 `out` array of the result shape,
+# which is filled and returned instead of allocating a new array.
+
+
+def _batch_output(out, shape):
+    """Return out, or a new float64 array of shape if out is None."""
+    if out is None:
+        return numpy.empty(shape, dtype=numpy.float64)
+    if out.shape != shape:
+        raise ValueError('out has shape %r, expected %r.' % (out.shape, shape))
+    return out
+
+
+def quaternion_multiply_batch(quaternion1, quaternion0, out=None):
+    """Return multiplication of two arrays of quaternions.
+
+    >>> q1 = numpy.random.random((5, 4))
+    >>> q0 = numpy.random.random((5, 4))
+    >>> q = quaternion_multiply_batch(q1, q0)
+    >>> numpy.allclose(q[2], quaternion_multiply(q1[2], q0[2]))
+    True
+    >>> q = quaternion_multiply_batch(q1, q0[0])
+    >>> numpy.allclose(q[3], quaternion_multiply(q1[3], q0[0]))
+    True
+
+    """
+    q0 = numpy.asarray(quaternion0, dtype=numpy.float64)
+    q1 = numpy.asarray(quaternion1, dtype=numpy.float64)
+    x0, y0, z0, w0 = q0[..., 0], q0[..., 1], q0[..., 2], q0[..., 3]
+    x1, y1, z1, w1 = q1[..., 0], q1[..., 1], q1[..., 2], q1[..., 3]
+    x = x1*w0 + y1*z0 - z1*y0 + w1*x0
+    y = -x1*z0 + y1*w0 + z1*x0 + w1*y0
+    z = x1*y0 - y1*x0 + z1*w0 + w1*z0
+    w = -x1*x0 - y1*y0 - z1*z0 + w1*w0
+    q = _batch_output(out, numpy.broadcast(q0, q1).shape)
+    q[..., 0] = x
+    q[..., 1] = y
+    q[..., 2] = z
+    q[..., 3] = w
+    return q
+
+
+def quaternion_conjugate_batch(quaternion, out=None):
+    """Return conjugate of an array of quaternions.
+
+    >>> q0 = numpy.random.random((5, 4))
+    >>> q1 = quaternion_conjugate_batch(q0)
+    >>> numpy.allclose(q1[3], quaternion_conjugate(q0[3]))
+    True
+
+    """
+    quaternion = numpy.asarray(quaternion, dtype=numpy.float64)
+    q = _batch_output(out, quaternion.shape)
+    q[...] = quaternion
+    q[..., :3] *= -1.0
+    return q
+
+
+def quaternion_inverse_batch(quaternion, out=None):
+    """Return inverse of an array of quaternions.
+
+    >>> q0 = numpy.random.random((5, 4))
+    >>> q1 = quaternion_inverse_batch(q0)
+    >>> numpy.allclose(q1[1], quaternion_inverse(q0[1]))
+    True
+
+    """
+    quaternion = numpy.asarray(quaternion, dtype=numpy.float64)
+    nq = numpy.sum(quaternion*quaternion, axis=-1)[..., None]
+    q = quaternion_conjugate_batch(quaternion, out=out)
+    q /= nq
+    return q
+
+
+def quaternion_about_axis_batch(angle, axis, out=None):
+    """Return quaternions for rotations about axes.
+
+    >>> angles = numpy.random.random(5)
+    >>> axes = numpy.random.random((5, 3))
+    >>> q = quaternion_about_axis_batch(angles, axes)
+    >>> numpy.allclose(q[2], quaternion_about_axis(angles[2], axes[2]))
+    True
+
+    """
+    angle = numpy.asarray(angle, dtype=numpy.float64)
+    axis = numpy.asarray(axis, dtype=numpy.float64)[..., :3]
+    shape = numpy.broadcast(angle[..., None], axis).shape[:-1]
+    qlen = numpy.sqrt(numpy.sum(axis*axis, axis=-1))
+    scale = numpy.where(qlen > _EPS,
+                        numpy.sin(angle/2.0) / numpy.maximum(qlen, _EPS),
+                        1.0)
+    q = _batch_output(out, shape + (4, ))
+    q[..., :3] = axis * scale[..., None]
+    q[..., 3] = numpy.cos(angle/2.0)
+    return q
+
+
+def matrix3_from_quaternion_batch(quaternion, out=None):
+    """Return 3x3 rotation matrices from an array of quaternions.
+
+    >>> q = numpy.random.random((5, 4))
+    >>> R = matrix3_from_quaternion_batch(q)
+    >>> R.shape
+    (5, 3, 3)
+    >>> numpy.allclose(R[1], matrix3_from_quaternion(q[1]))
+    True
+
+    """
+    q = numpy.asarray(quaternion, dtype=numpy.float64)
+    nq = numpy.sum(q*q, axis=-1)
+    # Degenerated quaternions map to the identity.
+    s = numpy.where(nq < _EPS, 0.0, 2.0 / numpy.maximum(nq, _EPS))
+    x, y, z, w = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    M = _batch_output(out, q.shape[:-1] + (3, 3))
+    M[..., 0, 0] = 1.0 - s*(y*y + z*z)
+    M[..., 0, 1] = s*(x*y - z*w)
+    M[..., 0, 2] = s*(x*z + y*w)
+    M[..., 1, 0] = s*(x*y + z*w)
+    M[..., 1, 1] = 1.0 - s*(x*x + z*z)
+    M[..., 1, 2] = s*(y*z - x*w)
+    M[..., 2, 0] = s*(x*z - y*w)
+    M[..., 2, 1] = s*(y*z + x*w)
+    M[..., 2, 2] = 1.0 - s*(x*x + y*y)
+    return M
+
+
+def matrix4_from_quaternion_batch(quaternion, out=None):
+    """Return 4x4 homogeneous rotation matrices from an array of quaternions.
+
+    >>> q = numpy.random.random((5, 4))
+    >>> R = matrix4_from_quaternion_batch(q)
+    >>> numpy.allclose(R[4], matrix4_from_quaternion(q[4]))
+    True
+
+    """
+    q = numpy.asarray(quaternion, dtype=numpy.float64)
+    M = _batch_output(out, q.shape[:-1] + (4, 4))
+    matrix3_from_quaternion_batch(q, out=M[..., :3, :3])
+    M[..., :3, 3] = 0.0
+    M[..., 3, :3] = 0.0
+    M[..., 3, 3] = 1.0
+    return M
+
+
+def quaternion_from_matrix3_batch(matrix3, out=None):
+    """Return quaternions from an array of 3x3 rotation matrices.
+
+    Unlike quaternion_from_matrix3, the largest diagonal element is used as
+    pivot so that rotations close to 180 degrees stay accurate. The returned
+    quaternions have a non-negative w.
+
+    >>> R = numpy.array([rotation_matrix3(a, (1, 2, 3)) for a in (0.1, 3.1)])
+    >>> q = quaternion_from_matrix3_batch(R)
+    >>> numpy.allclose(q[0], quaternion_from_matrix3(R[0]))
+    True
+    >>> numpy.allclose(matrix3_from_quaternion_batch(q), R)
+    True
+
+    """
+    M = numpy.asarray(matrix3, dtype=numpy.float64)
+    m00, m01, m02 = M[..., 0, 0], M[..., 0, 1], M[..., 0, 2]
+    m10, m11, m12 = M[..., 1, 0], M[..., 1, 1], M[..., 1, 2]
+    m20, m21, m22 = M[..., 2, 0], M[..., 2, 1], M[..., 2, 2]
+
+    # One candidate per pivot: w, x, y and z.
+    t = numpy.stack((1.0 + m00 + m11 + m22,
+                     1.0 + m00 - m11 - m22,
+                     1.0 - m00 + m11 - m22,
+                     1.0 - m00 - m11 + m22), axis=-1)
+    candidates = numpy.stack((
+        numpy.stack((m21 - m12, m02 - m20, m10 - m01, t[..., 0]), axis=-1),
+        numpy.stack((t[..., 1], m01 + m10, m02 + m20, m21 - m12), axis=-1),
+        numpy.stack((m01 + m10, t[..., 2], m12 + m21, m02 - m20), axis=-1),
+        numpy.stack((m02 + m20, m12 + m21, t[..., 3], m10 - m01), axis=-1),
+        ), axis=-2)
+    pivot = numpy.argmax(t, axis=-1)[..., None, None]
+    t = numpy.take_along_axis(t, pivot[..., 0], axis=-1)
+    q = _batch_output(out, M.shape[:-2] + (4, ))
+    q[...] = numpy.take_along_axis(candidates, pivot, axis=-2)[..., 0, :]
+    q *= 0.5 / numpy.sqrt(numpy.maximum(t, EPS))
+    q *= numpy.where(q[..., 3:] < 0.0, -1.0, 1.0)
+    return q
+
+
+def quaternion_from_euler_batch(euler, axes='sxyz', out=None):
+    """Return quaternions from an array of Euler angles and axis sequence.
+
+    euler : array of (..., 3) Euler's roll, pitch and yaw angles
+    axes : One of 24 axis sequences as string or encoded tuple
+
+    >>> e = numpy.random.random((5, 3))
+    >>> q = quaternion_from_euler_batch(e)
+    >>> numpy.allclose(q[4], quaternion_from_euler(*e[4]))
+    True
+    >>> for axes in _AXES2TUPLE.keys():
+    ...    q = quaternion_from_euler_batch(e, axes)
+    ...    q0 = quaternion_from_euler(e[1, 0], e[1, 1], e[1, 2], axes)
+    ...    if not numpy.allclose(q[1], q0): print(axes, "failed")
+
+    """
+    try:
+        firstaxis, parity, repetition, frame = _AXES2TUPLE[axes.lower()]
+    except (AttributeError, KeyError):
+        _ = _TUPLE2AXES[axes]
+        firstaxis, parity, repetition, frame = axes
+
+    i = firstaxis
+    j = _NEXT_AXIS[i+parity]
+    k = _NEXT_AXIS[i-parity+1]
+
+    e = numpy.asarray(euler, dtype=numpy.float64)
+    ai, aj, ak = e[..., 0], e[..., 1], e[..., 2]
+    if frame:
+        ai, ak = ak, ai
+    if parity:
+        aj = -aj
+
+    ci, si = numpy.cos(ai/2.0), numpy.sin(ai/2.0)
+    cj, sj = numpy.cos(aj/2.0), numpy.sin(aj/2.0)
+    ck, sk = numpy.cos(ak/2.0), numpy.sin(ak/2.0)
+    cc, cs = ci*ck, ci*sk
+    sc, ss = si*ck, si*sk
+
+    q = _batch_output(out, e.shape[:-1] + (4, ))
+    if repetition:
+        q[..., i] = cj*(cs + sc)
+        q[..., j] = sj*(cc + ss)
+        q[..., k] = sj*(cs - sc)
+        q[..., 3] = cj*(cc - ss)
+    else:
+        q[..., i] = cj*sc - sj*cs
+        q[..., j] = cj*ss + sj*cc
+        q[..., k] = cj*cs - sj*sc
+        q[..., 3] = cj*cc + sj*ss
+    if parity:
+        q[..., j] *= -1
+    return q
+
+
+def matrix3_from_euler_batch(euler, axes='sxyz', out=None):
+    """Return 3x3 rotation matrices from an array of Euler angles.
+
+    euler : array of (..., 3) Euler's roll, pitch and yaw angles
+    axes : One of 24 axis sequences as string or encoded tuple
+
+    >>> e = numpy.random.random((5, 3))
+    >>> for axes in _AXES2TUPLE.keys():
+    ...    R = matrix3_from_euler_batch(e, axes)
+    ...    R0 = matrix3_from_euler(e[2, 0], e[2, 1], e[2, 2], axes)
+    ...    if not numpy.allclose(R[2], R0): print(axes, "failed")
+
+    """
+    try:
+        firstaxis, parity, repetition, frame = _AXES2TUPLE[axes.lower()]
+    except (AttributeError, KeyError):
+        _ = _TUPLE2AXES[axes]
+        firstaxis, parity, repetition, frame = axes
+
+    i = firstaxis
+    j = _NEXT_AXIS[i+parity]
+    k = _NEXT_AXIS[i-parity+1]
+
+    e = numpy.asarray(euler, dtype=numpy.float64)
+    ai, aj, ak = e[..., 0], e[..., 1], e[..., 2]
+    if frame:
+        ai, ak = ak, ai
+    if parity:
+        ai, aj, ak = -ai, -aj, -ak
+
+    si, sj, sk = numpy.sin(ai), numpy.sin(aj), numpy.sin(ak)
+    ci, cj, ck = numpy.cos(ai), numpy.cos(aj), numpy.cos(ak)
+    cc, cs = ci*ck, ci*sk
+    sc, ss = si*ck, si*sk
+
+    M = _batch_output(out, e.shape[:-1] + (3, 3))
+    if repetition:
+        M[..., i, i] = cj
+        M[..., i, j] = sj*si
+        M[..., i, k] = sj*ci
+        M[..., j, i] = sj*sk
+        M[..., j, j] = -cj*ss+cc
+        M[..., j, k] = -cj*cs-sc
+        M[..., k, i] = -sj*ck
+        M[..., k, j] = cj*sc+cs
+        M[..., k, k] = cj*cc-ss
+    else:
+        M[..., i, i] = cj*ck
+        M[..., i, j] = sj*sc-cs
+        M[..., i, k] = sj*cc+ss
+        M[..., j, i] = cj*sk
+        M[..., j, j] = sj*ss+cc
+        M[..., j, k] = sj*cs-sc
+        M[..., k, i] = -sj
+        M[..., k, j] = cj*si
+        M[..., k, k] = cj*ci
+    return M
+
+
+def euler_from_matrix3_batch(matrix3, axes='sxyz', out=None):
+    """Return Euler angles from an array of 3x3 rotation matrices.
+
+    axes : One of 24 axis sequences as string or encoded tuple
+
+    >>> R = numpy.array([matrix3_from_euler(1, 2, 3), numpy.identity(3)])
+    >>> e = euler_from_matrix3_batch(R)
+    >>> numpy.allclose(e[0], euler_from_matrix3(R[0]))
+    True
+    >>> for axes in _AXES2TUPLE.keys():
+    ...    e = euler_from_matrix3_batch(R, axes)
+    ...    if not numpy.allclose(e[0], euler_from_matrix3(R[0], axes)):
+    ...        print(axes, "failed")
+    ...    if not numpy.allclose(e[1], euler_from_matrix3(R[1], axes)):
+    ...        print(axes, "failed")
+
+    """
+    try:
+        firstaxis, parity, repetition, frame = _AXES2TUPLE[axes.lower()]
+    except (AttributeError, KeyError):
+        _ = _TUPLE2AXES[axes]
+        firstaxis, parity, repetition, frame = axes
+
+    i = firstaxis
+    j = _NEXT_AXIS[i+parity]
+    k = _NEXT_AXIS[i-parity+1]
+
+    M = numpy.asarray(matrix3, dtype=numpy.float64)
+    if repetition:
+        sy = numpy.sqrt(M[..., i, j]*M[..., i, j] + M[..., i, k]*M[..., i, k])
+        singular = sy <= _EPS
+        ax = numpy.where(singular,
+                         numpy.arctan2(-M[..., j, k], M[..., j, j]),
+                         numpy.arctan2(M[..., i, j], M[..., i, k]))
+        ay = numpy.arctan2(sy, M[..., i, i])
+        az = numpy.where(singular,
+                         0.0,
+                         numpy.arctan2(M[..., j, i], -M[..., k, i]))
+    else:
+        cy = numpy.sqrt(M[..., i, i]*M[..., i, i] + M[..., j, i]*M[..., j, i])
+        singular = cy <= _EPS
+        ax = numpy.where(singular,
+                         numpy.arctan2(-M[..., j, k], M[..., j, j]),
+                         numpy.arctan2(M[..., k, j], M[..., k, k]))
+        ay = numpy.arctan2(-M[..., k, i], cy)
+        az = numpy.where(singular,
+                         0.0,
+                         numpy.arctan2(M[..., j, i], M[..., i, i]))
+
+    if parity:
+        ax, ay, az = -ax, -ay, -az
+    if frame:
+        ax, az = az, ax
+
+    e = _batch_output(out, M.shape[:-2] + (3, ))
+    e[..., 0] = ax
+    e[..., 1] = ay
+    e[..., 2] = az
+    return e
+
+
+def euler_from_quaternion_batch(quaternion, axes='sxyz', out=None):
+    """Return Euler angles from an array of quaternions.
+
+    >>> q = numpy.random.random((5, 4))
+    >>> e = euler_from_quaternion_batch(q)
+    >>> numpy.allclose(e[0], euler_from_quaternion(q[0]))
+    True
+    >>> for axes in _AXES2TUPLE.keys():
+    ...    e = euler_from_quaternion_batch(q, axes)
+    ...    if not numpy.allclose(e[3], euler_from_quaternion(q[3], axes)):
+    ...        print(axes, "failed")
+
+    """
+    return euler_from_matrix3_batch(
+        matrix3_from_quaternion_batch(quaternion), axes, out=out)
+
+
+def quaternion_slerp_batch(quat0, quat1, fraction, shortestpath=True,
+                           out=None):
+    """Return spherical linear interpolation between arrays of quaternions.
+
+    quat0, quat1 : arrays of (..., 4) quaternions
+    fraction : array of interpolation fractions, broadcast against the
+        leading dimensions of the quaternions
+
+    >>> q0 = numpy.array([random_quaternion() for _ in range(5)])
+    >>> q1 = numpy.array([random_quaternion() for _ in range(5)])
+    >>> f = numpy.random.random(5)
+    >>> q = quaternion_slerp_batch(q0, q1, f)
+    >>> numpy.allclose(q[2], quaternion_slerp(q0[2], q1[2], f[2]))
+    True
+    >>> numpy.allclose(quaternion_slerp_batch(q0, q1, 0.0), q0)
+    True
+
+    """
+    q0 = numpy.asarray(quat0, dtype=numpy.float64)
+    q1 = numpy.asarray(quat1, dtype=numpy.float64)
+    q0 = q0 / numpy.sqrt(numpy.sum(q0*q0, axis=-1))[..., None]
+    q1 = q1 / numpy.sqrt(numpy.sum(q1*q1, axis=-1))[..., None]
+    fraction = numpy.asarray(fraction, dtype=numpy.float64)[..., None]
+
+    d = numpy.sum(q0*q1, axis=-1)[..., None]
+    if shortestpath:
+        # invert rotation
+        q1 = numpy.where(d < 0.0, -q1, q1)
+        d = numpy.abs(d)
+    angle = numpy.arccos(numpy.clip(d, -1.0, 1.0))
+    # Fall back to q0 for (anti-)parallel quaternions, as quaternion_slerp.
+    degenerate = (numpy.abs(numpy.abs(d) - 1.0) < _EPS) | (angle < _EPS)
+    isin = 1.0 / numpy.where(degenerate, 1.0, numpy.sin(angle))
+    w0 = numpy.where(degenerate, 1.0, numpy.sin((1.0 - fraction) * angle) * isin)
+    w1 = numpy.where(degenerate, 0.0, numpy.sin(fraction * angle) * isin)
+
+    q = w0 * q0 + w1 * q1
+    if out is None:
+        return q
+    out[...] = q
+    return out
+
+
+def trajectory_segments(times, query_times):
+    """Return the key segment and fraction of each query time.
+
+    times : array of (N, ) increasing key times
+    query_times : array of (M, ) query times, clipped to the key times
+
+    Returns the (M, ) indices of the first key of each segment and the (M, )
+    interpolation fractions within the segments.
+
+    >>> inds, fractions = trajectory_segments([0., 1., 3.], [-1., 0.5, 2., 4.])
+    >>> inds
+    array([0, 0, 1, 1])
+    >>> fractions
+    array([0. , 0.5, 0.5, 1. ])
+
+    """
+    times = numpy.asarray(times, dtype=numpy.float64)
+    query_times = numpy.clip(numpy.asarray(query_times, dtype=numpy.float64),
+                             times[0], times[-1])
+    if times.shape[0] < 2:
+        return (numpy.zeros(query_times.shape, dtype=numpy.int64),
+                numpy.zeros(query_times.shape, dtype=numpy.float64))
+    inds = numpy.searchsorted(times, query_times, side='right') - 1
+    inds = numpy.clip(inds, 0, times.shape[0] - 2)
+    durations = times[inds + 1] - times[inds]
+    fractions = numpy.where(
+        durations > _EPS,
+        (query_times - times[inds]) / numpy.maximum(durations, _EPS),
+        0.0)
+    return inds, fractions
+
+
+def quaternion_slerp_trajectory(quaternions, times, query_times, out=None):
+    """Return quaternions interpolated along a sequence of key orientations.
+
+    Consecutive keys are first flipped, cumulatively, onto the same
+    hemisphere, so that every segment follows the shortest path and the
+    result has no sign discontinuities.
+
+    quaternions : array of (N, 4) key quaternions
+    times : array of (N, ) increasing key times
+    query_times : array of (M, ) query times, clipped to the key times
+
+    >>> q = numpy.array([random_quaternion() for _ in range(4)])
+    >>> qt = quaternion_slerp_trajectory(q, [0., 1., 2., 3.], [0., 1.5, 3.])
+    >>> qt.shape
+    (3, 4)
+    >>> numpy.allclose(abs(numpy.sum(qt[0] * q[0])), 1.0)
+    True
+    >>> numpy.allclose(abs(numpy.sum(qt[2] * q[3])), 1.0)
+    True
+    >>> q1 = quaternion_slerp(q[1], q[2], 0.5)
+    >>> numpy.allclose(abs(numpy.sum(qt[1] * q1)), 1.0)
+    True
+
+    """
+    q = numpy.array(quaternions, dtype=numpy.float64)
+    q /= numpy.sqrt(numpy.sum(q*q, axis=-1))[:, None]
+    signs = numpy.where(numpy.sum(q[1:] * q[:-1], axis=-1) < 0.0, -1.0, 1.0)
+    q[1:] *= numpy.cumprod(signs)[:, None]
+
+    inds, fractions = trajectory_segments(times, query_times)
+    if q.shape[0] < 2:
+        q1 = q[inds]
+    else:
+        q1 = q[inds + 1]
+    return quaternion_slerp_batch(q[inds], q1, fractions,
+                                  shortestpath=False, out=out)
+
+
 class Arcball(object):
     """Virtual Trackball Control.
 
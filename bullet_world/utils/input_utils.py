@@ -4,6 +4,16 @@ Utility functions for grabbing user inputs
 
 import numpy as np
 
+try:
+    from bullet_world.utils.spacemouse import SpaceMouse
+except ImportError:
+    SpaceMouse = None
+
+
+def _is_spacemouse(device):
+    return SpaceMouse is not None and isinstance(device, SpaceMouse)
+
+
 def input2action(device, control_type="OSC_POSE", robot_name="Panda", gripper_dof=1):
     state = device.get_controller_state()
     # Note: Devices output rotation with x and z flipped to account for robots starting with gripper facing down
@@ -23,8 +33,8 @@ def input2action(device, control_type="OSC_POSE", robot_name="Panda", gripper_do
     if control_type == "OSC_POSE":
         drotation[2] = -drotation[2]
         # Scale rotation for teleoperation (tuned for OSC) -- gains tuned for each device
-        drotation = drotation * 50 if isinstance(device, SpaceMouse) else drotation * 1.5
-        dpos = dpos * 125 if isinstance(device, SpaceMouse) else dpos * 75
+        drotation = drotation * 50 if _is_spacemouse(device) else drotation * 1.5
+        dpos = dpos * 125 if _is_spacemouse(device) else dpos * 75
 
         grasp = 1 if grasp else -1
         action = np.concatenate([dpos, drotation, [grasp] * gripper_dof])
@@ -0,0 +1,314 @@
+"""A pool of BulletWorld instances stepped in parallel processes."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import multiprocessing
+import traceback
+
+import numpy as np
+
+from bullet_world.bullet_world import BulletWorld
+from bullet_world.logging import logger
+
+
+def _worker(index, pipe, parent_pipe, world_class, world_kwargs,
+            observation_buffer, action_buffer, num_worlds, observation_size,
+            action_size, action_repeat):
+    """Run one world and serve the commands of VectorBulletWorld.
+
+    Observations and actions are exchanged through the shared buffers, the
+    pipe only carries the commands and their acknowledgements.
+    """
+    parent_pipe.close()
+    observations = np.frombuffer(observation_buffer, dtype=np.float64)
+    observations = observations.reshape(num_worlds, observation_size)
+    actions = np.frombuffer(action_buffer, dtype=np.float64)
+    actions = actions.reshape(num_worlds, action_size)
+
+    world = None
+    try:
+        world = world_class(**world_kwargs)
+        while True:
+            command, data = pipe.recv()
+            if command == 'step':
+                world.apply_action(actions[index])
+                world.step_simulation(action_repeat)
+                observations[index] = world.get_observation()
+                pipe.send(('ok', None))
+            elif command == 'reset':
+                world.reset()
+                observations[index] = world.get_observation()
+                pipe.send(('ok', None))
+            elif command == 'reset_to':
+                world.reset_to(data[index])
+                observations[index] = world.get_observation()
+                pipe.send(('ok', None))
+            elif command == 'observe':
+                observations[index] = world.get_observation()
+                pipe.send(('ok', None))
+            elif command == 'call':
+                name, args, kwargs = data
+                pipe.send(('ok', getattr(world, name)(*args, **kwargs)))
+            elif command == 'close':
+                pipe.send(('ok', None))
+                break
+            else:
+                raise ValueError('Unrecognized command %r.' % (command,))
+    except (KeyboardInterrupt, EOFError):
+        pass
+    except Exception:
+        pipe.send(('error', traceback.format_exc()))
+    finally:
+        del world
+        pipe.close()
+
+
+class VectorBulletWorld(object):
+    """N BulletWorld instances, each stepped in its own process.
+
+    Each worker owns a DIRECT pybullet client. The observations and actions
+    of all worlds live in two shared float64 buffers of [N, observation_size]
+    and [N, action_size], so a step only sends a short command through a pipe
+    to every worker and no arrays are pickled.
+
+    The worlds are driven through BulletWorld.apply_action,
+    BulletWorld.get_observation and BulletWorld.reset.
+
+    Args:
+        num_worlds (int): The number of worlds.
+        world_class (class): A subclass of BulletWorld, it must be importable
+            from the worker processes.
+        world_kwargs (dict): The arguments of world_class. use_visualizer and
+            worker_id are filled in for each worker.
+        observation_size (int): The size of one observation. It is read from
+            a temporary world if it is None.
+        action_size (int): The size of one action. It is read from a
+            temporary world if it is None.
+        action_repeat (int): The number of simulation steps per action.
+        start_method (str): The multiprocessing start method, the platform
+            default is used if it is None.
+    """
+
+    def __init__(self,
+                 num_worlds,
+                 world_class=BulletWorld,
+                 world_kwargs=None,
+                 observation_size=None,
+                 action_size=None,
+                 action_repeat=1,
+                 start_method=None):
+        world_kwargs = dict(world_kwargs or {})
+        world_kwargs['use_visualizer'] = False
+
+        if observation_size is None or action_size is None:
+            world = world_class(**world_kwargs)
+            observation_size = world.observation_size
+            action_size = world.action_size
+            del world
+
+        self._num_worlds = num_worlds
+        self._observation_size = observation_size
+        self._action_size = action_size
+
+        context = multiprocessing.get_context(start_method)
+        self._observation_buffer = context.RawArray(
+            'd', num_worlds * observation_size)
+        self._action_buffer = context.RawArray('d', num_worlds * action_size)
+        self._observations = np.frombuffer(
+            self._observation_buffer, dtype=np.float64).reshape(
+                num_worlds, observation_size)
+        self._actions = np.frombuffer(
+            self._action_buffer, dtype=np.float64).reshape(
+                num_worlds, action_size)
+
+        self._pipes = []
+        self._processes = []
+        for index in range(num_worlds):
+            kwargs = dict(world_kwargs)
+            kwargs['worker_id'] = index
+            pipe, worker_pipe = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(index, worker_pipe, pipe, world_class, kwargs,
+                      self._observation_buffer, self._action_buffer,
+                      num_worlds, observation_size, action_size,
+                      action_repeat))
+            process.daemon = True
+            process.start()
+            worker_pipe.close()
+            self._pipes.append(pipe)
+            self._processes.append(process)
+        logger.info('Started %d worlds.', num_worlds)
+
+        self._waiting = []
+        self._closed = False
+
+    @property
+    def num_worlds(self):
+        return self._num_worlds
+
+    @property
+    def observation_size(self):
+        return self._observation_size
+
+    @property
+    def action_size(self):
+        return self._action_size
+
+    def __len__(self):
+        return self._num_worlds
+
+    def __del__(self):
+        if not getattr(self, '_closed', True):
+            self.close()
+
+    def _send(self, command, data=None, indices=None):
+        if self._waiting:
+            raise RuntimeError('Wait for the pending step before sending %r.'
+                               % (command,))
+        if indices is None:
+            indices = range(self._num_worlds)
+        for index in indices:
+            self._pipes[index].send((command, data))
+        self._waiting = list(indices)
+
+    def _wait(self):
+        results = []
+        errors = []
+        for index in self._waiting:
+            status, result = self._pipes[index].recv()
+            if status == 'error':
+                errors.append('World %d:\n%s' % (index, result))
+            results.append(result)
+        self._waiting = []
+        if errors:
+            raise RuntimeError('\n'.join(errors))
+        return results
+
+    def step_async(self, actions):
+        """Start stepping every world with its action.
+
+        The actions are copied into the shared buffer right away, the caller
+        can reuse the array before calling step_wait.
+
+        Args:
+            actions: A [N, action_size] array.
+        """
+        self._actions[:] = actions
+        self._send('step')
+
+    def step_wait(self):
+        """Wait for the step started by step_async.
+
+        Returns:
+            A [N, observation_size] float64 array of observations.
+        """
+        self._wait()
+        return self._observations.copy()
+
+    def step(self, actions):
+        """Step every world with its action and wait for the result.
+
+        Args:
+            actions: A [N, action_size] array.
+
+        Returns:
+            A [N, observation_size] float64 array of observations.
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def reset(self, mask=None):
+        """Reset the worlds.
+
+        Args:
+            mask: A boolean array of [N] selecting the worlds to reset, all
+                worlds are reset if it is None.
+
+        Returns:
+            A [N, observation_size] float64 array of observations of all
+            worlds.
+        """
+        if mask is None:
+            indices = None
+        else:
+            indices = np.flatnonzero(np.asarray(mask, dtype=bool))
+        self._send('reset', indices=indices)
+        self._wait()
+        return self._observations.copy()
+
+    def save_snapshots(self):
+        """Save the state of every world.
+
+        Returns:
+            The list of the snapshot ids of every world.
+        """
+        return self.call('save_snapshot')
+
+    def reset_to(self, snapshot_ids, mask=None):
+        """Restore a snapshot in the worlds.
+
+        Args:
+            snapshot_ids: The list of [N] snapshot ids, one per world, or a
+                single id shared by all worlds.
+            mask: A boolean array of [N] selecting the worlds to restore, all
+                worlds are restored if it is None.
+
+        Returns:
+            A [N, observation_size] float64 array of observations of all
+            worlds.
+        """
+        snapshot_ids = [int(snapshot_id) for snapshot_id in np.broadcast_to(
+            snapshot_ids, (self._num_worlds,))]
+        if mask is None:
+            indices = None
+        else:
+            indices = np.flatnonzero(np.asarray(mask, dtype=bool))
+        self._send('reset_to', snapshot_ids, indices=indices)
+        self._wait()
+        return self._observations.copy()
+
+    def get_observations(self):
+        """Get the current observations of all worlds.
+
+        Returns:
+            A [N, observation_size] float64 array of observations.
+        """
+        self._send('observe')
+        self._wait()
+        return self._observations.copy()
+
+    def call(self, name, *args, **kwargs):
+        """Call a method of every world.
+
+        The arguments and the results are pickled, so this is meant for
+        configuration rather than for the inner loop.
+
+        Args:
+            name: The method name of the world.
+
+        Returns:
+            The list of the results of every world.
+        """
+        self._send('call', (name, args, kwargs))
+        return self._wait()
+
+    def close(self):
+        """Shut down the workers."""
+        if self._closed:
+            return
+        if self._waiting:
+            self._wait()
+        for pipe, process in zip(self._pipes, self._processes):
+            if process.is_alive():
+                try:
+                    pipe.send(('close', None))
+                    pipe.recv()
+                except (BrokenPipeError, EOFError):
+                    pass
+            pipe.close()
+        for process in self._processes:
+            process.join()
+        self._closed = True
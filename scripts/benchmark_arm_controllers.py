@@ -0,0 +1,45 @@
+"""Cost of one control tick of the whole-arm torque controllers.
+"""
+import _init_paths
+import argparse
+import timeit
+
+from bullet_world import BulletWorld
+from bullet_world.arm_controllers import ComputedTorqueController
+from bullet_world.arm_controllers import JointImpedanceController
+from bullet_world.arm_controllers import OperationalSpaceController
+
+
+NUM_CALLS = 2000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--assets_dir', type=str, default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    world_kwargs = {'default_init': True, 'use_visualizer': False}
+    if args.assets_dir is not None:
+        world_kwargs['assets_dir'] = args.assets_dir
+    world = BulletWorld(**world_kwargs)
+    arm = world.robot_arms[0]
+
+    for controller_class in (JointImpedanceController,
+                             ComputedTorqueController,
+                             OperationalSpaceController):
+        controller = controller_class(arm)
+        arm.set_controller(controller)
+        seconds = timeit.timeit(controller.step, number=NUM_CALLS)
+        print('%-28s %8.2f us/tick' % (controller_class.__name__,
+                                       seconds / NUM_CALLS * 1e6))
+    arm.set_controller(None)
+
+    seconds = timeit.timeit(world.step_simulation, number=NUM_CALLS)
+    print('%-28s %8.2f us/step' % ('step_simulation', seconds / NUM_CALLS * 1e6))
+
+
+if __name__ == '__main__':
+    main()
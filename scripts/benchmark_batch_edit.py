@@ -0,0 +1,59 @@
+"""Scene construction time with and without BulletPhysics.batch_edit.
+
+Run with --gui to see the effect, without the visualizer the rendering is
+never toggled and both timings are the same.
+"""
+import _init_paths
+import argparse
+import os
+import time
+
+import numpy as np
+import pybullet_data
+
+from bullet_world import BulletPhysics
+from bullet_world.math_utils import Pose
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--gui', action='store_true')
+    parser.add_argument('--num_bodies', type=int, default=100)
+    parser.add_argument('--urdf_file', type=str,
+                        default=os.path.join(pybullet_data.getDataPath(),
+                                             'cube_small.urdf'))
+    parser.add_argument('--obj_file', type=str,
+                        default=os.path.join(pybullet_data.getDataPath(),
+                                             'duck_vhacd.obj'))
+    return parser.parse_args()
+
+
+def build(physics, filenames, poses):
+    for (filename, pose) in zip(filenames, poses):
+        physics.add_body(filename, pose)
+
+
+def main():
+    args = parse_args()
+    physics = BulletPhysics(use_visualizer=args.gui)
+    filenames = [args.urdf_file, args.obj_file] * (args.num_bodies // 2)
+    positions = np.random.uniform(-1, 1, size=(len(filenames), 3))
+    poses = [Pose([position, [0, 0, 0]]) for position in positions]
+
+    for use_batch_edit in (False, True):
+        physics.reset()
+        physics.start()
+        start = time.time()
+        if use_batch_edit:
+            with physics.batch_edit():
+                build(physics, filenames, poses)
+        else:
+            build(physics, filenames, poses)
+        duration = time.time() - start
+        print('%-20s %8.3f s for %d bodies' % (
+            'batch_edit' if use_batch_edit else 'per body', duration,
+            len(filenames)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Latency of the inverse kinematics of a teleoperation-like stream of targets,
+with and without the IK cache.
+"""
+import _init_paths
+import argparse
+import time
+
+import numpy as np
+
+from bullet_world import BulletWorld
+from bullet_world.math_utils import Pose
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_queries', type=int, default=2000)
+    parser.add_argument('--num_targets', type=int, default=20)
+    parser.add_argument('--jitter', type=float, default=1e-4)
+    parser.add_argument('--assets_dir', type=str, default=None)
+    return parser.parse_args()
+
+
+def sample_targets(num_queries, num_targets, jitter, random_state):
+    """Few distinct targets, each repeated with small noise as an input
+    device holding still would send them."""
+    positions = np.stack([random_state.uniform(0.3, 0.6, num_targets),
+                          random_state.uniform(-0.3, 0.3, num_targets),
+                          random_state.uniform(0.8, 1.1, num_targets)], axis=1)
+    inds = np.repeat(np.arange(num_targets), num_queries // num_targets)
+    positions = positions[inds] + random_state.uniform(
+        -jitter, jitter, size=(len(inds), 3))
+    return [Pose([position, [np.pi, 0.0, 0.0]]) for position in positions]
+
+
+def run(arm, targets):
+    start_time = time.time()
+    for target in targets:
+        arm.compute_ik_joints(target)
+    return (time.time() - start_time) / len(targets)
+
+
+def main():
+    args = parse_args()
+    world_kwargs = {'default_init': True, 'use_visualizer': False}
+    if args.assets_dir is not None:
+        world_kwargs['assets_dir'] = args.assets_dir
+    world = BulletWorld(**world_kwargs)
+    arm = world.robot_arms[0]
+    targets = sample_targets(args.num_queries, args.num_targets, args.jitter,
+                             np.random.RandomState(0))
+
+    print('%-24s %10.1f us/query' % ('uncached', run(arm, targets) * 1e6))
+
+    for warm_start in (False, True):
+        ik_cache = world.physics.enable_ik_cache(warm_start=warm_start)
+        seconds = run(arm, targets)
+        stats = ik_cache.get_stats()
+        print('%-24s %10.1f us/query   %d hits %d misses %5.1f%% hit rate' % (
+            'cached, warm_start=%s' % warm_start, seconds * 1e6,
+            stats['hits'], stats['misses'], 100.0 * stats['hit_rate']))
+        world.physics.disable_ik_cache()
+
+    check_base_move(world, arm, targets[0])
+
+
+def check_base_move(world, arm, target):
+    """A cached solution must not be returned after the base moved."""
+    physics = world.physics
+    base_pose = physics.get_body_pose(arm.uid)
+    moved_pose = [base_pose.position + [0.2, 0.0, 0.0], base_pose.quaternion]
+    joint_inds = physics.get_body_info(arm.uid).movable_joint_inds
+    joint_positions = physics.get_joint_states(
+        arm.uid, joint_inds)['position'].copy()
+
+    physics.enable_ik_cache()
+    arm.compute_ik_joints(target)
+    physics.set_body_pose(arm.uid, moved_pose)
+    physics.set_joint_states(arm.uid, joint_inds, joint_positions)
+    cached = np.array(arm.compute_ik_joints(target))
+    physics.disable_ik_cache()
+    physics.set_joint_states(arm.uid, joint_inds, joint_positions)
+    uncached = np.array(arm.compute_ik_joints(target))
+    physics.set_body_pose(arm.uid, base_pose)
+    physics.set_joint_states(arm.uid, joint_inds, joint_positions)
+
+    error = np.abs(cached - uncached).max()
+    print('after a base move: max joint difference to uncached %.3g rad'
+          % error)
+    assert error < 1e-6
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Throughput, residuals and solve rates of the inverse kinematics of many end
+effector poses: pybullet one call per pose or batched with and without warm
+starts, and the NumPy damped least squares solver of RobotArm.
+"""
+import _init_paths
+import argparse
+import time
+
+import numpy as np
+
+from bullet_world import BulletWorld
+from bullet_world.math_utils import PoseArray
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_poses', type=int, default=1000)
+    parser.add_argument('--num_workers', type=int, default=0)
+    parser.add_argument('--position_tolerance', type=float, default=1e-3)
+    parser.add_argument('--orientation_tolerance', type=float, default=1e-2)
+    parser.add_argument('--assets_dir', type=str, default=None)
+    return parser.parse_args()
+
+
+def sample_poses(num_poses, random_state):
+    """Top-down grasp poses above the table, sorted along the table."""
+    positions = np.stack([random_state.uniform(0.3, 0.6, num_poses),
+                          random_state.uniform(-0.3, 0.3, num_poses),
+                          random_state.uniform(0.8, 1.1, num_poses)], axis=1)
+    positions = positions[np.lexsort((positions[:, 1], positions[:, 0]))]
+    eulers = [np.pi, 0.0, 0.0] + random_state.uniform(
+        -0.2, 0.2, size=(num_poses, 3))
+    return PoseArray([positions, eulers])
+
+
+def report(name, seconds, num_poses, residuals=None, tolerances=None):
+    line = '%-24s %10.1f us/pose' % (name, seconds / num_poses * 1e6)
+    if residuals is not None:
+        line += '   position error median %.4f m, p90 %.4f m' % (
+            np.median(residuals[:, 0]), np.percentile(residuals[:, 0], 90))
+        if tolerances is not None:
+            solved = ((residuals[:, 0] <= tolerances[0]) &
+                      (residuals[:, 1] <= tolerances[1]))
+            line += ', solved %5.1f%%' % (100.0 * np.mean(solved))
+    print(line)
+
+
+def main():
+    args = parse_args()
+    world_kwargs = {'default_init': True, 'use_visualizer': False}
+    if args.assets_dir is not None:
+        world_kwargs['assets_dir'] = args.assets_dir
+    world = BulletWorld(**world_kwargs)
+    arm = world.robot_arms[0]
+    poses = sample_poses(args.num_poses, np.random.RandomState(0))
+    tolerances = (args.position_tolerance, args.orientation_tolerance)
+
+    start_time = time.time()
+    for pose in poses:
+        arm.compute_ik_joints(pose)
+    report('compute_ik_joints loop', time.time() - start_time,
+           args.num_poses)
+
+    for warm_start in (False, True):
+        start_time = time.time()
+        arm.compute_ik_joints_batch(poses, warm_start=warm_start)
+        report('batch, warm_start=%s' % warm_start, time.time() - start_time,
+               args.num_poses)
+        start_time = time.time()
+        _, residuals = arm.compute_ik_joints_batch(
+            poses, warm_start=warm_start, compute_residuals=True)
+        report('  with residuals', time.time() - start_time,
+               args.num_poses, residuals, tolerances)
+
+    if args.num_workers:
+        start_time = time.time()
+        _, residuals = arm.compute_ik_joints_batch(
+            poses, num_workers=args.num_workers, compute_residuals=True)
+        report('batch, %d workers' % args.num_workers,
+               time.time() - start_time, args.num_poses, residuals,
+               tolerances)
+
+    start_time = time.time()
+    _, residuals = arm.compute_ik_joints_dls(poses)
+    report('numpy dls', time.time() - start_time, args.num_poses, residuals,
+           tolerances)
+
+
+if __name__ == '__main__':
+    main()
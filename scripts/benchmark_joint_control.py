@@ -0,0 +1,57 @@
+"""Cost of one position and torque control tick of the arm joints.
+"""
+import _init_paths
+import argparse
+import timeit
+
+import numpy as np
+
+from bullet_world import BulletWorld
+
+
+NUM_CALLS = 10000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--assets_dir', type=str, default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    world_kwargs = {'default_init': True, 'use_visualizer': False}
+    if args.assets_dir is not None:
+        world_kwargs['assets_dir'] = args.assets_dir
+    world = BulletWorld(**world_kwargs)
+    arm = world.robot_arms[0]
+    targets = np.array(arm.init_joint_positions)
+
+    def per_joint():
+        for (i, joint_uid) in enumerate(arm.arm_joints):
+            world.physics.position_control(joint_uid, targets[i])
+
+    def controller():
+        arm.arm_controller.set_targets(targets)
+
+    joint_inds = [joint_ind for (_, joint_ind) in arm.arm_joints]
+    torques = np.zeros(len(joint_inds))
+    torque_controller = world.physics.create_joint_controller(
+        arm.uid, joint_inds, control_mode='torque')
+
+    def torque_array():
+        world.physics.torque_control_array(arm.uid, joint_inds, torques)
+
+    def torque_controller_tick():
+        torque_controller.set_targets(torques)
+
+    for (name, func) in (('position_control per joint', per_joint),
+                         ('JointController', controller),
+                         ('torque_control_array', torque_array),
+                         ('JointController torque', torque_controller_tick)):
+        seconds = timeit.timeit(func, number=NUM_CALLS)
+        print('%-28s %8.2f us/tick' % (name, seconds / NUM_CALLS * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Throughput and contact drift of the physics profiles on the default
+Panda-on-table scene.
+
+A grid of boxes rests on the table while the arm holds its neutral joint
+positions. The drift is how far the boxes move away from their settled poses,
+the penetration is the deepest contact between the boxes and the table.
+"""
+import _init_paths
+import argparse
+import time
+
+import numpy as np
+import pybullet
+
+from bullet_world import BulletWorld
+from bullet_world.math_utils import PoseArray
+
+
+PROFILES = ('fast', 'balanced', 'accurate')
+BOX_HALF_EXTENT = 0.025
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_steps', type=int, default=2000)
+    parser.add_argument('--num_settle_steps', type=int, default=500)
+    parser.add_argument('--grid_size', type=int, default=4)
+    parser.add_argument('--assets_dir', type=str, default=None)
+    return parser.parse_args()
+
+
+def build_world(profile, args):
+    world_kwargs = {'default_init': True, 'use_visualizer': False,
+                    'physics_profile': profile}
+    if args.assets_dir is not None:
+        world_kwargs['assets_dir'] = args.assets_dir
+    world = BulletWorld(**world_kwargs)
+    world.physics.set_gravity([0, 0, -9.81])
+
+    # Boxes on the table top, behind the arm and out of its reach.
+    _, aabb_max = pybullet.getAABB(world.table_uid,
+                                   physicsClientId=world.physics.uid)
+    table_height = aabb_max[2]
+    xs = np.linspace(-0.6, -0.3, args.grid_size)
+    ys = np.linspace(-0.4, 0.4, args.grid_size)
+    positions = np.array([[x, y, table_height + BOX_HALF_EXTENT]
+                          for x in xs for y in ys])
+    shape = {
+        'baseCollisionShapeIndex': world.physics.create_collision_shape(
+            world.physics.geom_box, halfExtents=[BOX_HALF_EXTENT] * 3),
+    }
+    box_uids = world.add_bodies_batch(
+        shape, PoseArray([positions, np.zeros((len(positions), 3))]), masses=0.1)
+    return world, box_uids
+
+
+def main():
+    args = parse_args()
+    print('%-10s %12s %14s %16s' % ('profile', 'steps/s', 'drift (mm)',
+                                   'penetration (mm)'))
+    for profile in PROFILES:
+        world, box_uids = build_world(profile, args)
+        arm = world.robot_arms[0]
+        arm.set_position_control_target(arm.init_joint_positions)
+        world.step_simulation(args.num_settle_steps)
+        settled = world.physics.get_body_states(box_uids)
+
+        start_time = time.time()
+        for _ in range(args.num_steps):
+            world.step_simulation()
+        seconds = time.time() - start_time
+
+        poses = world.physics.get_body_states(box_uids)
+        drift = np.linalg.norm(poses[:, :3] - settled[:, :3], axis=1)
+        contacts = world.physics.get_contacts(world.table_uid)
+        distances = contacts['contact_distance'][
+            np.isin(contacts['body_b'], box_uids)]
+        penetration = max(0.0, -distances.min()) if len(distances) else 0.0
+        print('%-10s %12.1f %14.4f %16.4f' % (
+            profile, args.num_steps / seconds, drift.max() * 1e3,
+            penetration * 1e3))
+        del world
+
+
+if __name__ == '__main__':
+    main()
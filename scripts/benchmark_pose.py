@@ -0,0 +1,61 @@
+"""Micro-benchmark of Pose construction, conversion and memory footprint.
+"""
+import _init_paths
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from bullet_world.math_utils import Pose
+
+
+NUM_CALLS = 20000
+NUM_POSES = 10000
+
+
+def benchmark(name, stmt, setup_globals):
+    seconds = timeit.timeit(stmt, globals=setup_globals, number=NUM_CALLS)
+    print('%-28s %8.2f us/call' % (name, seconds / NUM_CALLS * 1e6))
+
+
+def instance_size(obj):
+    """Size of the instance including its __dict__, if any."""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def main():
+    pose_a = Pose([[0.1, 0.2, 0.3], [0.3, -0.2, 1.0]])
+    pose_b = Pose([[0.5, -0.1, 0.0], [0.0, 0.0, 0.38, 0.925]])
+    setup_globals = {'Pose': Pose, 'pose_a': pose_a, 'pose_b': pose_b}
+
+    benchmark('Pose(list)', 'Pose([[0.1, 0.2, 0.3], [0.3, -0.2, 1.0]])',
+              setup_globals)
+    benchmark('Pose(Pose)', 'Pose(pose_a)', setup_globals)
+    benchmark('pose.transform(pose)', 'pose_a.transform(pose_b)',
+              setup_globals)
+    benchmark('pose.inverse()', 'pose_a.inverse()', setup_globals)
+    benchmark('pose.matrix4', 'pose_a.matrix4', setup_globals)
+    benchmark('pose.quaternion', 'pose_a.quaternion', setup_globals)
+    benchmark('str(pose)', 'str(pose_a)', setup_globals)
+    benchmark('transform().quaternion',
+              'pose_a.transform(pose_b).quaternion', setup_globals)
+
+    positions = np.random.uniform(-1, 1, size=(NUM_POSES, 3))
+    eulers = np.random.uniform(-np.pi, np.pi, size=(NUM_POSES, 3))
+    tracemalloc.start()
+    poses = [Pose([position, euler])
+             for position, euler in zip(positions, eulers)]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('%-28s %8.1f bytes/pose' % ('peak allocation', peak / NUM_POSES))
+    print('%-28s %8d bytes' % ('pose instance', instance_size(poses[0])))
+    print('%-28s %8d bytes' % ('orientation instance',
+                               instance_size(poses[0].orientation)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Time to build a scene of many identical objects, with the load caches.
+"""
+import _init_paths
+import argparse
+import os
+import time
+
+import numpy as np
+import pybullet
+import pybullet_data
+
+from bullet_world import BulletPhysics
+from bullet_world.math_utils import Pose
+from bullet_world.math_utils import PoseArray
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_bodies', type=int, default=200)
+    parser.add_argument('--obj_file', type=str,
+                        default=os.path.join(pybullet_data.getDataPath(),
+                                             'duck_vhacd.obj'))
+    parser.add_argument('--num_clutter', type=int, default=1000)
+    parser.add_argument('--urdf_file', type=str,
+                        default=os.path.join(pybullet_data.getDataPath(),
+                                             'cube_small.urdf'))
+    parser.add_argument('--cache_graphics_shapes', action='store_true')
+    return parser.parse_args()
+
+
+def build(physics, filename, poses, clone, **kwargs):
+    physics.reset()
+    physics.start()
+    start = time.time()
+    body_uid = physics.add_body(filename, poses[0], **kwargs)
+    for pose in poses[1:]:
+        if clone:
+            physics.clone_body(body_uid, pose)
+        else:
+            physics.add_body(filename, pose, **kwargs)
+    return (time.time() - start) / len(poses)
+
+
+def main():
+    args = parse_args()
+    physics = BulletPhysics(use_visualizer=False)
+    positions = np.random.uniform(-1, 1, size=(args.num_bodies, 3))
+    poses = [Pose([position, [0, 0, 0]]) for position in positions]
+
+    urdf_kwargs = {'cache_graphics_shapes': args.cache_graphics_shapes}
+    for (filename, kwargs) in ((args.obj_file, {}),
+                               (args.urdf_file, urdf_kwargs)):
+        name = os.path.basename(filename)
+        for clone in (False, True):
+            duration = build(physics, filename, poses, clone, **kwargs)
+            print('%-20s %-10s %8.3f ms/body' % (
+                name, 'clone_body' if clone else 'add_body', duration * 1e3))
+
+    # Clutter of small spheres with random colors.
+    physics.reset()
+    physics.start()
+    shape = {
+        'baseMass': 0.05,
+        'baseCollisionShapeIndex': physics.create_collision_shape(
+            pybullet.GEOM_SPHERE, radius=0.02),
+        'baseVisualShapeIndex': physics.create_visual_shape(
+            pybullet.GEOM_SPHERE, radius=0.02),
+    }
+    positions = np.random.uniform(-1, 1, size=(args.num_clutter, 3))
+    colors = np.random.uniform(0, 1, size=(args.num_clutter, 4))
+    colors[:, 3] = 1.0
+    start = time.time()
+    for (position, color) in zip(positions, colors):
+        body_uid = physics.add_primitive_body(basePosition=position.tolist(),
+                                              **shape)
+        physics.set_body_color(body_uid, color.tolist(), None)
+    duration = time.time() - start
+    print('%d spheres one by one: %8.3f s' % (args.num_clutter, duration))
+
+    physics.reset()
+    physics.start()
+    shape['baseCollisionShapeIndex'] = physics.create_collision_shape(
+        pybullet.GEOM_SPHERE, radius=0.02)
+    shape['baseVisualShapeIndex'] = physics.create_visual_shape(
+        pybullet.GEOM_SPHERE, radius=0.02)
+    poses = PoseArray([positions, np.zeros((args.num_clutter, 3))])
+    start = time.time()
+    physics.add_bodies_batch(shape, poses, colors=colors)
+    duration = time.time() - start
+    print('%d spheres in a batch: %8.3f s' % (args.num_clutter, duration))
+
+    for (name, stats) in sorted(physics.get_cache_stats().items()):
+        print('%-6s cache: %6d hits %6d misses %6.1f%% hit rate' % (
+            name, stats['hits'], stats['misses'], stats['hit_rate'] * 100))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Episode reset by restoring a snapshot against reloading the world.
+"""
+import _init_paths
+import argparse
+import time
+
+from bullet_world import BulletWorld
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_resets', type=int, default=100)
+    parser.add_argument('--assets_dir', type=str, default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    world_kwargs = {'default_init': True, 'use_visualizer': False}
+    if args.assets_dir is not None:
+        world_kwargs['assets_dir'] = args.assets_dir
+
+    world = BulletWorld(**world_kwargs)
+    start = time.time()
+    for _ in range(args.num_resets):
+        world.physics.reset()
+        world.physics.start()
+        world.robot_arms = []
+        world.robot_uids = []
+        world.default_initialization()
+    duration = time.time() - start
+    print('reload:  %8.3f ms/reset' % (duration / args.num_resets * 1e3))
+    del world
+
+    world = BulletWorld(**world_kwargs)
+    start = time.time()
+    for _ in range(args.num_resets):
+        world.reset()
+    duration = time.time() - start
+    print('restore: %8.3f ms/reset' % (duration / args.num_resets * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Cost of one 20 Hz action at a 1 ms time step, stepped from Python or
+sub-stepped by BulletPhysics.step.
+"""
+import _init_paths
+import argparse
+import time
+
+import numpy as np
+
+from bullet_world import BulletWorld
+
+
+NUM_ACTIONS = 100
+ACTION_REPEAT = 50
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--assets_dir', type=str, default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    world_kwargs = {'default_init': True, 'use_visualizer': False}
+    if args.assets_dir is not None:
+        world_kwargs['assets_dir'] = args.assets_dir
+    world = BulletWorld(**world_kwargs)
+    arm = world.robot_arms[0]
+    snapshot_id = world.save_snapshot()
+    targets = np.array(arm.init_joint_positions) + 0.1
+
+    def per_step():
+        for _ in range(ACTION_REPEAT):
+            arm.set_position_control_target(targets)
+            world.step_simulation()
+
+    def substeps():
+        arm.set_position_control_target(targets)
+        return world.step_simulation(ACTION_REPEAT)
+
+    for (name, func) in (('step_simulation() x %d' % ACTION_REPEAT, per_step),
+                         ('step_simulation(%d)' % ACTION_REPEAT, substeps)):
+        world.reset_to(snapshot_id)
+        start_time = time.time()
+        for _ in range(NUM_ACTIONS):
+            func()
+        seconds = time.time() - start_time
+        print('%-28s %8.1f us/action %8.1fx real time' % (
+            name, seconds / NUM_ACTIONS * 1e6,
+            NUM_ACTIONS * ACTION_REPEAT * world.physics.time_step / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Throughput of VectorBulletWorld against a single BulletWorld.
+"""
+import _init_paths
+import argparse
+import time
+
+from bullet_world import BulletWorld
+from bullet_world import VectorBulletWorld
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_worlds', type=int, default=4)
+    parser.add_argument('--num_steps', type=int, default=1000)
+    parser.add_argument('--action_repeat', type=int, default=10)
+    parser.add_argument('--assets_dir', type=str, default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    world_kwargs = {'default_init': True}
+    if args.assets_dir is not None:
+        world_kwargs['assets_dir'] = args.assets_dir
+
+    world = BulletWorld(use_visualizer=False, **world_kwargs)
+    world.reset()
+    action = world.get_observation()[:world.action_size]
+    start = time.time()
+    for _ in range(args.num_steps):
+        for _ in range(args.action_repeat):
+            world.apply_action(action)
+            world.step_simulation()
+        world.get_observation()
+    duration = time.time() - start
+    print('single world: %10.1f actions/s' % (args.num_steps / duration))
+    del world
+
+    worlds = VectorBulletWorld(args.num_worlds, world_kwargs=world_kwargs,
+                               action_repeat=args.action_repeat)
+    observations = worlds.reset()
+    actions = observations[:, :worlds.action_size]
+    start = time.time()
+    for _ in range(args.num_steps):
+        worlds.step(actions)
+    duration = time.time() - start
+    print('%d worlds:     %10.1f actions/s' % (
+        args.num_worlds, args.num_worlds * args.num_steps / duration))
+
+    worlds.close()
+
+
+if __name__ == '__main__':
+    main()
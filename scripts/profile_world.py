@@ -0,0 +1,69 @@
+"""Profile the BulletPhysics calls of a control loop of the default world.
+
+The summary is printed and written to --output, as JSON or CSV depending on
+the extension. The overhead of the disabled profiler is measured against the
+same loop before the profiler was ever enabled.
+"""
+import _init_paths
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from bullet_world import BulletWorld
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_steps', type=int, default=2000)
+    parser.add_argument('--output', type=str, default='profile.json')
+    parser.add_argument('--engine_timings', action='store_true',
+                        help='Add the internal timers of pybullet.')
+    parser.add_argument('--assets_dir', type=str, default=None)
+    return parser.parse_args()
+
+
+def run(world, num_steps):
+    arm = world.robot_arms[0]
+    joint_inds = [joint_ind for (_, joint_ind) in arm.arm_joints]
+    targets = np.array(arm.init_joint_positions)
+    start_time = time.time()
+    for _ in range(num_steps):
+        world.physics.get_joint_states(arm.uid, joint_inds)
+        world.physics.get_link_states(arm.uid, [arm.ee_link[1]])
+        arm.set_position_control_target(targets)
+        world.step_simulation()
+    return time.time() - start_time
+
+
+def main():
+    args = parse_args()
+    world_kwargs = {'default_init': True, 'use_visualizer': False}
+    if args.assets_dir is not None:
+        world_kwargs['assets_dir'] = args.assets_dir
+    world = BulletWorld(**world_kwargs)
+
+    baseline = run(world, args.num_steps)
+
+    if args.engine_timings:
+        engine_timings_file = os.path.join(tempfile.mkdtemp(), 'timings')
+    else:
+        engine_timings_file = None
+    world.physics.enable_profiler(engine_timings_file=engine_timings_file)
+    enabled = run(world, args.num_steps)
+    profiler = world.physics.disable_profiler()
+    disabled = run(world, args.num_steps)
+
+    print(profiler)
+    profiler.dump(args.output)
+    print('Wrote %s.' % args.output)
+    for (name, seconds) in (('never enabled', baseline),
+                            ('enabled', enabled),
+                            ('disabled', disabled)):
+        print('%-16s %8.2f us/step' % (name, seconds / args.num_steps * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Check the NumPy forward kinematics against get_link_pose and
+calculate_jacobian and time it.
+"""
+import _init_paths
+import argparse
+import time
+
+import numpy as np
+
+from bullet_world import BulletWorld
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_checks', type=int, default=100)
+    parser.add_argument('--batch_size', type=int, default=100000)
+    parser.add_argument('--assets_dir', type=str, default=None)
+    return parser.parse_args()
+
+
+def sample_joint_positions(physics, body_uid, num_samples, random_state):
+    """Uniform joint positions within the joint limits."""
+    body_info = physics.get_body_info(body_uid)
+    joint_inds = body_info.movable_joint_inds
+    return random_state.uniform(body_info.lower_limits[joint_inds],
+                                body_info.upper_limits[joint_inds],
+                                size=(num_samples, len(joint_inds)))
+
+
+def main():
+    args = parse_args()
+    world_kwargs = {'default_init': True, 'use_visualizer': False}
+    if args.assets_dir is not None:
+        world_kwargs['assets_dir'] = args.assets_dir
+    world = BulletWorld(**world_kwargs)
+    physics = world.physics
+    arm = world.robot_arms[0]
+    kinematics = arm.kinematics
+    random_state = np.random.RandomState(0)
+
+    joint_positions = sample_joint_positions(
+        physics, arm.uid, args.num_checks, random_state)
+    transforms = kinematics.compute_link_transforms(joint_positions)
+    jacobians = arm.compute_fk_jacobians(joint_positions)
+    position_error = 0.0
+    rotation_error = 0.0
+    jacobian_error = 0.0
+    for (i, positions) in enumerate(joint_positions):
+        physics.set_joint_states(arm.uid, kinematics.movable_joint_inds,
+                                 positions, np.zeros_like(positions))
+        for link_ind in range(kinematics.num_joints):
+            pose = physics.get_link_pose((arm.uid, link_ind))
+            position_error = max(position_error, np.linalg.norm(
+                transforms[i, link_ind, :3, 3] - pose.position))
+            rotation_error = max(rotation_error, np.abs(
+                transforms[i, link_ind, :3, :3] - pose.matrix3).max())
+        zeros = np.zeros_like(positions)
+        jacobian = np.concatenate(physics.calculate_jacobian(
+            arm.ee_link, [0.0, 0.0, 0.0], positions, zeros, zeros), axis=0)
+        jacobian_error = max(jacobian_error,
+                             np.abs(jacobians[i] - jacobian).max())
+    print('max position error %.3g m, max rotation matrix error %.3g, '
+          'max jacobian error %.3g'
+          % (position_error, rotation_error, jacobian_error))
+    assert position_error < 1e-5 and rotation_error < 1e-5
+    assert jacobian_error < 1e-5
+
+    joint_positions = sample_joint_positions(
+        physics, arm.uid, args.batch_size, random_state)
+    start_time = time.time()
+    arm.compute_fk_ee_poses(joint_positions)
+    duration = time.time() - start_time
+    print('compute_fk_ee_poses: %10.1f configurations/s'
+          % (args.batch_size / duration))
+
+    start_time = time.time()
+    for positions in joint_positions[:args.num_checks]:
+        physics.set_joint_states(arm.uid, kinematics.movable_joint_inds,
+                                 positions, np.zeros_like(positions))
+        physics.get_link_pose(arm.ee_link)
+    duration = time.time() - start_time
+    print('set_joint_states + get_link_pose: %10.1f configurations/s'
+          % (args.num_checks / duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Step several headless worlds in one process and check they are independent.
+"""
+import _init_paths
+import argparse
+import time
+
+import numpy as np
+
+from bullet_world import MultiWorld
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_worlds', type=int, default=8)
+    parser.add_argument('--num_steps', type=int, default=1000)
+    parser.add_argument('--num_threads', type=int, default=0)
+    parser.add_argument('--assets_dir', type=str, default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    world_kwargs = {'default_init': True}
+    if args.assets_dir is not None:
+        world_kwargs['assets_dir'] = args.assets_dir
+
+    worlds = MultiWorld(args.num_worlds, world_kwargs=world_kwargs,
+                        num_threads=args.num_threads)
+    client_uids = set(world.physics.uid for world in worlds)
+    assert len(client_uids) == args.num_worlds, client_uids
+
+    observations = worlds.reset()
+    actions = observations[:, :worlds[0].action_size].copy()
+    actions += np.linspace(-0.2, 0.2, args.num_worlds)[:, np.newaxis]
+
+    start = time.time()
+    worlds.step(actions, num_steps=args.num_steps)
+    duration = time.time() - start
+    print('%d worlds: %10.1f steps/s' % (
+        args.num_worlds, args.num_worlds * args.num_steps / duration))
+
+    # Every world tracked its own action.
+    arm = worlds[0].robot_arms[0]
+    joint_inds = [joint_ind for _, joint_ind in arm.arm_joints]
+    states = worlds.get_joint_states(arm.uid, joint_inds)
+    print('max tracking error: %.4f' % np.abs(
+        states['position'] - actions).max())
+    ee_poses = worlds.get_link_states(arm.uid, [arm.ee_link[1]])
+    print('end effector positions:')
+    print(ee_poses[:, 0, :3])
+    worlds.close()
+
+
+if __name__ == '__main__':
+    main()